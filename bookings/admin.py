@@ -1,12 +1,27 @@
 # bookings/admin.py
-from django.contrib import admin
+from urllib.parse import urlencode
+
+from django.contrib import admin, messages
+from django.contrib.admin.utils import quote
+from django.contrib.admin.views.main import ChangeList
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.shortcuts import redirect
+from django.urls import path, reverse
 from django.utils.html import format_html
 from django.utils import timezone
-from .models import Hotel, Coupon, Booking
+from config.content_cache import bump_availability_version
+from config.csv_export import CsvExportMixin
+from config.pagination import EstimatedCountPaginator
+from rooms.admin import ICalFeedMixin
+from .imports import pop_import_results, queue_import
+from .invoices import invoice_archive, month_invoices, parse_month, queue_booking_invoice
+from .models import Hotel, Coupon, Booking, ArchivedBooking, EmailOutbox
 
 
 @admin.register(Hotel)
-class HotelAdmin(admin.ModelAdmin):
+class HotelAdmin(ICalFeedMixin, admin.ModelAdmin):
     list_display = ['name', 'city', 'state', 'phone', 'is_active']
     list_filter = ['is_active', 'city', 'state']
     search_fields = ['name', 'city', 'address']
@@ -27,13 +42,78 @@ class HotelAdmin(admin.ModelAdmin):
             'fields': ('check_in_time', 'check_out_time')
         }),
         ('Estado', {
-            'fields': ('is_active',)
+            'fields': ('is_active', 'ical_feed')
         }),
     )
+    ical_scope = 'hotel'
+
+
+# Encabezados compatibles con import_bookings: un CSV exportado se puede volver a cargar
+BOOKING_EXPORT_COLUMNS = [
+    ('invoice_id', 'invoice_id'),
+    ('booking_id', 'booking_id'),
+    ('booking_date', 'booking_date'),
+    ('username', 'user__username'),
+    ('email', 'user__email'),
+    ('first_name', 'user__first_name'),
+    ('last_name', 'user__last_name'),
+    ('hotel', 'hotel__slug'),
+    ('hotel_name', 'hotel__name'),
+    ('room', 'room__room_number'),
+    ('room_type', 'room__room_type__name'),
+    ('check_in_date', 'check_in_date'),
+    ('check_out_date', 'check_out_date'),
+    ('adults', 'adults'),
+    ('children', 'children'),
+    ('payment_status', 'payment_status'),
+    ('coupon', 'coupon__code'),
+    ('subtotal', 'subtotal'),
+    ('discount_amount', 'discount_amount'),
+    ('tax_amount', 'tax_amount'),
+    ('total_price', 'total_price'),
+    ('special_requests', 'special_requests'),
+]
+
+
+class BookingArchiveFilter(admin.SimpleListFilter):
+    """
+    Alterna el listado de reservaciones entre las vigentes y el archivo.
+    BookingAdmin.get_queryset cambia de tabla; ArchivedBooking tiene los mismos
+    campos, así que filtros, búsqueda y exportación funcionan igual.
+    """
+    title = 'Tabla'
+    parameter_name = 'archivo'
+
+    def lookups(self, request, model_admin):
+        return [('1', 'Archivadas')]
+
+    def choices(self, changelist):
+        choices = list(super().choices(changelist))
+        choices[0]['display'] = 'Vigentes'
+        return choices
+
+    def queryset(self, request, queryset):
+        return queryset
+
+
+def is_archive_view(request):
+    return request.GET.get(BookingArchiveFilter.parameter_name) == '1'
+
+
+class BookingChangeList(ChangeList):
+    def url_for_result(self, result):
+        # Las archivadas se abren en su vista de solo lectura
+        if isinstance(result, ArchivedBooking):
+            return reverse(
+                'admin:bookings_archivedbooking_change',
+                args=(quote(result.pk),),
+                current_app=self.model_admin.admin_site.name,
+            )
+        return super().url_for_result(result)
 
 
 @admin.register(Coupon)
-class CouponAdmin(admin.ModelAdmin):
+class CouponAdmin(CsvExportMixin, admin.ModelAdmin):
     list_display = ['code', 'discount_display', 'valid_from', 'valid_until', 
                     'usage_display', 'is_valid_now', 'is_active']
     list_filter = ['discount_type', 'is_active', 'valid_from', 'valid_until']
@@ -52,6 +132,22 @@ class CouponAdmin(admin.ModelAdmin):
         }),
     )
     
+    actions = ['export_csv']
+    export_columns = [
+        ('code', 'code'),
+        ('discount_type', 'discount_type'),
+        ('discount_value', 'discount_value'),
+        ('min_amount', 'min_amount'),
+        ('max_discount', 'max_discount'),
+        ('max_uses', 'max_uses'),
+        ('times_used', 'times_used'),
+        ('valid_from', 'valid_from'),
+        ('valid_until', 'valid_until'),
+        ('is_active', 'is_active'),
+        ('created_at', 'created_at'),
+    ]
+    export_date_field = 'created_at'
+    
     def discount_display(self, obj):
         if obj.discount_type == 'PERCENTAGE':
             return f"{obj.discount_value}%"
@@ -78,16 +174,20 @@ class CouponAdmin(admin.ModelAdmin):
 
 
 @admin.register(Booking)
-class BookingAdmin(admin.ModelAdmin):
+class BookingAdmin(CsvExportMixin, admin.ModelAdmin):
     list_display = ['invoice_id', 'user_name', 'hotel', 'room_number', 
                     'check_in_date', 'check_out_date', 'total_price', 
                     'payment_status', 'booking_date']
-    list_filter = ['payment_status', 'hotel', 'check_in_date', 'booking_date']
+    list_filter = [BookingArchiveFilter, 'payment_status', 'hotel', 'check_in_date', 'booking_date']
     search_fields = ['invoice_id', 'booking_id', 'user__username', 
                      'user__email', 'user__first_name', 'user__last_name']
     readonly_fields = ['booking_id', 'invoice_id', 'booking_date', 
                        'total_days', 'created_at', 'updated_at']
     date_hierarchy = 'check_in_date'
+    # Tabla grande: sin COUNT(*) completo y relaciones en la misma consulta (get_queryset)
+    autocomplete_fields = ['user', 'room', 'coupon']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     fieldsets = (
         ('Identificación', {
@@ -111,7 +211,114 @@ class BookingAdmin(admin.ModelAdmin):
         }),
     )
     
-    actions = ['mark_as_paid', 'mark_as_confirmed', 'cancel_bookings']
+    actions = ['mark_as_paid', 'mark_as_confirmed', 'cancel_bookings', 'export_csv']
+    export_columns = BOOKING_EXPORT_COLUMNS
+    export_date_field = 'booking_date'
+    
+    def get_queryset(self, request):
+        # Listado y autocompletado de reseñas (__str__ usa al usuario) en una consulta
+        if is_archive_view(request):
+            queryset = ArchivedBooking.objects.all()
+        else:
+            queryset = super().get_queryset(request)
+        return queryset.select_related('user', 'hotel', 'room')
+    
+    def get_changelist(self, request, **kwargs):
+        return BookingChangeList
+    
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        if is_archive_view(request):
+            # El archivo es de solo lectura
+            return {name: action for name, action in actions.items() if name == 'export_csv'}
+        return actions
+    
+    def changelist_view(self, request, extra_context=None):
+        if request.method == 'GET':
+            self.show_import_results(request)
+        query = request.GET.get('q', '').strip()
+        if request.method == 'GET' and query and not is_archive_view(request):
+            archived, _ = self.get_search_results(request, ArchivedBooking.objects.all(), query)
+            if archived.exists():
+                self.message_user(request, format_html(
+                    'También hay reservaciones archivadas que coinciden con «{}»: '
+                    '<a href="?{}">ver en el archivo</a>.',
+                    query, urlencode({BookingArchiveFilter.parameter_name: '1', 'q': query})
+                ), messages.INFO)
+        return super().changelist_view(request, extra_context)
+    
+    def get_urls(self):
+        return [
+            path(
+                'invoices/export/',
+                self.admin_site.admin_view(self.export_invoices),
+                name='bookings_booking_export_invoices'
+            ),
+            path(
+                'import/',
+                self.admin_site.admin_view(self.import_bookings),
+                name='bookings_booking_import'
+            ),
+        ] + super().get_urls()
+    
+    def export_invoices(self, request):
+        """Zip con las facturas del mes (?month=AAAA-MM), enviado conforme se arma"""
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        try:
+            year, month = parse_month(request.GET.get('month'))
+        except ValueError:
+            self.message_user(request, 'El mes debe tener el formato AAAA-MM.', messages.ERROR)
+            return redirect('admin:bookings_booking_changelist')
+        response = StreamingHttpResponse(
+            invoice_archive(month_invoices(year, month)), content_type='application/zip'
+        )
+        response['Content-Disposition'] = f'attachment; filename="facturas-{year}-{month:02d}.zip"'
+        return response
+    
+    def import_bookings(self, request):
+        """Encola un CSV o XLSX de reservaciones (bookings/imports.py); el resultado aparece en el listado"""
+        if request.method != 'POST' or not self.has_add_permission(request):
+            raise PermissionDenied
+        upload = request.FILES.get('file')
+        if upload is None:
+            self.message_user(request, 'Selecciona un archivo CSV o XLSX.', messages.ERROR)
+            return redirect('admin:bookings_booking_changelist')
+        if not queue_import(upload, bool(request.POST.get('create_users')), request.user.pk):
+            self.message_user(
+                request,
+                'No se pudo encolar la importación; inténtalo más tarde o usa el comando import_bookings.',
+                messages.ERROR
+            )
+            return redirect('admin:bookings_booking_changelist')
+        
+        self.message_user(
+            request,
+            f'Importando «{upload.name}» en segundo plano; el resultado aparecerá aquí al terminar.',
+            messages.INFO
+        )
+        return redirect('admin:bookings_booking_changelist')
+    
+    def show_import_results(self, request):
+        for summary in pop_import_results(request.user.pk):
+            if 'error' in summary:
+                self.message_user(
+                    request, f'No se pudo leer «{summary["file"]}»: {summary["error"]}', messages.ERROR
+                )
+                continue
+            self.message_user(
+                request,
+                f'«{summary["file"]}»: {summary["created"]} reservaciones importadas, '
+                f'{summary["rejected"]} filas rechazadas.',
+                messages.WARNING if summary['rejected'] else messages.SUCCESS
+            )
+            for line, reason in summary['errors']:
+                self.message_user(request, f'Línea {line}: {reason}', messages.WARNING)
+    
+    def queue_invoices(self, queryset):
+        # update() no dispara señales: las facturas se encolan aquí, al confirmar la transacción
+        booking_ids = list(queryset.values_list('pk', flat=True))
+        transaction.on_commit(lambda: [queue_booking_invoice(pk) for pk in booking_ids])
     
     def user_name(self, obj):
         return obj.user.get_full_name() or obj.user.username
@@ -128,14 +335,83 @@ class BookingAdmin(admin.ModelAdmin):
     @admin.action(description='Marcar como pagado')
     def mark_as_paid(self, request, queryset):
         updated = queryset.update(payment_status='PAID')
+        bump_availability_version()
+        self.queue_invoices(queryset)
         self.message_user(request, f'{updated} reservaciones marcadas como pagadas.')
     
     @admin.action(description='Marcar como confirmado')
     def mark_as_confirmed(self, request, queryset):
         updated = queryset.update(payment_status='CONFIRMED')
+        bump_availability_version()
+        self.queue_invoices(queryset)
         self.message_user(request, f'{updated} reservaciones confirmadas.')
     
     @admin.action(description='Cancelar reservaciones')
     def cancel_bookings(self, request, queryset):
         updated = queryset.update(payment_status='CANCELLED')
+        bump_availability_version()
         self.message_user(request, f'{updated} reservaciones canceladas.')
+
+
+@admin.register(ArchivedBooking)
+class ArchivedBookingAdmin(CsvExportMixin, admin.ModelAdmin):
+    """
+    Detalle de solo lectura de las reservas archivadas; el listado de
+    reservaciones las muestra con el filtro "Tabla: Archivadas".
+    """
+    list_display = ['invoice_id', 'user_name', 'hotel', 'room_number', 
+                    'check_in_date', 'check_out_date', 'total_price', 
+                    'payment_status', 'booking_date', 'archived_at']
+    list_filter = ['payment_status', 'hotel', 'check_in_date']
+    search_fields = BookingAdmin.search_fields
+    list_select_related = ['user', 'hotel', 'room']
+    date_hierarchy = 'check_in_date'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    fieldsets = BookingAdmin.fieldsets + (
+        ('Archivo', {
+            'fields': ('archived_at',)
+        }),
+    )
+    
+    actions = ['export_csv']
+    export_columns = BOOKING_EXPORT_COLUMNS + [('archived_at', 'archived_at')]
+    export_date_field = 'booking_date'
+    
+    user_name = BookingAdmin.user_name
+    room_number = BookingAdmin.room_number
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'kind', 'to_email', 'status', 'attempts', 
+                    'next_attempt_at', 'sent_at', 'created_at']
+    list_filter = ['status', 'kind', 'created_at']
+    search_fields = ['to_email', 'subject']
+    list_select_related = ['booking']
+    raw_id_fields = ['booking']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    readonly_fields = ['sent_at', 'created_at', 'last_error']
+    
+    actions = ['retry_emails']
+    
+    @admin.action(description='Reintentar envío')
+    def retry_emails(self, request, queryset):
+        from .utils import wake_outbox_worker
+        updated = queryset.exclude(status=EmailOutbox.Status.SENT).update(
+            status=EmailOutbox.Status.PENDING,
+            attempts=0,
+            next_attempt_at=timezone.now()
+        )
+        wake_outbox_worker()
+        self.message_user(request, f'{updated} correos reprogramados.')
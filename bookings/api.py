@@ -0,0 +1,89 @@
+# bookings/api.py
+from django.db.models import BooleanField, F, Value
+
+from config.api import (
+    ApiError, ApiLoginRequiredMixin, ApiView, json_response, paginated_response, parse_fields, project
+)
+from .archive import BookingHistory
+from .models import ArchivedBooking, Booking
+
+BOOKING_FIELDS = [
+    'booking_id', 'invoice_id', 'hotel_name', 'room_type_name', 'room_number',
+    'check_in_date', 'check_out_date', 'nights', 'adults', 'children',
+    'subtotal', 'discount_amount', 'tax_amount', 'total_price',
+    'payment_status', 'booking_date', 'is_archived',
+]
+
+# Campos calculados en Python o leídos a través de relaciones
+RELATED_COLUMNS = {
+    'hotel_name': F('hotel__name'),
+    'room_type_name': F('room__room_type__name'),
+    'room_number': F('room__room_number'),
+}
+COMPUTED_DEPENDENCIES = {
+    'nights': ['check_in_date', 'check_out_date'],
+}
+# Campos de orden de la paginación: siempre se leen
+ORDERING_COLUMNS = ['booking_date', 'id']
+
+
+def booking_values(queryset, fields, archived):
+    """`.values()` con solo las columnas que necesitan los campos pedidos"""
+    columns = set(ORDERING_COLUMNS)
+    for field in fields:
+        columns.update(COMPUTED_DEPENDENCIES.get(field, [field]))
+    columns -= {'is_archived', 'nights'}
+
+    related = {name: RELATED_COLUMNS[name] for name in columns & RELATED_COLUMNS.keys()}
+    plain = sorted(columns - related.keys())
+    return queryset.values(
+        *plain,
+        is_archived=Value(archived, output_field=BooleanField()),
+        **related
+    )
+
+
+def add_nights(rows):
+    for row in rows:
+        if 'check_in_date' in row and 'check_out_date' in row:
+            row['nights'] = (row['check_out_date'] - row['check_in_date']).days
+    return rows
+
+
+class BookingListApi(ApiLoginRequiredMixin, ApiView):
+    """
+    GET /api/v1/bookings/?status=PAID&fields=booking_id,total_price&cursor=...
+
+    Reservas del usuario (vigentes y archivadas), paginadas por cursor.
+    """
+
+    def get(self, request):
+        fields = parse_fields(request, BOOKING_FIELDS)
+        history = BookingHistory(*(
+            booking_values(
+                model.objects.filter(user=request.user).order_by('-booking_date'),
+                fields, archived=model is ArchivedBooking
+            )
+            for model in (Booking, ArchivedBooking)
+        ))
+
+        status = request.GET.get('status')
+        if status:
+            history = history.filter(payment_status=status)
+
+        return paginated_response(request, history, fields, transform=add_nights)
+
+
+class BookingDetailApi(ApiLoginRequiredMixin, ApiView):
+    """GET /api/v1/bookings/<booking_id>/; busca en el archivo si ya no está vigente"""
+
+    def get(self, request, booking_id):
+        fields = parse_fields(request, BOOKING_FIELDS)
+        for model in (Booking, ArchivedBooking):
+            rows = list(booking_values(
+                model.objects.filter(booking_id=booking_id, user=request.user),
+                fields, archived=model is ArchivedBooking
+            ))
+            if rows:
+                return json_response(project(add_nights(rows), fields)[0])
+        raise ApiError('Reservación no encontrada', 404)
@@ -0,0 +1,122 @@
+# bookings/archive.py
+"""
+Archivado de reservaciones históricas.
+
+Las reservas cuya estancia terminó hace más de BOOKING_ARCHIVE_AFTER_DAYS
+días se mueven a ArchivedBooking en lotes, cada uno en su propia transacción.
+Por cada lote se copian las filas con el mismo id, se reenlazan las reseñas,
+se acumulan los conteos en HotelStatistics y se borran de Booking. Así las
+consultas de disponibilidad y estadísticas solo recorren reservas vigentes.
+"""
+from datetime import timedelta
+from itertools import chain
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import ArchivedBooking, Booking
+
+# Columnas que se copian tal cual (incluye id y las llaves foráneas)
+ARCHIVE_FIELDS = [
+    field.attname for field in ArchivedBooking._meta.concrete_fields
+    if field.name != 'archived_at'
+]
+
+
+def archive_cutoff(days=None):
+    """Fecha de check-out a partir de la cual una reserva sigue vigente"""
+    if days is None:
+        days = settings.BOOKING_ARCHIVE_AFTER_DAYS
+    return timezone.now().date() - timedelta(days=days)
+
+
+def archivable_bookings(cutoff):
+    return Booking.objects.filter(check_out_date__lt=cutoff)
+
+
+def archive_batch(cutoff, batch_size):
+    """Mueve un lote de reservas al archivo; retorna cuántas movió"""
+    from reviews.models import HotelStatistics, ReviewAndRating
+
+    with transaction.atomic():
+        ids = list(
+            archivable_bookings(cutoff).order_by('pk').select_for_update(
+                skip_locked=True
+            ).values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return 0
+
+        live = Booking.objects.filter(pk__in=ids)
+        ArchivedBooking.objects.bulk_create(
+            ArchivedBooking(**row) for row in live.values(*ARCHIVE_FIELDS)
+        )
+
+        # Las reseñas conservan su reservación a través de archived_booking
+        ReviewAndRating.objects.filter(booking_id__in=ids).update(
+            archived_booking_id=F('booking_id'),
+            booking=None
+        )
+
+        # Acumular los conteos para que las estadísticas no cambien
+        totals = live.order_by().values('hotel_id').annotate(
+            total=Count('pk'),
+            completed=Count('pk', filter=Q(payment_status__in=['PAID', 'CONFIRMED'])),
+            cancelled=Count('pk', filter=Q(payment_status='CANCELLED')),
+        )
+        for row in totals:
+            HotelStatistics.objects.get_or_create(hotel_id=row['hotel_id'])
+            HotelStatistics.objects.filter(hotel_id=row['hotel_id']).update(
+                archived_total_bookings=F('archived_total_bookings') + row['total'],
+                archived_completed_bookings=F('archived_completed_bookings') + row['completed'],
+                archived_cancelled_bookings=F('archived_cancelled_bookings') + row['cancelled'],
+            )
+
+        live.delete()
+
+    return len(ids)
+
+
+def archive_bookings(days=None, batch_size=None, max_batches=None):
+    """Archiva lotes hasta que no quede nada por mover (o se alcance max_batches)"""
+    cutoff = archive_cutoff(days)
+    batch_size = batch_size or settings.BOOKING_ARCHIVE_BATCH_SIZE
+
+    total = batches = 0
+    while max_batches is None or batches < max_batches:
+        moved = archive_batch(cutoff, batch_size)
+        total += moved
+        batches += 1
+        if moved < batch_size:
+            break
+    return total
+
+
+class BookingHistory:
+    """
+    Historial de reservas sobre ambas tablas: primero las vigentes y luego las
+    archivadas, cada grupo en el orden de su queryset.
+
+    KeysetPaginator recorre `querysets` en orden, así que el archivo solo se
+    consulta cuando la página lo alcanza.
+    """
+    model = Booking
+
+    def __init__(self, live, archived):
+        self.live = live
+        self.archived = archived
+
+    @property
+    def querysets(self):
+        return [self.live, self.archived]
+
+    def __iter__(self):
+        return chain(self.live, self.archived)
+
+    def filter(self, *args, **kwargs):
+        return BookingHistory(
+            self.live.filter(*args, **kwargs),
+            self.archived.filter(*args, **kwargs)
+        )
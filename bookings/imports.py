@@ -0,0 +1,523 @@
+# bookings/imports.py
+"""
+Importación masiva de reservaciones desde CSV o XLSX (migración desde otro PMS).
+
+Booking.save() recalcula precios y dispara siete receptores por fila (cupón,
+estado de la habitación, estadísticas, correos, facturas, disponibilidad);
+con cientos de miles de filas eso tarda horas. Aquí el archivo se lee en
+streaming y se procesa por bloques de BOOKING_IMPORT_CHUNK_SIZE filas:
+
+1. cada fila se valida por separado (fechas, huéspedes contra la capacidad
+   de la habitación, estado, importes); habitaciones, hoteles y cupones se
+   cargan una vez al inicio y los huéspedes con una consulta por bloque;
+2. los traslapes se revisan en memoria: las ocupaciones del bloque (reservas
+   activas y bloqueos externos ya guardados) se leen en una consulta y cada
+   fila aceptada se agrega a ellas, así dos filas del mismo archivo tampoco
+   pueden ocupar la misma habitación;
+3. las filas válidas se insertan con bulk_create, que no dispara señales, en
+   una transacción por bloque.
+
+Al terminar se reconstruye una sola vez lo que las señales habrían mantenido:
+usos de cupones, estado de las habitaciones, available_now, estadísticas por
+hotel, ETags de disponibilidad y el aviso a SSE y canales. No se envían
+correos; las facturas se generan al abrirse.
+
+Desde el admin el archivo se guarda en el storage 'imports' y lo importa la
+tarea import_booking_file (queue_import): la petición no espera a la
+importación, que con archivos grandes pasa del timeout de gunicorn. El
+resumen queda en la cache hasta que quien subió el archivo abre el listado
+(pop_import_results).
+
+Columnas (encabezados en la primera fila; solo las marcadas son obligatorias):
+email*, first_name, last_name, hotel (slug), room* (número), check_in_date*,
+check_out_date*, adults*, children, payment_status, coupon (código),
+subtotal, discount_amount, tax_amount, total_price, special_requests,
+invoice_id, booking_date. Sin total_price los importes se calculan como en
+Booking.save(); sin invoice_id se genera uno.
+"""
+import bisect
+import csv
+import io
+import logging
+import os
+import uuid
+import zipfile
+from collections import Counter, defaultdict
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from itertools import chain, islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.files.storage import storages
+from django.core.management import call_command
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from config.content_cache import bump_availability_version
+from rooms.channels import merge_intervals
+from rooms.models import Room, RoomBlock
+from .models import ArchivedBooking, Booking, Coupon, Hotel, User, price_breakdown
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ['PAID', 'CONFIRMED']
+# Además de ISO (AAAA-MM-DD)
+DATE_FORMATS = ['%d/%m/%Y']
+# Resúmenes de importaciones terminadas, por usuario, hasta que abre el listado
+IMPORT_RESULTS_KEY = 'bookings:import-results:{}'
+IMPORT_RESULTS_TIMEOUT = 7 * 24 * 60 * 60
+# Estados por código o por su nombre en español ('Pagado', 'confirmado'...)
+STATUS_NAMES = {
+    **{str(label).lower(): value for value, label in Booking.PaymentStatus.choices},
+    **{value.lower(): value for value in Booking.PaymentStatus.values},
+}
+
+
+def text(value):
+    """Celda como texto; los enteros de Excel llegan como 101.0"""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def parse_date(value, column):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(text(value))
+    except ValueError:
+        pass
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text(value), date_format).date()
+        except ValueError:
+            pass
+    raise ValueError(f'{column}: fecha inválida {text(value)!r}')
+
+
+def parse_datetime(value, column):
+    if not isinstance(value, datetime):
+        try:
+            value = datetime.fromisoformat(text(value))
+        except ValueError:
+            value = datetime.combine(parse_date(value, column), datetime.min.time())
+    return timezone.make_aware(value) if timezone.is_naive(value) else value
+
+
+def parse_int(value, column, default=None):
+    if text(value) == '' and default is not None:
+        return default
+    try:
+        return int(text(value))
+    except ValueError:
+        raise ValueError(f'{column}: número inválido {text(value)!r}') from None
+
+
+def parse_decimal(value, column):
+    """
+    Importe para el DecimalField `column` de Booking. NaN, Infinity o un
+    valor que no cabe en max_digits harían fallar el INSERT de todo el
+    bloque: se rechazan aquí, solo en su fila.
+    """
+    field = Booking._meta.get_field(column)
+    try:
+        amount = Decimal(text(value).replace('$', '').replace(',', '') or '0')
+    except InvalidOperation:
+        raise ValueError(f'{column}: importe inválido {text(value)!r}') from None
+    if not amount.is_finite():
+        raise ValueError(f'{column}: importe inválido {text(value)!r}')
+    try:
+        # Redondeado como lo guardaría la base de datos
+        amount = amount.quantize(Decimal(1).scaleb(-field.decimal_places))
+    except InvalidOperation:
+        # Más dígitos que la precisión de Decimal: no cabe en ningún caso
+        amount = None
+    if amount is None or abs(amount) >= 10 ** (field.max_digits - field.decimal_places):
+        raise ValueError(f'{column}: importe fuera de rango {text(value)!r}')
+    return amount
+
+
+def read_csv(file):
+    reader = csv.reader(io.TextIOWrapper(file, encoding='utf-8-sig', newline=''))
+    try:
+        header = [text(name).lower() for name in next(reader, [])]
+        for values in reader:
+            if any(values):
+                yield reader.line_num, dict(zip(header, values))
+    except csv.Error as exc:
+        raise ValueError(f'CSV inválido en la línea {reader.line_num}: {exc}') from None
+
+
+def read_xlsx(file):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError('Para importar archivos XLSX hay que instalar openpyxl') from None
+
+    # read_only: las filas se leen del zip conforme se recorren, sin cargar la hoja
+    try:
+        workbook = load_workbook(file, read_only=True, data_only=True)
+    except (zipfile.BadZipFile, KeyError, OSError):
+        raise ValueError('el archivo no es un XLSX válido') from None
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [text(name).lower() for name in next(rows, ())]
+        for line, values in enumerate(rows, start=2):
+            if any(text(value) for value in values):
+                yield line, dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def read_rows(file, name):
+    """(número de línea, {columna: valor}) del archivo, CSV o XLSX según la extensión"""
+    if name.lower().endswith('.xlsx'):
+        return read_xlsx(file)
+    return read_csv(file)
+
+
+class Occupancy:
+    """Noches ocupadas por habitación como intervalos [inicio, fin) disjuntos y ordenados"""
+
+    def __init__(self):
+        self.starts = defaultdict(list)
+        self.ends = defaultdict(list)
+
+    def overlaps(self, room_id, start, end):
+        starts = self.starts.get(room_id)
+        if not starts:
+            return False
+        # Entre los intervalos que empiezan antes de `end`, el último es el que termina más tarde
+        index = bisect.bisect_left(starts, end)
+        return index > 0 and self.ends[room_id][index - 1] > start
+
+    def add(self, room_id, start, end):
+        index = bisect.bisect_left(self.starts[room_id], start)
+        self.starts[room_id].insert(index, start)
+        self.ends[room_id].insert(index, end)
+
+
+def load_occupancy(room_ids, start, end):
+    """Ocupación guardada (reservas activas y bloqueos) de las habitaciones en [start, end)"""
+    bookings = Booking.objects.filter(
+        room_id__in=room_ids,
+        check_in_date__lt=end,
+        check_out_date__gt=start,
+        payment_status__in=ACTIVE_STATUSES
+    ).values_list('room_id', 'check_in_date', 'check_out_date')
+    blocks = RoomBlock.objects.filter(
+        room_id__in=room_ids,
+        start_date__lt=end,
+        end_date__gt=start
+    ).values_list('room_id', 'start_date', 'end_date')
+
+    busy = defaultdict(list)
+    for room_id, first, last in chain(bookings, blocks):
+        busy[room_id].append((first, last))
+    occupancy = Occupancy()
+    for room_id, intervals in busy.items():
+        # Datos previos que ya se traslapaban se unen para mantener los intervalos disjuntos
+        for first, last in merge_intervals(intervals):
+            occupancy.add(room_id, first, last)
+    return occupancy
+
+
+class BookingImporter:
+    """
+    Importa filas de read_rows() por bloques. Después de run(): `created`
+    (reservas insertadas), `errors` [(línea, motivo)] y `users_created`.
+    """
+
+    def __init__(self, create_users=False, chunk_size=None):
+        self.create_users = create_users
+        self.chunk_size = chunk_size or settings.BOOKING_IMPORT_CHUNK_SIZE
+        self.hotels = dict(Hotel.objects.values_list('slug', 'pk'))
+        self.rooms = {
+            room_number: (pk, room_type_id, capacity, price)
+            for room_number, pk, room_type_id, capacity, price in Room.objects.values_list(
+                'room_number', 'pk', 'room_type_id', 'room_type__room_capacity', 'room_type__price_per_night'
+            )
+        }
+        self.coupons = {coupon.code.upper(): coupon for coupon in Coupon.objects.all()}
+        self.users = {}
+        self.invoice_ids = set()
+        self.created = 0
+        self.users_created = 0
+        self.errors = []
+        # Para reconstruir al final lo que mantendrían las señales
+        self.coupon_uses = Counter()
+        self.hotel_ids = set()
+        self.stays = {}
+
+    def run(self, rows):
+        rows = iter(rows)
+        while chunk := list(islice(rows, self.chunk_size)):
+            self.import_chunk(chunk)
+        if self.created:
+            self.rebuild()
+        return self
+
+    def parse_row(self, row):
+        """Valores limpios de una fila; ValueError con el motivo si no es válida"""
+        email = text(row.get('email')).lower()
+        if not email:
+            raise ValueError('email: obligatorio')
+
+        room = self.rooms.get(text(row.get('room')))
+        if room is None:
+            raise ValueError(f'room: habitación desconocida {text(row.get("room"))!r}')
+        room_id, room_type_id, capacity, price_per_night = room
+
+        hotel_slug = text(row.get('hotel'))
+        if hotel_slug:
+            hotel_id = self.hotels.get(hotel_slug)
+            if hotel_id is None:
+                raise ValueError(f'hotel: hotel desconocido {hotel_slug!r}')
+        elif len(self.hotels) == 1:
+            hotel_id = next(iter(self.hotels.values()))
+        else:
+            raise ValueError('hotel: obligatorio cuando hay varios hoteles')
+
+        check_in = parse_date(row.get('check_in_date'), 'check_in_date')
+        check_out = parse_date(row.get('check_out_date'), 'check_out_date')
+        if check_in >= check_out:
+            raise ValueError('check_out_date: debe ser posterior al check-in')
+
+        adults = parse_int(row.get('adults'), 'adults')
+        children = parse_int(row.get('children'), 'children', default=0)
+        if adults < 1 or children < 0:
+            raise ValueError('adults: se necesita al menos un adulto')
+        if adults + children > capacity:
+            raise ValueError(f'room: la habitación {text(row.get("room"))} solo permite {capacity} huéspedes')
+
+        status = text(row.get('payment_status')).lower() or Booking.PaymentStatus.PENDING.lower()
+        if status not in STATUS_NAMES:
+            raise ValueError(f'payment_status: estado desconocido {text(row.get("payment_status"))!r}')
+
+        coupon = None
+        if text(row.get('coupon')):
+            coupon = self.coupons.get(text(row.get('coupon')).upper())
+            if coupon is None:
+                raise ValueError(f'coupon: cupón desconocido {text(row.get("coupon"))!r}')
+
+        if text(row.get('total_price')):
+            # Importes del sistema anterior, tal cual se cobraron
+            prices = {
+                field: parse_decimal(row.get(field), field)
+                for field in ('subtotal', 'discount_amount', 'tax_amount', 'total_price')
+            }
+        else:
+            prices = price_breakdown(price_per_night, (check_out - check_in).days, coupon)
+
+        invoice_id = text(row.get('invoice_id')) or f"INV-{uuid.uuid4().hex[:12].upper()}"
+        if invoice_id in self.invoice_ids:
+            raise ValueError(f'invoice_id: repetido en el archivo {invoice_id!r}')
+        self.invoice_ids.add(invoice_id)
+
+        booking_date = text(row.get('booking_date'))
+        return {
+            'email': email,
+            'first_name': text(row.get('first_name'))[:150],
+            'last_name': text(row.get('last_name'))[:150],
+            'hotel_id': hotel_id,
+            'room_id': room_id,
+            'room_type_id': room_type_id,
+            'coupon': coupon,
+            'check_in_date': check_in,
+            'check_out_date': check_out,
+            'adults': adults,
+            'children': children,
+            'payment_status': STATUS_NAMES[status],
+            'special_requests': text(row.get('special_requests')),
+            'invoice_id': invoice_id,
+            'booking_date': parse_datetime(row.get('booking_date'), 'booking_date') if booking_date else None,
+            **prices,
+        }
+
+    def resolve_users(self, parsed):
+        """Huéspedes del bloque por email, con una consulta (y un bulk_create si se pidió crearlos)"""
+        missing = {data['email']: data for data in parsed if data['email'] not in self.users}
+        if not missing:
+            return
+        self.users.update(self.find_users(missing))
+
+        new_users = {email: data for email, data in missing.items() if email not in self.users}
+        if new_users and self.create_users:
+            User.objects.bulk_create(
+                [
+                    User(
+                        username=email[:150], email=email, first_name=data['first_name'],
+                        last_name=data['last_name'], password=make_password(None)
+                    )
+                    for email, data in new_users.items()
+                ],
+                ignore_conflicts=True,
+            )
+            found = self.find_users(new_users)
+            self.users_created += len(found)
+            self.users.update(found)
+
+    def find_users(self, emails):
+        # Orden descendente: con emails repetidos gana el usuario más antiguo
+        users = User.objects.annotate(email_lower=Lower('email')).filter(
+            email_lower__in=list(emails)
+        ).order_by('-pk').values_list('email_lower', 'pk')
+        return dict(users)
+
+    def import_chunk(self, chunk):
+        parsed = []
+        for line, row in chunk:
+            try:
+                parsed.append((line, self.parse_row(row)))
+            except ValueError as exc:
+                self.errors.append((line, str(exc)))
+        if not parsed:
+            return
+
+        rows = [data for _, data in parsed]
+        self.resolve_users(rows)
+        invoice_ids = [data['invoice_id'] for data in rows]
+        taken = set(Booking.objects.filter(invoice_id__in=invoice_ids).values_list('invoice_id', flat=True))
+        taken.update(ArchivedBooking.objects.filter(invoice_id__in=invoice_ids).values_list('invoice_id', flat=True))
+        occupancy = load_occupancy(
+            {data['room_id'] for data in rows},
+            min(data['check_in_date'] for data in rows),
+            max(data['check_out_date'] for data in rows),
+        )
+
+        accepted = []
+        for line, data in parsed:
+            user_id = self.users.get(data['email'])
+            if user_id is None:
+                self.errors.append((line, f'email: no hay un usuario con {data["email"]!r}'))
+                continue
+            if data['invoice_id'] in taken:
+                self.errors.append((line, f'invoice_id: ya existe {data["invoice_id"]!r}'))
+                continue
+            room_id, check_in, check_out = data['room_id'], data['check_in_date'], data['check_out_date']
+            active = data['payment_status'] in ACTIVE_STATUSES
+            if active:
+                if occupancy.overlaps(room_id, check_in, check_out):
+                    self.errors.append((line, f'room: ocupada entre {check_in} y {check_out}'))
+                    continue
+                occupancy.add(room_id, check_in, check_out)
+            accepted.append(self.build_booking(data, user_id))
+
+            self.hotel_ids.add(data['hotel_id'])
+            if active:
+                if data['coupon']:
+                    self.coupon_uses[data['coupon'].pk] += 1
+                start, end = self.stays.get(data['room_type_id'], (check_in, check_out))
+                self.stays[data['room_type_id']] = (min(start, check_in), max(end, check_out))
+
+        with transaction.atomic():
+            Booking.objects.bulk_create(accepted, batch_size=1000)
+        self.created += len(accepted)
+
+    def build_booking(self, data, user_id):
+        return Booking(
+            user_id=user_id,
+            hotel_id=data['hotel_id'],
+            room_id=data['room_id'],
+            coupon=data['coupon'],
+            check_in_date=data['check_in_date'],
+            check_out_date=data['check_out_date'],
+            adults=data['adults'],
+            children=data['children'],
+            payment_status=data['payment_status'],
+            special_requests=data['special_requests'],
+            invoice_id=data['invoice_id'],
+            subtotal=data['subtotal'],
+            discount_amount=data['discount_amount'],
+            tax_amount=data['tax_amount'],
+            total_price=data['total_price'],
+            # Sin fecha en el archivo, la de la importación
+            booking_date=data['booking_date'] or timezone.now(),
+        )
+
+    def rebuild(self):
+        """Una sola vez al final: lo que las señales de Booking mantienen fila por fila"""
+        from reviews.models import HotelStatistics
+        from rooms.availability import publish_availability_change, reconcile_available_now
+
+        for coupon_id, uses in self.coupon_uses.items():
+            Coupon.objects.filter(pk=coupon_id).update(times_used=F('times_used') + uses)
+
+        # Estado de las habitaciones ocupadas hoy; update_rooms mantiene available_now
+        call_command('update_room_availability', stdout=io.StringIO())
+        reconcile_available_now()
+
+        for hotel_id in self.hotel_ids:
+            statistics, _ = HotelStatistics.objects.get_or_create(hotel_id=hotel_id)
+            statistics.update_statistics()
+
+        bump_availability_version()
+        for room_type_id, (start, end) in self.stays.items():
+            publish_availability_change(room_type_id, start, end)
+
+
+def import_bookings(file, name, create_users=False, chunk_size=None):
+    """Importa el archivo; retorna el BookingImporter con los totales y errores"""
+    return BookingImporter(create_users, chunk_size).run(read_rows(file, name))
+
+
+def import_storage():
+    return storages['imports']
+
+
+def queue_import(upload, create_users=False, user_id=None):
+    """Guarda el archivo subido y encola su importación; False si el broker no responde"""
+    from .tasks import import_booking_file
+
+    storage = import_storage()
+    name = storage.save(f'{uuid.uuid4().hex}/{os.path.basename(upload.name)}', upload)
+    try:
+        import_booking_file.delay(name, create_users, user_id)
+    except Exception:
+        logger.warning('No se pudo encolar import_booking_file', exc_info=True)
+        storage.delete(name)
+        return False
+    return True
+
+
+def import_stored_file(name, create_users=False, user_id=None):
+    """
+    Importa un archivo guardado por queue_import y deja el resumen para
+    `user_id`. El archivo se borra al final: si el worker muere a la mitad,
+    la tarea se vuelve a entregar (acks_late) y las filas con invoice_id ya
+    importadas se rechazan.
+    """
+    storage = import_storage()
+    summary = {'file': os.path.basename(name)}
+    try:
+        with storage.open(name, 'rb') as source:
+            result = import_bookings(source, name, create_users)
+    except FileNotFoundError:
+        # Otra entrega de la tarea ya lo importó
+        return None
+    except ValueError as exc:
+        summary['error'] = str(exc)
+    else:
+        summary.update(created=result.created, rejected=len(result.errors), errors=result.errors[:10])
+    if user_id is not None:
+        key = IMPORT_RESULTS_KEY.format(user_id)
+        cache.set(key, (cache.get(key) or []) + [summary], IMPORT_RESULTS_TIMEOUT)
+    storage.delete(name)
+    return summary
+
+
+def pop_import_results(user_id):
+    """Resúmenes pendientes de mostrar al usuario; se entregan una sola vez"""
+    key = IMPORT_RESULTS_KEY.format(user_id)
+    results = cache.get(key) or []
+    if results:
+        cache.delete(key)
+    return results
@@ -0,0 +1,234 @@
+# bookings/invoices.py
+"""
+Facturas (HTML y PDF) renderizadas una sola vez, en segundo plano.
+
+Los documentos se guardan en el storage privado `invoices` (fuera de
+MEDIA_ROOT) bajo una llave que depende solo de los datos que cambian su
+contenido: invoices/INV-1A2B3C4D5E6F/<hash>.pdf. Mientras importes, fechas,
+huéspedes y habitación no cambien el hash es el mismo, así que la vista
+entrega el archivo sin tocar la plantilla y usa el hash como ETag; si un
+importe cambia se genera una llave nueva y la anterior se borra.
+"""
+import hashlib
+import io
+import logging
+import zipfile
+from datetime import datetime
+from decimal import Decimal
+from itertools import chain
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Subir al cambiar la plantilla: todas las facturas se regeneran al pedirse
+INVOICE_LAYOUT_VERSION = 1
+INVOICE_TEMPLATE = 'bookings/booking_invoice.html'
+# Campos que definen el contenido de la factura (el estado de pago no aparece en ella)
+INVOICE_FIELDS = (
+    'invoice_id', 'booking_id', 'user_id', 'hotel_id', 'room_id', 'coupon_id',
+    'check_in_date', 'check_out_date', 'adults', 'children',
+    'subtotal', 'discount_amount', 'tax_amount', 'total_price',
+)
+INVOICE_FORMATS = {
+    'html': 'text/html; charset=utf-8',
+    'pdf': 'application/pdf',
+}
+INVOICE_STATUSES = ['PAID', 'CONFIRMED']
+CENTS = Decimal('0.01')
+# Tamaño de bloque al copiar facturas al zip
+CHUNK_SIZE = 64 * 1024
+
+
+def invoice_storage():
+    return storages['invoices']
+
+
+def invoice_digest(booking):
+    """Hash de los datos de la factura; los importes se comparan ya redondeados como en la BD"""
+    values = [INVOICE_LAYOUT_VERSION]
+    for field in INVOICE_FIELDS:
+        value = getattr(booking, field)
+        if isinstance(value, Decimal):
+            value = value.quantize(CENTS)
+        values.append(value)
+    return hashlib.sha256('|'.join(str(value) for value in values).encode()).hexdigest()[:32]
+
+
+def invoice_name(invoice_id, digest, extension):
+    return f'{invoice_id}/{digest}.{extension}'
+
+
+def render_invoice_html(booking):
+    return render_to_string(INVOICE_TEMPLATE, {
+        'booking': booking,
+        'hotel': booking.hotel,
+        'user': booking.user,
+        'room_type': booking.room.room_type,
+    })
+
+
+def html_to_pdf(html):
+    # Import diferido: reportlab tarda en cargar y solo lo necesitan el worker y el export
+    from xhtml2pdf import pisa
+
+    output = io.BytesIO()
+    result = pisa.CreatePDF(html, dest=output, encoding='utf-8')
+    if result.err:
+        raise ValueError(f'No se pudo generar el PDF ({result.err} errores)')
+    return output.getvalue()
+
+
+def generate_invoice(booking, storage=None):
+    """Renderiza y guarda la factura en HTML y PDF; borra las versiones anteriores. Retorna el hash"""
+    storage = storage or invoice_storage()
+    digest = invoice_digest(booking)
+    html = render_invoice_html(booking)
+    documents = {'html': html.encode(), 'pdf': html_to_pdf(html)}
+
+    for extension, content in documents.items():
+        name = invoice_name(booking.invoice_id, digest, extension)
+        # Misma llave, mismo contenido: si otro proceso ya la guardó no hay nada que hacer
+        if not storage.exists(name):
+            storage.save(name, ContentFile(content))
+
+    delete_stale_invoices(booking.invoice_id, digest, storage)
+    return digest
+
+
+def delete_stale_invoices(invoice_id, digest, storage=None):
+    """Borra los documentos de la factura que no corresponden a `digest`"""
+    storage = storage or invoice_storage()
+    try:
+        _, files = storage.listdir(invoice_id)
+    except FileNotFoundError:
+        return
+    for filename in files:
+        if not filename.startswith(f'{digest}.'):
+            storage.delete(f'{invoice_id}/{filename}')
+
+
+def ensure_invoice(booking, storage=None):
+    """Hash de la factura vigente; la genera en el momento si el worker aún no lo hizo"""
+    storage = storage or invoice_storage()
+    digest = invoice_digest(booking)
+    if all(storage.exists(invoice_name(booking.invoice_id, digest, extension)) for extension in INVOICE_FORMATS):
+        return digest
+    return generate_invoice(booking, storage)
+
+
+def open_invoice(booking, extension, storage=None):
+    """Archivo de la factura en el formato pedido, listo para FileResponse"""
+    storage = storage or invoice_storage()
+    digest = ensure_invoice(booking, storage)
+    return storage.open(invoice_name(booking.invoice_id, digest, extension), 'rb')
+
+
+def process_booking_invoice(booking_pk):
+    """Genera la factura de una reserva pagada o confirmada si no existe la versión vigente"""
+    from .models import Booking
+
+    booking = Booking.objects.filter(
+        pk=booking_pk, payment_status__in=INVOICE_STATUSES
+    ).select_related('hotel', 'room__room_type', 'coupon', 'user').first()
+    if booking is None:
+        return None
+    return ensure_invoice(booking)
+
+
+def queue_booking_invoice(booking_pk):
+    """Encola la factura; si el broker no responde se genera al abrirla por primera vez"""
+    from .tasks import render_booking_invoice
+
+    try:
+        render_booking_invoice.delay(booking_pk)
+    except Exception:
+        logger.warning('No se pudo encolar render_booking_invoice', exc_info=True)
+
+
+class ZipStream:
+    """Destino de solo escritura para zipfile: acumula lo escrito para entregarlo por partes"""
+
+    def __init__(self):
+        self.chunks = []
+        self.offset = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.offset += len(data)
+        return len(data)
+
+    def tell(self):
+        # Sin seek(): zipfile escribe los tamaños después de cada archivo (data descriptor)
+        return self.offset
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def invoice_archive(bookings, storage=None):
+    """
+    Zip con el HTML y el PDF de cada reserva, generado al vuelo: cada
+    factura se copia en bloques y se entrega en cuanto se escribe, así la
+    memoria no depende del número de facturas.
+    """
+    storage = storage or invoice_storage()
+    stream = ZipStream()
+    with zipfile.ZipFile(stream, 'w') as archive:
+        for booking in bookings:
+            try:
+                digest = ensure_invoice(booking, storage)
+            except Exception:
+                logger.exception('No se pudo generar la factura %s', booking.invoice_id)
+                continue
+            for extension in INVOICE_FORMATS:
+                info = zipfile.ZipInfo(
+                    f'{booking.invoice_id}.{extension}',
+                    date_time=timezone.localtime(booking.booking_date).timetuple()[:6]
+                )
+                # El PDF ya viene comprimido
+                info.compress_type = zipfile.ZIP_STORED if extension == 'pdf' else zipfile.ZIP_DEFLATED
+                with storage.open(invoice_name(booking.invoice_id, digest, extension), 'rb') as source:
+                    with archive.open(info, 'w') as target:
+                        while chunk := source.read(CHUNK_SIZE):
+                            target.write(chunk)
+                            yield stream.pop()
+            yield stream.pop()
+    # Directorio central
+    yield stream.pop()
+
+
+def month_invoices(year, month):
+    """Reservas pagadas o confirmadas en el mes, vigentes y archivadas, leídas por lotes"""
+    from .models import ArchivedBooking, Booking
+
+    start = timezone.make_aware(datetime(year, month, 1))
+    end = timezone.make_aware(datetime(year + month // 12, month % 12 + 1, 1))
+    return chain.from_iterable(
+        model.objects.filter(
+            booking_date__gte=start,
+            booking_date__lt=end,
+            payment_status__in=INVOICE_STATUSES,
+        ).select_related('hotel', 'room__room_type', 'coupon', 'user').order_by('booking_date', 'pk').iterator(
+            chunk_size=200
+        )
+        for model in (Booking, ArchivedBooking)
+    )
+
+
+def parse_month(value=None):
+    """'2025-01' → (2025, 1); sin valor, el mes anterior"""
+    if not value:
+        first_day = timezone.localdate().replace(day=1)
+        previous = first_day.replace(year=first_day.year - (first_day.month == 1), month=(first_day.month - 2) % 12 + 1)
+        return previous.year, previous.month
+    parsed = datetime.strptime(value, '%Y-%m')
+    return parsed.year, parsed.month
@@ -0,0 +1,49 @@
+# bookings/management/commands/archive_bookings.py
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from bookings.archive import archivable_bookings, archive_batch, archive_cutoff
+
+
+class Command(BaseCommand):
+    help = 'Mueve las reservaciones históricas a la tabla de archivo en lotes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help='Días desde el check-out para archivar (por defecto BOOKING_ARCHIVE_AFTER_DAYS)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Reservas por transacción (por defecto BOOKING_ARCHIVE_BATCH_SIZE)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo cuenta las reservas que se archivarían',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = archive_cutoff(options['days'])
+        batch_size = options['batch_size'] or settings.BOOKING_ARCHIVE_BATCH_SIZE
+
+        if options['dry_run']:
+            count = archivable_bookings(cutoff).count()
+            self.stdout.write(f'{count} reservas con check-out anterior a {cutoff}')
+            return
+
+        total = 0
+        while True:
+            moved = archive_batch(cutoff, batch_size)
+            total += moved
+            if moved:
+                self.stdout.write(f'  - lote de {moved} reservas archivado')
+            if moved < batch_size:
+                break
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ {total} reservas archivadas (check-out anterior a {cutoff})')
+        )
@@ -0,0 +1,273 @@
+# bookings/management/commands/benchmark_handlers.py
+import asyncio
+import http.client
+import logging
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+from urllib.parse import urlencode, urlsplit
+from wsgiref.util import setup_testing_defaults
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rooms.models import RoomType
+
+HOST = 'testserver'
+
+
+def wsgi_get(handler, path):
+    """GET a través de WSGIHandler, como lo haría un servidor WSGI; retorna el status"""
+    url = urlsplit(path)
+    environ = {}
+    setup_testing_defaults(environ)
+    environ.update(
+        REQUEST_METHOD='GET', PATH_INFO=url.path, QUERY_STRING=url.query,
+        HTTP_HOST=HOST, SERVER_NAME=HOST,
+    )
+    status = []
+
+    def start_response(line, headers, exc_info=None):
+        status.append(int(line[:3]))
+
+    response = handler(environ, start_response)
+    try:
+        for _ in response:
+            pass
+    finally:
+        response.close()
+    return status[0]
+
+
+async def asgi_get(handler, path):
+    """GET a través de ASGIHandler, como lo haría un servidor ASGI; retorna el status"""
+    url = urlsplit(path)
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': url.path,
+        'raw_path': url.path.encode(),
+        'query_string': url.query.encode(),
+        'headers': [(b'host', HOST.encode())],
+        'server': (HOST, 80),
+        'client': ('127.0.0.1', 0),
+    }
+    body_sent = False
+    status = []
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # El cliente sigue conectado hasta que termina la respuesta
+        await asyncio.Future()
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+
+    await handler(scope, receive, send)
+    return status[0]
+
+
+_http = threading.local()
+
+
+def http_get(base_url, path, retry=True):
+    """GET por HTTP a un servidor en marcha, con una conexión keep-alive por hilo"""
+    connection = getattr(_http, 'connection', None)
+    reused = connection is not None
+    if connection is None:
+        url = urlsplit(base_url)
+        connection_class = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+        connection = _http.connection = connection_class(url.netloc, timeout=30)
+    try:
+        connection.request('GET', path)
+        response = connection.getresponse()
+        response.read()
+    except (OSError, http.client.HTTPException):
+        connection.close()
+        _http.connection = None
+        # El servidor cierra las conexiones inactivas (keepalive): se reintenta una vez
+        if reused and retry:
+            return http_get(base_url, path, retry=False)
+        return 599
+    if response.will_close:
+        connection.close()
+        _http.connection = None
+    return response.status
+
+
+@contextmanager
+def asgi_connections():
+    """Conexiones sin persistencia, como las configura config/asgi.py"""
+    previous = {alias: connections.settings[alias]['CONN_MAX_AGE'] for alias in connections.settings}
+    for alias in previous:
+        connections.settings[alias]['CONN_MAX_AGE'] = 0
+    try:
+        yield
+    finally:
+        for alias, max_age in previous.items():
+            connections.settings[alias]['CONN_MAX_AGE'] = max_age
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara el throughput de la ruta WSGI síncrona (pool de hilos) contra la ASGI '
+        'async (un event loop) con peticiones concurrentes, en el mismo proceso; '
+        'con --url mide por HTTP un servidor en marcha'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            action='append',
+            dest='paths',
+            help='URL a medir (se puede repetir); por omisión home y los endpoints async de la API',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=400,
+            help='Peticiones por URL y modo (default: 400)',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=32,
+            help='Peticiones en vuelo a la vez (default: 32)',
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=4,
+            help='Hilos del handler WSGI, como los de un worker síncrono (default: 4)',
+        )
+        parser.add_argument(
+            '--url',
+            help='Medir por HTTP un servidor en marcha (p. ej. http://127.0.0.1:8080) en lugar de los handlers',
+        )
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or self.default_paths()
+        self.total = options['requests']
+        self.concurrency = options['concurrency']
+        self.threads = options['threads']
+
+        # Los avisos de presupuesto y de 404 ensuciarían la salida
+        for logger_name in ('django.request', 'config.query_budget'):
+            logging.getLogger(logger_name).setLevel(logging.CRITICAL)
+
+        if options['url']:
+            self.stdout.write(f"{self.total} peticiones por URL, {self.concurrency} concurrentes contra {options['url']}")
+            for path in paths:
+                self.measure_server(options['url'], path)
+            return
+
+        self.stdout.write(
+            f'{self.total} peticiones por URL, {self.concurrency} concurrentes; '
+            f'WSGI con {self.threads} hilos, ASGI con un event loop'
+        )
+        with override_settings(ALLOWED_HOSTS=[HOST]):
+            wsgi, asgi = WSGIHandler(), ASGIHandler()
+            for path in paths:
+                self.compare(path, wsgi, asgi)
+
+    def default_paths(self):
+        room_type = RoomType.objects.filter(is_active=True).order_by('pk').first()
+        if room_type is None:
+            raise CommandError('No hay tipos de habitación; ejecuta generate_test_data')
+
+        check_in = timezone.now().date() + timedelta(days=30)
+        dates = {'check_in': check_in.isoformat(), 'check_out': (check_in + timedelta(days=2)).isoformat()}
+        return [
+            reverse('home'),
+            f"{reverse('api_v1:availability')}?{urlencode(dict(dates, guests=2))}",
+            f"{reverse('api_v1:quotes')}?{urlencode(dict(dates, room_type=room_type.pk))}",
+            f"{reverse('api_v1:reviews')}?{urlencode({'q': 'hotel'})}",
+        ]
+
+    def compare(self, path, wsgi, asgi):
+        # Una petición previa por modo llena caches y el catálogo local
+        status = wsgi_get(wsgi, path)
+        with asgi_connections():
+            asyncio.run(asgi_get(asgi, path))
+        if status >= 400:
+            self.stdout.write(self.style.WARNING(f'⚠ {path} responde {status}; se mide igual'))
+
+        wsgi_result = self.run_wsgi(wsgi, path)
+        asgi_result = self.run_asgi(asgi, path)
+        ratio = asgi_result['rps'] / wsgi_result['rps'] if wsgi_result['rps'] else 0
+        style = self.style.SUCCESS if ratio >= 1 else self.style.WARNING
+        self.stdout.write(style(
+            f'{path}\n'
+            f'  WSGI: {self.describe(wsgi_result)}\n'
+            f'  ASGI: {self.describe(asgi_result)}  (×{ratio:.2f})'
+        ))
+
+    def measure_server(self, base_url, path):
+        status = http_get(base_url, path)
+        if status >= 400:
+            self.stdout.write(self.style.WARNING(f'⚠ {path} responde {status}; se mide igual'))
+
+        # Un hilo cliente por petición en vuelo, cada uno con su conexión keep-alive
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            async def call():
+                return await asyncio.get_running_loop().run_in_executor(pool, http_get, base_url, path)
+
+            result = asyncio.run(self.drive(call))
+        self.stdout.write(f'{path}\n  {self.describe(result)}')
+
+    def run_wsgi(self, handler, path):
+        with ThreadPoolExecutor(max_workers=self.threads) as pool:
+            async def call():
+                return await asyncio.get_running_loop().run_in_executor(pool, wsgi_get, handler, path)
+
+            return asyncio.run(self.drive(call))
+
+    def run_asgi(self, handler, path):
+        with asgi_connections():
+            return asyncio.run(self.drive(lambda: asgi_get(handler, path)))
+
+    async def drive(self, call):
+        """Lanza `self.total` llamadas con `self.concurrency` en vuelo; mide cada una desde que se envía"""
+        slots = asyncio.Semaphore(self.concurrency)
+        latencies = []
+        errors = 0
+
+        async def one():
+            nonlocal errors
+            async with slots:
+                start = time.perf_counter()
+                status = await call()
+                latencies.append(time.perf_counter() - start)
+                if status >= 500:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(self.total)))
+        elapsed = time.perf_counter() - start
+        return {
+            'rps': self.total / elapsed,
+            'p50': statistics.median(latencies),
+            'p95': statistics.quantiles(latencies, n=20)[-1],
+            'errors': errors,
+        }
+
+    def describe(self, result):
+        line = f"{result['rps']:.0f} req/s, p50 {result['p50'] * 1000:.1f} ms, p95 {result['p95'] * 1000:.1f} ms"
+        if result['errors']:
+            line += f", {result['errors']} errores 5xx"
+        return line
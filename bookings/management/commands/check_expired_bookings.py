@@ -2,6 +2,7 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from bookings.models import Booking
+from config.content_cache import bump_availability_version
 from datetime import timedelta
 
 
@@ -31,6 +32,7 @@ class Command(BaseCommand):
         if count > 0:
             # Marcar como canceladas
             expired_bookings.update(payment_status='CANCELLED')
+            bump_availability_version()
             
             self.stdout.write(
                 self.style.WARNING(f'⚠ {count} reservas pendientes marcadas como canceladas')
@@ -0,0 +1,70 @@
+# bookings/management/commands/export_csv.py
+import sys
+import time
+from datetime import datetime
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib import admin
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from bookings.invoices import parse_month
+from config.csv_export import CsvExportMixin, csv_chunks
+
+
+class Command(BaseCommand):
+    help = 'Exporta a CSV en streaming un modelo con CsvExportMixin en el admin (mismas columnas que la acción)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', help='app_label.Modelo, p. ej. bookings.Booking, reviews.ReviewAndRating, bookings.Coupon')
+        parser.add_argument('--month', default=None, help='Solo el mes AAAA-MM (según la fecha del admin: booking_date, review_date...)')
+        parser.add_argument('--output', default=None, help='Archivo destino ("-" para stdout; default: <modelo>[-AAAA-MM].csv)')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=settings.CSV_EXPORT_CHUNK_SIZE,
+            help='Filas por lectura del cursor (default: CSV_EXPORT_CHUNK_SIZE)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            model = apps.get_model(options['model'])
+        except (LookupError, ValueError) as exc:
+            raise CommandError(str(exc))
+        model_admin = admin.site._registry.get(model)
+        if not isinstance(model_admin, CsvExportMixin):
+            raise CommandError(f'{options["model"]} no tiene exportación CSV en el admin')
+
+        # Orden por llave primaria: recorre el índice sin ordenar la tabla completa
+        queryset = model._default_manager.order_by('pk')
+        suffix = ''
+        if options['month']:
+            try:
+                year, month = parse_month(options['month'])
+            except ValueError:
+                raise CommandError('El mes debe tener el formato AAAA-MM')
+            # Rango de fechas y horas, como month_invoices, para que use el índice del campo
+            field = model_admin.export_date_field
+            queryset = queryset.filter(**{
+                f'{field}__gte': timezone.make_aware(datetime(year, month, 1)),
+                f'{field}__lt': timezone.make_aware(datetime(year + month // 12, month % 12 + 1, 1)),
+            })
+            suffix = f'-{year}-{month:02d}'
+
+        output = options['output'] or f'{model._meta.model_name}{suffix}.csv'
+        started = time.perf_counter()
+        written = 0
+        target = sys.stdout if output == '-' else open(output, 'w', encoding='utf-8', newline='')
+        try:
+            for chunk in csv_chunks(queryset, model_admin.export_columns, options['chunk_size']):
+                target.write(chunk)
+                written += len(chunk)
+        finally:
+            if target is not sys.stdout:
+                target.close()
+        if output != '-':
+            elapsed = time.perf_counter() - started
+            self.stdout.write(self.style.SUCCESS(
+                f'✓ {output}: {written / 1024:.0f} KB en {elapsed:.1f} s'
+            ))
@@ -0,0 +1,35 @@
+# bookings/management/commands/export_invoices.py
+from django.core.management.base import BaseCommand, CommandError
+
+from bookings.invoices import invoice_archive, month_invoices, parse_month
+
+
+class Command(BaseCommand):
+    help = 'Exporta en un zip las facturas (HTML y PDF) de las reservas pagadas o confirmadas de un mes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--month',
+            default=None,
+            help='Mes a exportar en formato AAAA-MM (por defecto el mes anterior)',
+        )
+        parser.add_argument(
+            '--output',
+            default=None,
+            help='Archivo zip de salida (por defecto facturas-AAAA-MM.zip)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            year, month = parse_month(options['month'])
+        except ValueError:
+            raise CommandError('--month debe tener el formato AAAA-MM')
+
+        output = options['output'] or f'facturas-{year}-{month:02d}.zip'
+        size = 0
+        with open(output, 'wb') as target:
+            for chunk in invoice_archive(month_invoices(year, month)):
+                target.write(chunk)
+                size += len(chunk)
+
+        self.stdout.write(self.style.SUCCESS(f'✓ {output} ({size / 1024:.0f} KB)'))
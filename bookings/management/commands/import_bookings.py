@@ -0,0 +1,62 @@
+# bookings/management/commands/import_bookings.py
+import csv
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from bookings.imports import import_bookings
+
+
+class Command(BaseCommand):
+    help = 'Importa reservaciones desde un CSV o XLSX por bloques, sin señales por fila (ver bookings/imports.py)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Archivo .csv o .xlsx con encabezados en la primera fila')
+        parser.add_argument(
+            '--create-users',
+            action='store_true',
+            help='Crea sin contraseña a los huéspedes cuyo email no existe (si no, esas filas se rechazan)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=settings.BOOKING_IMPORT_CHUNK_SIZE,
+            help='Filas por bloque (default: BOOKING_IMPORT_CHUNK_SIZE)',
+        )
+        parser.add_argument(
+            '--errors',
+            default=None,
+            help='CSV donde escribir las filas rechazadas (línea, motivo)',
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            with open(options['path'], 'rb') as source:
+                result = import_bookings(
+                    source, options['path'], options['create_users'], options['chunk_size']
+                )
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+        elapsed = time.perf_counter() - started
+
+        for line, reason in result.errors[:20]:
+            self.stdout.write(self.style.WARNING(f'  línea {line}: {reason}'))
+        if len(result.errors) > 20:
+            self.stdout.write(f'  ... y {len(result.errors) - 20} más')
+        if options['errors'] and result.errors:
+            with open(options['errors'], 'w', newline='') as target:
+                writer = csv.writer(target)
+                writer.writerow(['line', 'reason'])
+                writer.writerows(result.errors)
+            self.stdout.write(f'  Filas rechazadas en {options["errors"]}')
+
+        if result.users_created:
+            self.stdout.write(f'  {result.users_created} huéspedes nuevos')
+        style = self.style.WARNING if result.errors else self.style.SUCCESS
+        prefix = '⚠' if result.errors else '✓'
+        self.stdout.write(style(
+            f'{prefix} {result.created} reservaciones importadas, {len(result.errors)} rechazadas '
+            f'en {elapsed:.1f} s ({result.created / max(elapsed, 0.001):.0f} filas/s)'
+        ))
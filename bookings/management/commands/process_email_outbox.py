@@ -0,0 +1,33 @@
+# bookings/management/commands/process_email_outbox.py
+from django.core.management.base import BaseCommand
+from bookings.utils import deliver_outbox_batch
+
+
+class Command(BaseCommand):
+    help = 'Envía los correos pendientes de la bandeja de salida sin pasar por Celery'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Correos por conexión SMTP (por defecto EMAIL_OUTBOX_BATCH_SIZE)',
+        )
+    
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        
+        while True:
+            sent, failed = deliver_outbox_batch(options['batch_size'])
+            if not sent and not failed:
+                break
+            total_sent += sent
+            total_failed += failed
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ {total_sent} correos enviados')
+        )
+        if total_failed:
+            self.stdout.write(
+                self.style.WARNING(f'⚠ {total_failed} correos reprogramados por error')
+            )
@@ -2,54 +2,48 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from bookings.models import Booking
+from config.content_cache import bump_availability_version
+from rooms.availability import update_rooms
 from rooms.models import Room
 
 
 class Command(BaseCommand):
     help = 'Actualiza la disponibilidad de habitaciones según las reservas activas'
-    
+
     def handle(self, *args, **options):
         today = timezone.now().date()
+        confirmed = Booking.objects.filter(payment_status__in=['PAID', 'CONFIRMED'])
+
+        # Habitaciones con reservas activas hoy y con reservas futuras
+        active_rooms = confirmed.filter(
+            check_in_date__lte=today,
+            check_out_date__gte=today
+        ).values('room_id')
+        future_rooms = confirmed.filter(check_in_date__gt=today).values('room_id')
+
+        to_occupy = Room.objects.filter(pk__in=active_rooms).exclude(status='OCCUPIED')
+        to_release = Room.objects.filter(status='OCCUPIED').exclude(
+            pk__in=active_rooms
+        ).exclude(pk__in=future_rooms)
+
         updated_count = 0
-        
-        # Obtener todas las habitaciones
-        rooms = Room.objects.all()
-        
-        for room in rooms:
-            # Verificar si tiene reservas activas
-            active_bookings = Booking.objects.filter(
-                room=room,
-                check_in_date__lte=today,
-                check_out_date__gte=today,
-                payment_status__in=['PAID', 'CONFIRMED']
-            )
-            
-            if active_bookings.exists():
-                if room.status != 'OCCUPIED':
-                    room.status = 'OCCUPIED'
-                    room.is_available = False
-                    room.save(update_fields=['status', 'is_available'])
-                    updated_count += 1
-                    self.stdout.write(
-                        self.style.SUCCESS(f'Habitación {room.room_number} marcada como OCUPADA')
-                    )
-            else:
-                # Verificar si tiene reservas futuras
-                future_bookings = Booking.objects.filter(
-                    room=room,
-                    check_in_date__gt=today,
-                    payment_status__in=['PAID', 'CONFIRMED']
+        for rooms, status, is_available, label in [
+            (to_occupy, 'OCCUPIED', False, 'OCUPADA'),
+            (to_release, 'AVAILABLE', True, 'DISPONIBLE'),
+        ]:
+            numbers = list(rooms.values_list('room_number', flat=True))
+            if not numbers:
+                continue
+            # Una sola actualización por grupo; update_rooms mantiene RoomType.available_now
+            updated_count += update_rooms(rooms, status=status, is_available=is_available)
+            for number in numbers:
+                self.stdout.write(
+                    self.style.SUCCESS(f'Habitación {number} marcada como {label}')
                 )
-                
-                if not future_bookings.exists() and room.status == 'OCCUPIED':
-                    room.status = 'AVAILABLE'
-                    room.is_available = True
-                    room.save(update_fields=['status', 'is_available'])
-                    updated_count += 1
-                    self.stdout.write(
-                        self.style.SUCCESS(f'Habitación {room.room_number} marcada como DISPONIBLE')
-                    )
-        
+
+        if updated_count:
+            bump_availability_version()
+
         self.stdout.write(
             self.style.SUCCESS(f'✓ {updated_count} habitaciones actualizadas')
-        )
\ No newline at end of file
+        )
@@ -0,0 +1,68 @@
+# bookings/management/commands/warm_caches.py
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.template import TemplateDoesNotExist
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from config.content_cache import get_availability_version, get_content_version
+from config.static_files import sync_static_manifest
+from rooms import catalog
+
+# Páginas públicas cacheadas completas para visitantes anónimos
+PUBLIC_PAGES = ['home', 'gallery', 'rates', 'location', 'about', 'contact']
+
+
+def default_host():
+    """Primer host concreto de ALLOWED_HOSTS: la llave de la página cacheada incluye el host"""
+    for host in settings.ALLOWED_HOSTS:
+        host = host.lstrip('.')
+        if host and host != '*':
+            return host
+    return 'localhost'
+
+
+class Command(BaseCommand):
+    help = 'Calienta catálogo, versiones y páginas públicas en la cache antes de recibir tráfico'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--host',
+            default=None,
+            help='Host con el que se piden las páginas (default: primero de ALLOWED_HOSTS)',
+        )
+
+    def handle(self, *args, **options):
+        room_types, amenities, hotels = catalog.warm()
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Catálogo: {len(room_types)} tipos, {len(amenities)} comodidades, {len(hotels)} hoteles'
+        ))
+
+        if sync_static_manifest():
+            self.stdout.write(self.style.SUCCESS('✓ Estáticos nuevos: páginas cacheadas invalidadas'))
+
+        # Sembrar las versiones evita que los primeros workers compitan por crearlas
+        get_content_version()
+        get_availability_version()
+        catalog.get_catalog_version()
+        self.stdout.write(self.style.SUCCESS('✓ Versiones de contenido, disponibilidad y catálogo'))
+
+        host = options['host'] or default_host()
+        client = Client(HTTP_HOST=host)
+        with override_settings(ALLOWED_HOSTS=[host]):
+            for name in PUBLIC_PAGES:
+                self.warm_page(client, name)
+
+    def warm_page(self, client, name):
+        path = reverse(name)
+        try:
+            response = client.get(path)
+        except TemplateDoesNotExist as exc:
+            self.stdout.write(self.style.WARNING(f'⚠ {name}: falta la plantilla {exc}'))
+            return
+
+        if response.status_code == 200:
+            self.stdout.write(self.style.SUCCESS(f'✓ {name} ({path})'))
+        else:
+            self.stdout.write(self.style.WARNING(f'⚠ {name} ({path}) → {response.status_code}'))
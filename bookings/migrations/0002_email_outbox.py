@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-19 04:11
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('CONFIRMATION', 'Confirmación'), ('CANCELLATION', 'Cancelación'), ('REMINDER', 'Recordatorio')], max_length=20, verbose_name='tipo')),
+                ('from_email', models.CharField(max_length=254, verbose_name='remitente')),
+                ('to_email', models.EmailField(max_length=254, verbose_name='destinatario')),
+                ('subject', models.CharField(max_length=255, verbose_name='asunto')),
+                ('body_text', models.TextField(verbose_name='cuerpo (texto)')),
+                ('body_html', models.TextField(blank=True, verbose_name='cuerpo (HTML)')),
+                ('status', models.CharField(choices=[('PENDING', 'Pendiente'), ('SENT', 'Enviado'), ('FAILED', 'Fallido')], default='PENDING', max_length=20, verbose_name='estado')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='intentos')),
+                ('last_error', models.TextField(blank=True, verbose_name='último error')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='siguiente intento')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='enviado')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='creado')),
+                ('booking', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='emails', to='bookings.booking', verbose_name='reservación')),
+            ],
+            options={
+                'verbose_name': 'correo en cola',
+                'verbose_name_plural': 'correos en cola',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='bookings_em_status_ea045a_idx'), models.Index(fields=['booking', 'kind'], name='bookings_em_booking_22ed41_idx')],
+            },
+        ),
+    ]
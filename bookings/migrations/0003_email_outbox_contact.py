@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 04:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0002_email_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailoutbox',
+            name='reply_to',
+            field=models.EmailField(blank=True, max_length=254, verbose_name='responder a'),
+        ),
+        migrations.AlterField(
+            model_name='emailoutbox',
+            name='kind',
+            field=models.CharField(choices=[('CONFIRMATION', 'Confirmación'), ('CANCELLATION', 'Cancelación'), ('REMINDER', 'Recordatorio'), ('CONTACT', 'Contacto')], max_length=20, verbose_name='tipo'),
+        ),
+    ]
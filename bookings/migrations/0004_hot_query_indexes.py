@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-19 04:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0003_email_outbox_contact'),
+        ('rooms', '0002_hot_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='booking',
+            name='bookings_bo_user_id_93b31a_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='booking',
+            name='bookings_bo_booking_eb8fc3_idx',
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['user', '-booking_date'], name='booking_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('payment_status__in', ['PAID', 'CONFIRMED'])), fields=['room', 'check_in_date', 'check_out_date'], name='booking_room_active_dates_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('payment_status', 'PENDING')), fields=['booking_date'], name='booking_pending_date_idx'),
+        ),
+    ]
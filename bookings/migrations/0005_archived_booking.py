@@ -0,0 +1,51 @@
+# Generated by Django 5.2.7 on 2026-10-19 04:25
+
+import django.core.validators
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0004_hot_query_indexes'),
+        ('rooms', '0002_hot_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedBooking',
+            fields=[
+                ('booking_id', models.UUIDField(default=uuid.uuid4, editable=False, unique=True, verbose_name='ID de reserva')),
+                ('invoice_id', models.CharField(editable=False, max_length=100, unique=True, verbose_name='ID de factura')),
+                ('check_in_date', models.DateField(verbose_name='fecha de check-in')),
+                ('check_out_date', models.DateField(verbose_name='fecha de check-out')),
+                ('adults', models.PositiveIntegerField(validators=[django.core.validators.MinValueValidator(1)], verbose_name='adultos')),
+                ('children', models.PositiveIntegerField(default=0, validators=[django.core.validators.MinValueValidator(0)], verbose_name='niños')),
+                ('special_requests', models.TextField(blank=True, help_text='Necesidades especiales o preferencias', verbose_name='solicitudes especiales')),
+                ('subtotal', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(0)], verbose_name='subtotal')),
+                ('discount_amount', models.DecimalField(decimal_places=2, default=0, max_digits=10, validators=[django.core.validators.MinValueValidator(0)], verbose_name='descuento')),
+                ('tax_amount', models.DecimalField(decimal_places=2, default=0, max_digits=10, validators=[django.core.validators.MinValueValidator(0)], verbose_name='impuestos')),
+                ('total_price', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(0)], verbose_name='precio total')),
+                ('payment_status', models.CharField(choices=[('PENDING', 'Pendiente'), ('PAID', 'Pagado'), ('CONFIRMED', 'Confirmado'), ('CANCELLED', 'Cancelado'), ('REFUNDED', 'Reembolsado')], default='PENDING', max_length=20, verbose_name='estado de pago')),
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('booking_date', models.DateTimeField(verbose_name='fecha de reserva')),
+                ('created_at', models.DateTimeField(verbose_name='creado')),
+                ('updated_at', models.DateTimeField(verbose_name='actualizado')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='archivado')),
+                ('coupon', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_bookings', to='bookings.coupon', verbose_name='cupón')),
+                ('hotel', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_bookings', to='bookings.hotel', verbose_name='hotel')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_bookings', to='rooms.room', verbose_name='habitación')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_bookings', to=settings.AUTH_USER_MODEL, verbose_name='usuario')),
+            ],
+            options={
+                'verbose_name': 'reservación archivada',
+                'verbose_name_plural': 'reservaciones archivadas',
+                'ordering': ['-booking_date'],
+                'indexes': [models.Index(fields=['user', '-booking_date'], name='archived_user_date_idx'), models.Index(fields=['hotel', 'payment_status'], name='bookings_ar_hotel_i_e86761_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-19 06:07
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0005_archived_booking'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='booking',
+            name='booking_date',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='fecha de reserva'),
+        ),
+    ]
@@ -9,6 +9,28 @@ import uuid
 
 User = get_user_model()
 
+# IVA aplicado sobre el subtotal con descuento (ajustar según necesidad)
+TAX_RATE = Decimal('0.16')
+
+
+def price_breakdown(price_per_night, nights, coupon=None):
+    """Subtotal, descuento, impuestos y total de una estancia; lo usan las reservas y las cotizaciones"""
+    subtotal = price_per_night * nights
+    
+    # Aplicar cupón si existe
+    if coupon and coupon.is_valid():
+        discount_amount = coupon.calculate_discount(subtotal)
+    else:
+        discount_amount = Decimal('0.00')
+    
+    tax_amount = (subtotal - discount_amount) * TAX_RATE
+    return {
+        'subtotal': subtotal,
+        'discount_amount': discount_amount,
+        'tax_amount': tax_amount,
+        'total_price': subtotal - discount_amount + tax_amount,
+    }
+
 
 class Hotel(models.Model):
     """Información del hotel (útil para múltiples ubicaciones)"""
@@ -133,8 +155,8 @@ class Coupon(models.Model):
         return min(discount, amount)  # No puede ser mayor al monto total
 
 
-class Booking(models.Model):
-    """Reservaciones de habitaciones"""
+class BookingRecord(models.Model):
+    """Campos comunes de reservaciones vigentes y archivadas"""
     
     class PaymentStatus(models.TextChoices):
         PENDING = 'PENDING', _('Pendiente')
@@ -157,38 +179,9 @@ class Booking(models.Model):
         editable=False
     )
     
-    # Relaciones
-    user = models.ForeignKey(
-        User,
-        on_delete=models.CASCADE,
-        related_name='bookings',
-        verbose_name=_("usuario")
-    )
-    hotel = models.ForeignKey(
-        Hotel,
-        on_delete=models.PROTECT,
-        related_name='bookings',
-        verbose_name=_("hotel")
-    )
-    room = models.ForeignKey(
-        'rooms.Room',
-        on_delete=models.PROTECT,
-        related_name='bookings',
-        verbose_name=_("habitación")
-    )
-    coupon = models.ForeignKey(
-        Coupon,
-        on_delete=models.SET_NULL,
-        null=True,
-        blank=True,
-        related_name='bookings',
-        verbose_name=_("cupón")
-    )
-    
-    # Fechas
+    # Fechas de la estancia
     check_in_date = models.DateField(_("fecha de check-in"))
     check_out_date = models.DateField(_("fecha de check-out"))
-    booking_date = models.DateTimeField(_("fecha de reserva"), auto_now_add=True)
     
     # Huéspedes
     adults = models.PositiveIntegerField(
@@ -244,6 +237,56 @@ class Booking(models.Model):
         default=PaymentStatus.PENDING
     )
     
+    is_archived = False
+    
+    class Meta:
+        abstract = True
+    
+    def __str__(self):
+        return f"Reserva {self.invoice_id} - {self.user.get_full_name() or self.user.username}"
+    
+    @property
+    def total_days(self):
+        """Calcula el número total de días de la estancia"""
+        if self.check_in_date and self.check_out_date:
+            return (self.check_out_date - self.check_in_date).days
+        return 0
+
+
+class Booking(BookingRecord):
+    """Reservaciones de habitaciones"""
+    
+    # Relaciones
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='bookings',
+        verbose_name=_("usuario")
+    )
+    hotel = models.ForeignKey(
+        Hotel,
+        on_delete=models.PROTECT,
+        related_name='bookings',
+        verbose_name=_("hotel")
+    )
+    room = models.ForeignKey(
+        'rooms.Room',
+        on_delete=models.PROTECT,
+        related_name='bookings',
+        verbose_name=_("habitación")
+    )
+    coupon = models.ForeignKey(
+        Coupon,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='bookings',
+        verbose_name=_("cupón")
+    )
+    
+    # Fechas (default en lugar de auto_now_add: la importación conserva la fecha del sistema anterior)
+    booking_date = models.DateTimeField(_("fecha de reserva"), default=timezone.now, editable=False)
+    
     # Timestamps
     created_at = models.DateTimeField(_("creado"), auto_now_add=True)
     updated_at = models.DateTimeField(_("actualizado"), auto_now=True)
@@ -253,15 +296,25 @@ class Booking(models.Model):
         verbose_name_plural = _("reservaciones")
         ordering = ['-booking_date']
         indexes = [
-            models.Index(fields=['user', 'payment_status']),
+            # Historial del huésped (BookingListView): filtra por usuario y ordena por fecha
+            models.Index(fields=['user', '-booking_date'], name='booking_user_date_idx'),
             models.Index(fields=['check_in_date', 'check_out_date']),
             models.Index(fields=['hotel', 'payment_status']),
-            models.Index(fields=['booking_id']),
+            # Traslape de disponibilidad (Room.is_available_for_dates y señales):
+            # solo reservas activas, y las tres columnas cubren la consulta completa
+            models.Index(
+                fields=['room', 'check_in_date', 'check_out_date'],
+                name='booking_room_active_dates_idx',
+                condition=models.Q(payment_status__in=['PAID', 'CONFIRMED'])
+            ),
+            # Reservas pendientes por expirar (check_expired_bookings)
+            models.Index(
+                fields=['booking_date'],
+                name='booking_pending_date_idx',
+                condition=models.Q(payment_status='PENDING')
+            ),
         ]
     
-    def __str__(self):
-        return f"Reserva {self.invoice_id} - {self.user.get_full_name() or self.user.username}"
-    
     def save(self, *args, **kwargs):
         # Generar invoice_id si no existe
         if not self.invoice_id:
@@ -295,30 +348,13 @@ class Booking(models.Model):
             if not self.room.is_available_for_dates(self.check_in_date, self.check_out_date):
                 raise ValidationError(_("La habitación no está disponible para las fechas seleccionadas"))
     
-    @property
-    def total_days(self):
-        """Calcula el número total de días de la estancia"""
-        if self.check_in_date and self.check_out_date:
-            return (self.check_out_date - self.check_in_date).days
-        return 0
-    
     def calculate_prices(self):
         """Calcula todos los precios de la reservación"""
-        # Subtotal
-        self.subtotal = self.room.room_type.price_per_night * self.total_days
-        
-        # Aplicar cupón si existe
-        if self.coupon and self.coupon.is_valid():
-            self.discount_amount = self.coupon.calculate_discount(self.subtotal)
-        else:
-            self.discount_amount = Decimal('0.00')
-        
-        # Calcular impuestos (16% IVA - ajustar según necesidad)
-        taxable_amount = self.subtotal - self.discount_amount
-        self.tax_amount = taxable_amount * Decimal('0.16')
-        
-        # Total
-        self.total_price = self.subtotal - self.discount_amount + self.tax_amount
+        prices = price_breakdown(
+            self.room.room_type.price_per_night, self.total_days, self.coupon
+        )
+        for field, value in prices.items():
+            setattr(self, field, value)
     
     def can_be_cancelled(self):
         """Verifica si la reservación puede ser cancelada"""
@@ -345,4 +381,128 @@ class Booking(models.Model):
         return (
             self.check_in_date <= today <= self.check_out_date
             and self.payment_status in ['PAID', 'CONFIRMED']
-        )
\ No newline at end of file
+        )
+
+class ArchivedBooking(BookingRecord):
+    """
+    Reservaciones históricas movidas fuera de la tabla viva.
+    
+    Conservan el mismo id, booking_id e invoice_id que tenían en Booking, así
+    que los enlaces y facturas siguen siendo válidos. Solo se leen desde el
+    historial del huésped y el admin; ninguna consulta de disponibilidad las toca.
+    """
+    
+    id = models.BigIntegerField(primary_key=True)
+    
+    # Relaciones
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_bookings',
+        verbose_name=_("usuario")
+    )
+    hotel = models.ForeignKey(
+        Hotel,
+        on_delete=models.PROTECT,
+        related_name='archived_bookings',
+        verbose_name=_("hotel")
+    )
+    room = models.ForeignKey(
+        'rooms.Room',
+        on_delete=models.PROTECT,
+        related_name='archived_bookings',
+        verbose_name=_("habitación")
+    )
+    coupon = models.ForeignKey(
+        Coupon,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='archived_bookings',
+        verbose_name=_("cupón")
+    )
+    
+    # Fechas originales (sin auto_now: se copian tal cual de Booking)
+    booking_date = models.DateTimeField(_("fecha de reserva"))
+    created_at = models.DateTimeField(_("creado"))
+    updated_at = models.DateTimeField(_("actualizado"))
+    archived_at = models.DateTimeField(_("archivado"), auto_now_add=True)
+    
+    is_archived = True
+    
+    class Meta:
+        verbose_name = _("reservación archivada")
+        verbose_name_plural = _("reservaciones archivadas")
+        ordering = ['-booking_date']
+        indexes = [
+            models.Index(fields=['user', '-booking_date'], name='archived_user_date_idx'),
+            models.Index(fields=['hotel', 'payment_status']),
+        ]
+    
+    def can_be_cancelled(self):
+        return False
+    
+    def is_active(self):
+        return False
+
+
+class EmailOutbox(models.Model):
+    """Bandeja de salida persistente para correos enviados por Celery"""
+    
+    class Kind(models.TextChoices):
+        CONFIRMATION = 'CONFIRMATION', _('Confirmación')
+        CANCELLATION = 'CANCELLATION', _('Cancelación')
+        REMINDER = 'REMINDER', _('Recordatorio')
+        CONTACT = 'CONTACT', _('Contacto')
+    
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', _('Pendiente')
+        SENT = 'SENT', _('Enviado')
+        FAILED = 'FAILED', _('Fallido')
+    
+    kind = models.CharField(
+        _("tipo"),
+        max_length=20,
+        choices=Kind.choices
+    )
+    booking = models.ForeignKey(
+        Booking,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='emails',
+        verbose_name=_("reservación")
+    )
+    
+    # Contenido
+    from_email = models.CharField(_("remitente"), max_length=254)
+    to_email = models.EmailField(_("destinatario"))
+    reply_to = models.EmailField(_("responder a"), blank=True)
+    subject = models.CharField(_("asunto"), max_length=255)
+    body_text = models.TextField(_("cuerpo (texto)"))
+    body_html = models.TextField(_("cuerpo (HTML)"), blank=True)
+    
+    # Entrega
+    status = models.CharField(
+        _("estado"),
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING
+    )
+    attempts = models.PositiveIntegerField(_("intentos"), default=0)
+    last_error = models.TextField(_("último error"), blank=True)
+    next_attempt_at = models.DateTimeField(_("siguiente intento"), default=timezone.now)
+    sent_at = models.DateTimeField(_("enviado"), null=True, blank=True)
+    created_at = models.DateTimeField(_("creado"), auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _("correo en cola")
+        verbose_name_plural = _("correos en cola")
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+            models.Index(fields=['booking', 'kind']),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_kind_display()} → {self.to_email} ({self.get_status_display()})"
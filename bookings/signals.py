@@ -1,7 +1,15 @@
 # bookings/signals.py
-from django.db.models.signals import post_save, pre_save
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
-from .models import Booking, Coupon
+from django.utils import timezone
+from config.content_cache import bump_content_version, bump_availability_version
+from rooms.availability import publish_availability_change
+from rooms.catalog import bump_catalog_version
+from rooms.models import Room
+from .invoices import INVOICE_STATUSES, invoice_digest, queue_booking_invoice
+from .models import Booking, Coupon, Hotel
+from .utils import send_booking_confirmation, send_booking_cancellation
 
 
 @receiver(pre_save, sender=Booking)
@@ -10,6 +18,14 @@ def update_coupon_usage(sender, instance, **kwargs):
     if instance.pk:  # Si ya existe
         try:
             old_instance = Booking.objects.get(pk=instance.pk)
+            # Se conserva para que los receptores post_save detecten transiciones
+            instance._previous_payment_status = old_instance.payment_status
+            instance._previous_stay = (
+                old_instance.room_id, old_instance.check_in_date, old_instance.check_out_date
+            )
+            instance._previous_invoice_digest = (
+                invoice_digest(old_instance) if old_instance.payment_status in INVOICE_STATUSES else None
+            )
             # Si cambió de pendiente a pagado/confirmado
             if (old_instance.payment_status not in ['PAID', 'CONFIRMED'] and 
                 instance.payment_status in ['PAID', 'CONFIRMED'] and
@@ -54,4 +70,78 @@ def update_room_status(sender, instance, created, **kwargs):
 def update_booking_statistics(sender, instance, created, **kwargs):
     """Actualiza las estadísticas del hotel cuando hay una nueva reserva"""
     if hasattr(instance.hotel, 'statistics'):
-        instance.hotel.statistics.update_statistics()
\ No newline at end of file
+        instance.hotel.statistics.update_statistics()
+
+
+@receiver(post_save, sender=Booking)
+def queue_booking_emails(sender, instance, created, **kwargs):
+    """Encola los correos de confirmación y cancelación al cambiar el estado de pago"""
+    previous = None if created else getattr(instance, '_previous_payment_status', None)
+    if previous == instance.payment_status:
+        return
+    
+    if instance.payment_status in ['PAID', 'CONFIRMED'] and previous not in ['PAID', 'CONFIRMED']:
+        send_booking_confirmation(instance)
+    elif instance.payment_status == 'CANCELLED':
+        send_booking_cancellation(instance)
+
+
+@receiver(post_save, sender=Booking)
+def queue_invoice_documents(sender, instance, created, raw=False, **kwargs):
+    """Renderiza la factura en segundo plano al pagarse o confirmarse, y de nuevo si cambian sus importes"""
+    if raw or instance.payment_status not in INVOICE_STATUSES:
+        return
+    previous = None if created else getattr(instance, '_previous_invoice_digest', None)
+    if previous == invoice_digest(instance):
+        return
+    transaction.on_commit(lambda: queue_booking_invoice(instance.pk))
+
+
+@receiver(post_save, sender=Hotel)
+@receiver(post_delete, sender=Hotel)
+def invalidate_hotel_pages(sender, **kwargs):
+    """Invalida el catálogo y las páginas públicas cacheadas al editar un hotel"""
+    bump_catalog_version()
+    bump_content_version()
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def invalidate_booking_availability(sender, **kwargs):
+    """Invalida los ETag de disponibilidad al crear, modificar o eliminar reservas"""
+    bump_availability_version()
+
+
+ACTIVE_STATUSES = ['PAID', 'CONFIRMED']
+
+
+@receiver(post_save, sender=Booking)
+def publish_booking_availability(sender, instance, created, raw=False, **kwargs):
+    """Empuja el cambio de disponibilidad a los clientes SSE (ver config.events)"""
+    if raw:
+        return
+    previous_status = None if created else getattr(instance, '_previous_payment_status', None)
+    if instance.payment_status not in ACTIVE_STATUSES and previous_status not in ACTIVE_STATUSES:
+        # Una reserva pendiente no ocupa la habitación: nada cambió para los demás
+        return
+
+    stay = (instance.room_id, instance.check_in_date, instance.check_out_date)
+    previous_stay = None if created else getattr(instance, '_previous_stay', None)
+    if previous_status in ACTIVE_STATUSES and previous_stay and previous_stay != stay:
+        # Cambio de fechas o de habitación: el rango anterior también se liberó
+        room_type_id = Room.objects.filter(pk=previous_stay[0]).values_list('room_type_id', flat=True).first()
+        if room_type_id:
+            publish_availability_change(room_type_id, previous_stay[1], previous_stay[2])
+    publish_availability_change(instance.room.room_type_id, instance.check_in_date, instance.check_out_date)
+
+
+@receiver(post_delete, sender=Booking)
+def publish_deleted_booking_availability(sender, instance, **kwargs):
+    # Una estancia pasada no cambia lo que se puede vender; archive_batch borra
+    # hasta mil por lote y aquí se ahorra una consulta y dos on_commit por fila
+    if instance.check_out_date < timezone.localdate():
+        return
+    if instance.payment_status in ACTIVE_STATUSES:
+        room_type_id = Room.objects.filter(pk=instance.room_id).values_list('room_type_id', flat=True).first()
+        if room_type_id:
+            publish_availability_change(room_type_id, instance.check_in_date, instance.check_out_date)
@@ -0,0 +1,81 @@
+# bookings/tasks.py
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+
+from .archive import archive_bookings
+from .imports import import_stored_file
+from .invoices import process_booking_invoice
+from .models import Booking, EmailOutbox
+from .utils import deliver_outbox_batch, retry_delay, send_booking_reminder
+
+
+@shared_task(bind=True, max_retries=None)
+def deliver_email_outbox(self):
+    """Vacía la bandeja de salida en lotes reutilizando una conexión SMTP por lote"""
+    total_sent = total_failed = 0
+
+    try:
+        while True:
+            sent, failed = deliver_outbox_batch()
+            total_sent += sent
+            total_failed += failed
+            if sent + failed < settings.EMAIL_OUTBOX_BATCH_SIZE:
+                break
+    except Exception as exc:
+        # Servidor SMTP caído: reintentar con backoff exponencial
+        if self.request.retries >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+            raise
+        raise self.retry(exc=exc, countdown=retry_delay(self.request.retries + 1))
+
+    return {'sent': total_sent, 'failed': total_failed}
+
+
+@shared_task
+def render_booking_invoice(booking_pk):
+    """Factura HTML y PDF de una reserva pagada o confirmada (ver bookings/invoices.py)"""
+    return process_booking_invoice(booking_pk)
+
+
+@shared_task
+def import_booking_file(name, create_users=False, user_id=None):
+    """Importación de reservaciones subida desde el admin (ver bookings/imports.py)"""
+    return import_stored_file(name, create_users, user_id)
+
+
+@shared_task
+def queue_booking_reminders():
+    """Encola recordatorios para las reservas que llegan mañana"""
+    tomorrow = timezone.now().date() + timedelta(days=1)
+
+    bookings = Booking.objects.filter(
+        check_in_date=tomorrow,
+        payment_status__in=['PAID', 'CONFIRMED']
+    ).exclude(
+        emails__kind=EmailOutbox.Kind.REMINDER
+    ).select_related('hotel', 'room__room_type', 'user')
+
+    queued = 0
+    for booking in bookings:
+        if send_booking_reminder(booking):
+            queued += 1
+
+    return queued
+
+
+@shared_task
+def archive_old_bookings():
+    """Mueve al archivo las reservas cuya estancia terminó hace más de BOOKING_ARCHIVE_AFTER_DAYS"""
+    return archive_bookings()
+
+
+@shared_task
+def update_all_room_availability():
+    """Actualiza el estado de las habitaciones y repara desviaciones de available_now"""
+    from django.core.management import call_command
+    from rooms.availability import reconcile_available_now
+
+    call_command('update_room_availability')
+    return len(reconcile_available_now())
@@ -1,3 +1,668 @@
-from django.test import TestCase
+# bookings/tests.py
+import io
+import re
+import shutil
+import socketserver
+import tempfile
+import threading
+import zipfile
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.template import TemplateDoesNotExist
+from django.test import TestCase, override_settings
+from django.urls import URLResolver, get_resolver, reverse
+from django.utils import timezone
+
+from config.query_budget import URL_QUERY_BUDGETS, measure_request
+from reviews.models import ReviewAndRating
+from rooms.ical import feed_token
+from rooms.models import Room, RoomType
+from .imports import import_bookings, import_storage, import_stored_file
+from .invoices import generate_invoice, invoice_digest, invoice_name, invoice_storage
+from .models import ArchivedBooking, Booking, EmailOutbox, Hotel
+from .utils import claim_outbox_batch, deliver_outbox_batch, retry_delay
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def temporary_storage(test, alias):
+    """STORAGES[alias] en un directorio temporal mientras dura la prueba"""
+    location = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, location)
+    storages = {**settings.STORAGES, alias: {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage', 'OPTIONS': {'location': location}
+    }}
+    test.enterContext(test.settings(STORAGES=storages))
+
+
+class SmtpStandIn(socketserver.ThreadingTCPServer):
+    """
+    Servidor SMTP mínimo en un puerto efímero: cuenta conexiones y mensajes,
+    rechaza (550) a los destinatarios en `rejected` y, con `drop_after`,
+    corta la conexión después de aceptar ese número de mensajes.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, rejected=(), drop_after=None):
+        super().__init__(('127.0.0.1', 0), SmtpHandler)
+        self.rejected = set(rejected)
+        self.drop_after = drop_after
+        self.connections = 0
+        self.messages = []
+        self.lock = threading.Lock()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+
+
+class SmtpHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self.reply('220 localhost')
+        recipients = []
+        while True:
+            line = self.rfile.readline().decode('utf-8', 'replace').strip()
+            command = line[:4].upper()
+            if not line or command == 'QUIT':
+                self.reply('221 adiós')
+                return
+            if command in ('EHLO', 'HELO'):
+                self.reply('250 localhost')
+            elif command == 'MAIL':
+                if server.drop_after is not None and len(server.messages) >= server.drop_after:
+                    return
+                recipients = []
+                self.reply('250 ok')
+            elif command == 'RCPT':
+                address = line.split(':', 1)[1].strip().strip('<>')
+                if address in server.rejected:
+                    self.reply('550 buzón inexistente')
+                else:
+                    recipients.append(address)
+                    self.reply('250 ok')
+            elif command == 'DATA':
+                self.reply('354 termina con .')
+                while self.rfile.readline() not in (b'.\r\n', b'.\n', b''):
+                    pass
+                with server.lock:
+                    server.messages.extend(recipients)
+                self.reply('250 ok')
+            else:
+                # RSET, NOOP
+                self.reply('250 ok')
+
+
+def outbox_email(to_email, **fields):
+    return EmailOutbox.objects.create(
+        kind=EmailOutbox.Kind.CONTACT,
+        from_email='noreply@hotelyunuen.com',
+        to_email=to_email,
+        subject='Prueba',
+        body_text='Hola',
+        **fields
+    )
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+    EMAIL_HOST='127.0.0.1',
+    EMAIL_USE_TLS=False,
+    EMAIL_HOST_USER='',
+    EMAIL_HOST_PASSWORD='',
+    EMAIL_OUTBOX_BATCH_SIZE=50,
+    EMAIL_OUTBOX_MAX_ATTEMPTS=3,
+    EMAIL_OUTBOX_RETRY_BACKOFF=60,
+    EMAIL_OUTBOX_RETRY_BACKOFF_MAX=60 * 60,
+    EMAIL_OUTBOX_LEASE=5 * 60,
+)
+class EmailOutboxDeliveryTests(TestCase):
+    """deliver_outbox_batch contra un servidor SMTP local"""
+
+    def deliver(self, server, batch_size=None):
+        with self.settings(EMAIL_PORT=server.port):
+            return deliver_outbox_batch(batch_size)
+
+    def test_batch_reuses_one_connection(self):
+        for index in range(5):
+            outbox_email(f'huesped{index}@example.com')
+
+        with SmtpStandIn() as server:
+            self.assertEqual(self.deliver(server), (5, 0))
+
+        self.assertEqual(server.connections, 1)
+        self.assertEqual(len(server.messages), 5)
+        self.assertFalse(EmailOutbox.objects.exclude(status=EmailOutbox.Status.SENT).exists())
+        self.assertFalse(EmailOutbox.objects.filter(sent_at__isnull=True).exists())
+
+    def test_rejected_message_is_retried_with_backoff(self):
+        good = outbox_email('huesped@example.com')
+        bad = outbox_email('rechazado@example.com')
+
+        before = timezone.now()
+        with SmtpStandIn(rejected={'rechazado@example.com'}) as server:
+            self.assertEqual(self.deliver(server), (1, 1))
+        self.assertEqual(server.connections, 1)
+
+        good.refresh_from_db()
+        bad.refresh_from_db()
+        self.assertEqual(good.status, EmailOutbox.Status.SENT)
+        self.assertEqual(bad.status, EmailOutbox.Status.PENDING)
+        self.assertEqual(bad.attempts, 1)
+        self.assertIn('rechazado@example.com', bad.last_error)
+        self.assertGreaterEqual(bad.next_attempt_at, before + timedelta(seconds=retry_delay(1)))
+
+        # El segundo fallo espera el doble
+        EmailOutbox.objects.filter(pk=bad.pk).update(next_attempt_at=timezone.now())
+        before = timezone.now()
+        with SmtpStandIn(rejected={'rechazado@example.com'}) as server:
+            self.assertEqual(self.deliver(server), (0, 1))
+        bad.refresh_from_db()
+        self.assertEqual(bad.attempts, 2)
+        self.assertEqual(retry_delay(2), 2 * retry_delay(1))
+        self.assertGreaterEqual(bad.next_attempt_at, before + timedelta(seconds=retry_delay(2)))
+
+    def test_failed_after_max_attempts(self):
+        bad = outbox_email('rechazado@example.com')
+
+        with SmtpStandIn(rejected={'rechazado@example.com'}) as server:
+            for _ in range(3):
+                EmailOutbox.objects.filter(pk=bad.pk, status=EmailOutbox.Status.PENDING).update(
+                    next_attempt_at=timezone.now()
+                )
+                self.deliver(server)
+
+            bad.refresh_from_db()
+            self.assertEqual(bad.status, EmailOutbox.Status.FAILED)
+            self.assertEqual(bad.attempts, 3)
+
+            # Un correo fallido ya no se vuelve a tomar
+            EmailOutbox.objects.filter(pk=bad.pk).update(next_attempt_at=timezone.now())
+            self.assertEqual(self.deliver(server), (0, 0))
+        self.assertEqual(server.messages, [])
+
+    def test_unreachable_server_reschedules_batch(self):
+        email = outbox_email('huesped@example.com')
+        with SmtpStandIn() as server:
+            port = server.port
+
+        # Una caída más larga que todos los reintentos no gasta los intentos del correo
+        with self.settings(EMAIL_PORT=port):
+            for _ in range(5):
+                EmailOutbox.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+                with self.assertRaises(OSError):
+                    deliver_outbox_batch()
+
+        email.refresh_from_db()
+        self.assertEqual(email.status, EmailOutbox.Status.PENDING)
+        self.assertEqual(email.attempts, 0)
+        self.assertTrue(email.last_error)
+        self.assertGreater(email.next_attempt_at, timezone.now())
+
+        EmailOutbox.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+        with SmtpStandIn() as server:
+            self.assertEqual(self.deliver(server), (1, 0))
+
+    def test_dropped_connection_reschedules_unsent(self):
+        emails = [outbox_email(f'huesped{index}@example.com') for index in range(4)]
+
+        with SmtpStandIn(drop_after=2) as server:
+            with self.assertRaises(OSError):
+                self.deliver(server)
+        self.assertEqual(len(server.messages), 2)
+
+        statuses = {email.to_email: (email.status, email.attempts) for email in EmailOutbox.objects.all()}
+        self.assertEqual(statuses, {
+            emails[0].to_email: (EmailOutbox.Status.SENT, 0),
+            emails[1].to_email: (EmailOutbox.Status.SENT, 0),
+            emails[2].to_email: (EmailOutbox.Status.PENDING, 0),
+            emails[3].to_email: (EmailOutbox.Status.PENDING, 0),
+        })
+
+    def test_claimed_batch_is_not_sent_twice(self):
+        for index in range(3):
+            outbox_email(f'huesped{index}@example.com')
+
+        claimed = claim_outbox_batch()
+        self.assertEqual(len(claimed), 3)
+        # El lease los saca de la cola mientras el primer worker envía
+        lease_end = timezone.now() + timedelta(minutes=5)
+        for email in claimed:
+            self.assertGreater(email.next_attempt_at, lease_end - timedelta(seconds=5))
+        self.assertEqual(claim_outbox_batch(), [])
+
+        with SmtpStandIn() as server:
+            self.assertEqual(self.deliver(server), (0, 0))
+            self.assertEqual(server.messages, [])
+
+            # Si el worker muere, el lease vence y otro worker los envía una sola vez
+            EmailOutbox.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+            self.assertEqual(self.deliver(server), (3, 0))
+            self.assertEqual(self.deliver(server), (0, 0))
+        self.assertEqual(len(server.messages), 3)
+
+    def test_batch_size_limits_claim(self):
+        for index in range(4):
+            outbox_email(f'huesped{index}@example.com')
+
+        with SmtpStandIn() as server:
+            self.assertEqual(self.deliver(server, batch_size=3), (3, 0))
+            self.assertEqual(self.deliver(server, batch_size=3), (1, 0))
+        self.assertEqual(server.connections, 2)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ContactOutboxTests(TestCase):
+    """El formulario de contacto solo encola correos con encabezados válidos"""
+
+    def post(self, **fields):
+        data = {'name': 'Ana', 'email': 'ana@example.com', 'subject': 'Hola', 'message': 'Quiero reservar'}
+        data.update(fields)
+        return self.client.post('/contacto/', data)
+
+    def test_valid_message_is_queued(self):
+        # Sin Redis el throttling deja pasar la petición y lo registra
+        with self.assertLogs('config.throttling', 'WARNING'):
+            self.post(subject='Reserva\r\nBcc: otro@example.com')
+        email = EmailOutbox.objects.get()
+        self.assertEqual(email.reply_to, 'ana@example.com')
+        self.assertEqual(email.subject, '[Hotel Yunuen] Reserva Bcc: otro@example.com')
+
+    def test_invalid_reply_to_is_rejected(self):
+        for value in ('ana@example.com\nBcc: otro@example.com', 'no-es-correo'):
+            self.post(email=value)
+        self.assertFalse(EmailOutbox.objects.exists())
+
+
+def hot_queries():
+    """Consultas más frecuentes del sistema: (nombre, tabla principal, queryset)"""
+    today = timezone.now().date()
+    room = Room.objects.order_by('pk').first()
+    hotel = Hotel.objects.order_by('pk').first()
+    user_id = Booking.objects.values_list('user_id', flat=True).first()
+    active = ['PAID', 'CONFIRMED']
+
+    return [
+        ('Traslape de disponibilidad (Room.is_available_for_dates)', 'bookings_booking',
+         Booking.objects.filter(
+             room_id=room.pk,
+             check_in_date__lt=today + timedelta(days=3),
+             check_out_date__gt=today,
+             payment_status__in=active
+         ).order_by().values('pk')[:1]),
+        ('Reserva activa hoy (update_room_status)', 'bookings_booking',
+         Booking.objects.filter(
+             room_id=room.pk,
+             check_in_date__lte=today,
+             check_out_date__gte=today,
+             payment_status__in=active
+         ).order_by().values('pk')[:1]),
+        ('Historial del huésped (BookingListView)', 'bookings_booking',
+         Booking.objects.filter(user_id=user_id).order_by('-booking_date')[:10]),
+        ('Historial archivado del huésped (BookingHistory)', 'bookings_archivedbooking',
+         ArchivedBooking.objects.filter(user_id=user_id).order_by('-booking_date')[:10]),
+        ('Reservas pendientes expiradas (check_expired_bookings)', 'bookings_booking',
+         Booking.objects.filter(
+             payment_status='PENDING',
+             booking_date__lt=timezone.now() - timedelta(days=3)
+         )),
+        ('Estadísticas por hotel (HotelStatistics.update_statistics)', 'bookings_booking',
+         Booking.objects.filter(hotel_id=hotel.pk, payment_status__in=active).order_by().values('pk')),
+        ('Llegadas de mañana (queue_booking_reminders)', 'bookings_booking',
+         Booking.objects.filter(
+             check_in_date=today + timedelta(days=1),
+             payment_status__in=active
+         ).order_by()),
+        ('Reseñas de un hotel (HotelReviewsView)', 'reviews_reviewandrating',
+         ReviewAndRating.objects.filter(hotel_id=hotel.pk, is_active=True).order_by('-review_date')[:10]),
+        ('Reseñas recientes (ReviewListView)', 'reviews_reviewandrating',
+         ReviewAndRating.objects.filter(is_active=True).order_by('-review_date')[:20]),
+        ('Habitaciones disponibles por tipo (available_rooms_for_dates, reconciliación)', 'rooms_room',
+         Room.objects.filter(room_type_id=room.room_type_id, is_available=True).order_by().values('pk')),
+        ('Correos por enviar (claim_outbox_batch)', 'bookings_emailoutbox',
+         EmailOutbox.objects.filter(
+             status=EmailOutbox.Status.PENDING,
+             next_attempt_at__lte=timezone.now()
+         ).order_by('next_attempt_at').values('pk')[:50]),
+    ]
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Los índices parciales y los planes solo se exigen en PostgreSQL')
+@override_settings(CACHES=LOCMEM_CACHE)
+class HotQueryPlanTests(TestCase):
+    """Ninguna consulta frecuente recorre su tabla completa (EXPLAIN)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('generate_test_data', stdout=io.StringIO())
+
+    def test_hot_queries_use_indexes(self):
+        with connection.cursor() as cursor:
+            # Con tablas pequeñas el planificador prefiere Seq Scan aunque exista
+            # un índice; así solo aparece si no hay índice utilizable. SET LOCAL
+            # dura hasta el final de la transacción de la prueba.
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+        for name, table, queryset in hot_queries():
+            with self.subTest(name):
+                plan = queryset.explain()
+                self.assertIsNone(re.search(rf'Seq Scan on {table}\b', plan), plan)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class BookingAdminArchiveTests(TestCase):
+    """El listado de reservaciones lee también el archivo con el filtro "Tabla\""""
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('generate_test_data', stdout=io.StringIO())
+        cls.admin_user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'x')
+        cls.live = Booking.objects.order_by('pk').first()
+        row = Booking.objects.filter(pk=cls.live.pk).values(
+            *[field.attname for field in ArchivedBooking._meta.concrete_fields if field.name != 'archived_at']
+        ).get()
+        # Pagada: los datos generados pueden traer la reserva ya cancelada
+        row.update(
+            id=Booking.objects.order_by('-pk').values_list('pk', flat=True)[0] + 1,
+            invoice_id='INV-ARCHIVO', payment_status=Booking.PaymentStatus.PAID
+        )
+        cls.archived = ArchivedBooking.objects.create(**row)
+
+    def setUp(self):
+        self.client.force_login(self.admin_user)
+
+    def test_live_view_lists_only_live_bookings(self):
+        response = self.client.get('/admin/bookings/booking/')
+        self.assertContains(response, self.live.invoice_id)
+        self.assertNotContains(response, 'INV-ARCHIVO')
+        self.assertContains(response, 'Cancelar reservaciones')
+
+    def test_archive_view_lists_archived_bookings_read_only(self):
+        response = self.client.get('/admin/bookings/booking/', {'archivo': '1'})
+        self.assertContains(response, 'INV-ARCHIVO')
+        self.assertNotContains(response, self.live.invoice_id)
+        self.assertContains(response, f'/admin/bookings/archivedbooking/{self.archived.pk}/change/')
+        self.assertContains(response, 'Exportar a CSV')
+        self.assertNotContains(response, 'Cancelar reservaciones')
+
+        response = self.client.post('/admin/bookings/booking/?archivo=1', {
+            'action': 'cancel_bookings', '_selected_action': [self.archived.pk]
+        })
+        self.archived.refresh_from_db()
+        self.assertNotEqual(self.archived.payment_status, 'CANCELLED')
+
+    def test_live_search_points_to_archive_matches(self):
+        response = self.client.get('/admin/bookings/booking/', {'q': 'INV-ARCHIVO'})
+        self.assertContains(response, 'ver en el archivo')
+        self.assertContains(response, '?archivo=1&amp;q=INV-ARCHIVO')
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class BookingInvoiceTests(TestCase):
+    """Facturas guardadas por hash de sus datos (bookings/invoices.py)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('generate_test_data', stdout=io.StringIO())
+        cls.superuser = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'x')
+
+    def setUp(self):
+        temporary_storage(self, 'invoices')
+        self.booking = self.get_booking()
+
+    def get_booking(self):
+        return Booking.objects.select_related('hotel', 'room__room_type', 'coupon', 'user').filter(
+            payment_status__in=['PAID', 'CONFIRMED']
+        ).order_by('pk').first()
+
+    def stored_files(self):
+        try:
+            return sorted(invoice_storage().listdir(self.booking.invoice_id)[1])
+        except FileNotFoundError:
+            return []
+
+    def test_digest_depends_only_on_invoice_data(self):
+        digest = invoice_digest(self.booking)
+        self.booking.payment_status = 'CANCELLED' if self.booking.payment_status == 'PAID' else 'PAID'
+        self.booking.special_requests = 'Cuna'
+        self.assertEqual(invoice_digest(self.booking), digest)
+        # 1500 y 1500.00 son el mismo importe en la base de datos
+        self.booking.total_price = Decimal('1500')
+        digest = invoice_digest(self.booking)
+        self.booking.total_price = Decimal('1500.00')
+        self.assertEqual(invoice_digest(self.booking), digest)
+        self.booking.total_price = Decimal('1500.01')
+        self.assertNotEqual(invoice_digest(self.booking), digest)
+
+    def test_view_revalidates_with_etag(self):
+        self.client.force_login(self.booking.user)
+        url = reverse('bookings:booking_invoice', kwargs={'booking_id': self.booking.booking_id})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/html; charset=utf-8')
+        self.assertIn(self.booking.invoice_id, b''.join(response.streaming_content).decode())
+        etag = response['ETag']
+
+        response = self.client.get(url, headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(url, {'format': 'pdf'}, headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+
+        # Otro importe, otro documento: el ETag anterior ya no sirve
+        Booking.objects.filter(pk=self.booking.pk).update(total_price=self.booking.total_price + 1)
+        response = self.client.get(url, headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_regeneration_deletes_stale_versions(self):
+        old = generate_invoice(self.booking)
+        self.assertEqual(self.stored_files(), [f'{old}.html', f'{old}.pdf'])
+
+        self.booking.total_price += 1
+        new = generate_invoice(self.booking)
+        self.assertNotEqual(new, old)
+        self.assertEqual(self.stored_files(), [f'{new}.html', f'{new}.pdf'])
+        self.assertFalse(invoice_storage().exists(invoice_name(self.booking.invoice_id, old, 'pdf')))
+
+    def test_month_export_zip(self):
+        month = timezone.make_aware(datetime(2020, 1, 15, 12))
+        Booking.objects.filter(pk=self.booking.pk).update(booking_date=month)
+        self.client.force_login(self.superuser)
+
+        response = self.client.get('/admin/bookings/booking/invoices/export/', {'month': '2020-01'})
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertIsNone(archive.testzip())
+        self.assertEqual(
+            sorted(archive.namelist()), [f'{self.booking.invoice_id}.html', f'{self.booking.invoice_id}.pdf']
+        )
+        self.assertTrue(archive.read(f'{self.booking.invoice_id}.pdf').startswith(b'%PDF'))
+
+        response = self.client.get('/admin/bookings/booking/invoices/export/', {'month': 'enero'}, follow=True)
+        self.assertContains(response, 'AAAA-MM')
+
+
+def import_csv(lines):
+    return io.BytesIO('\n'.join(lines).encode())
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class BookingImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command('generate_test_data', stdout=io.StringIO())
+        cls.booking = Booking.objects.select_related('user', 'hotel').order_by('pk').first()
+        cls.rooms = list(Room.objects.filter(is_available=True).order_by('pk')[:5])
+
+    def row(self, room, total_price, weeks):
+        # Fechas lejanas: ninguna reserva de generate_test_data las ocupa
+        check_in = timezone.localdate() + timedelta(days=800 + 7 * weeks)
+        return ','.join([
+            self.booking.user.email, self.booking.hotel.slug, room.room_number, check_in.isoformat(),
+            (check_in + timedelta(days=2)).isoformat(), '1', 'PAID', total_price,
+        ])
+
+    def test_bad_amounts_are_rejected_per_row(self):
+        amounts = ['1500.00', 'NaN', 'Infinity', '-inf', '100000000', '1e30']
+        header = 'email,hotel,room,check_in_date,check_out_date,adults,payment_status,total_price'
+        rows = [self.row(self.rooms[index % len(self.rooms)], amount, index) for index, amount in enumerate(amounts)]
+        result = import_bookings(import_csv([header, *rows]), 'reservas.csv')
+
+        self.assertEqual(result.created, 1)
+        self.assertEqual([line for line, _ in result.errors], [3, 4, 5, 6, 7])
+        self.assertIn('importe inválido', result.errors[0][1])
+        self.assertIn('importe fuera de rango', result.errors[3][1])
+        self.assertEqual(
+            Booking.objects.filter(check_in_date__gte=timezone.localdate() + timedelta(days=800)).get().total_price,
+            Decimal('1500.00'),
+        )
+
+    def test_admin_upload_is_imported_in_background(self):
+        temporary_storage(self, 'imports')
+        admin_user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'x')
+        self.client.force_login(admin_user)
+        header = 'email,hotel,room,check_in_date,check_out_date,adults,payment_status,total_price'
+        content = import_csv([header, self.row(self.rooms[0], '1500', 0), self.row(self.rooms[1], 'NaN', 1)])
+        upload = SimpleUploadedFile('reservas.csv', content.getvalue())
+
+        with mock.patch('bookings.tasks.import_booking_file.delay') as delay:
+            response = self.client.post('/admin/bookings/booking/import/', {'file': upload}, follow=True)
+        # La petición solo guarda el archivo y encola la tarea
+        self.assertContains(response, 'en segundo plano')
+        name, create_users, user_id = delay.call_args.args
+        self.assertEqual((create_users, user_id), (False, admin_user.pk))
+        self.assertTrue(import_storage().exists(name))
+        self.assertFalse(Booking.objects.filter(total_price=1500).exists())
+
+        summary = import_stored_file(name, create_users, user_id)
+        self.assertEqual((summary['created'], summary['rejected']), (1, 1))
+        self.assertFalse(import_storage().exists(name))
+        # Una segunda entrega de la tarea no importa de nuevo
+        self.assertIsNone(import_stored_file(name, create_users, user_id))
+
+        response = self.client.get('/admin/bookings/booking/')
+        self.assertContains(response, '«reservas.csv»: 1 reservaciones importadas, 1 filas rechazadas.')
+        self.assertContains(response, 'Línea 3: total_price: importe inválido')
+        response = self.client.get('/admin/bookings/booking/')
+        self.assertNotContains(response, 'reservas.csv')
+
+
+def iter_url_patterns(patterns, namespace=None):
+    """(nombre completo, patrón) de cada URL con nombre, sin el admin"""
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.namespace == 'admin':
+                continue
+            child = pattern.namespace or namespace
+            if namespace and pattern.namespace:
+                child = f'{namespace}:{pattern.namespace}'
+            yield from iter_url_patterns(pattern.url_patterns, child)
+        elif pattern.name:
+            yield (f'{namespace}:{pattern.name}' if namespace else pattern.name), pattern
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class QueryBudgetTests(TestCase):
+    """Cada URL respeta su presupuesto de consultas (URL_QUERY_BUDGETS) con la cache caliente"""
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('generate_test_data', stdout=io.StringIO())
+        cls.booking = Booking.objects.select_related('user', 'hotel', 'room').order_by('pk').first()
+        cls.superuser = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'x')
+
+    def setUp(self):
+        # bookings:booking_invoice genera la factura si no existe
+        temporary_storage(self, 'invoices')
+        self.samples = self.build_samples(self.booking)
+
+    def build_samples(self, booking):
+        """Argumentos y parámetros GET de ejemplo tomados de los datos de prueba"""
+        check_in = timezone.now().date() + timedelta(days=30)
+        check_out = check_in + timedelta(days=2)
+        room_type = RoomType.objects.filter(is_active=True).order_by('pk').first()
+        review = ReviewAndRating.objects.filter(is_active=True).order_by('pk').first()
+        hotel = Hotel.objects.filter(is_active=True).order_by('pk').first() or booking.hotel
+
+        dates = {'check_in': check_in.isoformat(), 'check_out': check_out.isoformat()}
+        return {
+            'kwargs': {
+                'booking_id': booking.booking_id,
+                'hotel_slug': hotel.slug,
+                ('rooms', 'pk'): room_type.pk,
+                ('reviews', 'pk'): review.pk if review else 0,
+                ('api_v1', 'pk'): room_type.pk,
+                'token': feed_token('room-type', room_type.pk),
+            },
+            'params': {
+                'check_availability_ajax': dict(dates, guests=2),
+                'rooms:check_availability': dict(dates, room_type_id=room_type.pk),
+                'reviews:review_create': {'booking_id': booking.booking_id},
+                'api_v1:availability': dict(dates, guests=2),
+                'api_v1:availability_stream': dict(dates, room_type=room_type.pk),
+                'api_v1:quotes': dict(dates, room_type=room_type.pk),
+            },
+        }
+
+    def url_for(self, name, pattern):
+        namespace = name.split(':')[0] if ':' in name else None
+        kwargs = {}
+        for key in pattern.pattern.converters:
+            samples = self.samples['kwargs']
+            kwargs[key] = samples.get((namespace, key), samples.get(key))
+        return reverse(name, kwargs=kwargs or None)
+
+    def assert_within_budget(self, name, path, params=None):
+        self.client.get(path, params)  # Calentar caches: el presupuesto es del estado estable
+        response, recorder = measure_request(self.client, path, data=params)
+        budget = URL_QUERY_BUDGETS.get(name, settings.QUERY_BUDGET)
+        statements = '\n'.join(f'{count}× {sql[:160]}' for sql, count in recorder.statements.items())
+        self.assertLessEqual(
+            recorder.count, budget,
+            f'{name} ({path}) → {response.status_code}: {recorder.count}/{budget} consultas\n{statements}'
+        )
+
+    def test_url_budgets(self):
+        for name, pattern in iter_url_patterns(get_resolver().url_patterns):
+            with self.subTest(name):
+                self.client.logout()
+                view = getattr(pattern.callback, 'view_class', pattern.callback)
+                if isinstance(view, type) and issubclass(view, LoginRequiredMixin):
+                    self.client.force_login(self.booking.user)
+                try:
+                    self.assert_within_budget(name, self.url_for(name, pattern), self.samples['params'].get(name))
+                except TemplateDoesNotExist as exc:
+                    self.skipTest(f'falta la plantilla {exc}')
+
+    def test_admin_changelist_budgets(self):
+        self.client.force_login(self.superuser)
+        for model in admin.site._registry:
+            name = f'admin:{model._meta.app_label}_{model._meta.model_name}_changelist'
+            with self.subTest(name):
+                self.assert_within_budget(name, reverse(name))
@@ -1,24 +1,196 @@
 # bookings/utils.py
-from django.core.mail import send_mail
+import logging
+import smtplib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
 from django.template.loader import render_to_string
+from django.utils import timezone
 
-def send_booking_confirmation(booking):
-    subject = f'Confirmación de Reserva - {booking.invoice_id}'
-    
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+BOOKING_EMAILS = {
+    EmailOutbox.Kind.CONFIRMATION: ('Confirmación de Reserva', 'emails/booking_confirmation'),
+    EmailOutbox.Kind.CANCELLATION: ('Cancelación de Reserva', 'emails/booking_cancellation'),
+    EmailOutbox.Kind.REMINDER: ('Recordatorio de Reserva', 'emails/booking_reminder'),
+}
+
+
+def queue_email(kind, to_email, subject, body_text, body_html='', from_email=None,
+                reply_to='', booking=None):
+    """Guarda un correo en la bandeja de salida y despierta al worker al confirmar la transacción"""
+    email = EmailOutbox.objects.create(
+        kind=kind,
+        booking=booking,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to_email=to_email,
+        reply_to=reply_to,
+        subject=subject,
+        body_text=body_text,
+        body_html=body_html,
+    )
+
+    transaction.on_commit(wake_outbox_worker)
+
+    return email
+
+
+def wake_outbox_worker():
+    """Pide a Celery vaciar la bandeja; si el broker no responde, beat lo hará después"""
+    from .tasks import deliver_email_outbox
+
+    try:
+        deliver_email_outbox.delay()
+    except Exception:
+        logger.warning('No se pudo encolar deliver_email_outbox', exc_info=True)
+
+
+def queue_booking_email(booking, kind):
+    """Renderiza y encola un correo de reservación"""
+    if not booking.user.email:
+        return None
+
+    title, template = BOOKING_EMAILS[kind]
     context = {
         'booking': booking,
         'hotel': booking.hotel,
         'user': booking.user,
     }
-    
-    html_message = render_to_string('emails/booking_confirmation.html', context)
-    plain_message = render_to_string('emails/booking_confirmation.txt', context)
-    
-    send_mail(
-        subject,
-        plain_message,
-        'noreply@hotelyunuen.com',
-        [booking.user.email],
-        html_message=html_message,
-        fail_silently=False,
-    )
\ No newline at end of file
+
+    return queue_email(
+        kind,
+        booking.user.email,
+        f'{title} - {booking.invoice_id}',
+        render_to_string(f'{template}.txt', context),
+        render_to_string(f'{template}.html', context),
+        booking=booking,
+    )
+
+
+def send_booking_confirmation(booking):
+    return queue_booking_email(booking, EmailOutbox.Kind.CONFIRMATION)
+
+
+def send_booking_cancellation(booking):
+    return queue_booking_email(booking, EmailOutbox.Kind.CANCELLATION)
+
+
+def send_booking_reminder(booking):
+    return queue_booking_email(booking, EmailOutbox.Kind.REMINDER)
+
+
+def retry_delay(attempts):
+    """Backoff exponencial (en segundos) después de `attempts` intentos fallidos"""
+    base = settings.EMAIL_OUTBOX_RETRY_BACKOFF
+    return min(base * 2 ** max(attempts - 1, 0), settings.EMAIL_OUTBOX_RETRY_BACKOFF_MAX)
+
+
+def claim_outbox_batch(batch_size=None):
+    """Reserva un lote de correos pendientes para que ningún otro worker los tome"""
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    now = timezone.now()
+
+    with transaction.atomic():
+        ids = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True).filter(
+                status=EmailOutbox.Status.PENDING,
+                next_attempt_at__lte=now
+            ).order_by('next_attempt_at').values_list('id', flat=True)[:batch_size]
+        )
+        # El lease vence si el worker muere a mitad del envío
+        EmailOutbox.objects.filter(id__in=ids).update(
+            next_attempt_at=now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE)
+        )
+
+    return list(EmailOutbox.objects.filter(id__in=ids).order_by('created_at'))
+
+
+def record_failure(email, error):
+    """Registra un intento fallido y programa el siguiente con backoff"""
+    email.attempts += 1
+    email.last_error = str(error)[:2000]
+    if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        email.status = EmailOutbox.Status.FAILED
+    else:
+        email.next_attempt_at = timezone.now() + timedelta(seconds=retry_delay(email.attempts))
+    email.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
+
+
+def is_connection_error(error):
+    """Servidor o red caídos: no dice nada del correo, que podría enviarse en el siguiente intento"""
+    # SMTPException hereda de OSError: los rechazos del servidor no cuentan como caída
+    return isinstance(error, smtplib.SMTPServerDisconnected) or (
+        isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+    )
+
+
+def reschedule_batch(emails, error):
+    """
+    Devuelve los correos a la cola sin gastar intentos: una caída del servidor
+    SMTP no debe marcar como FAILED la bandeja completa si dura más que el backoff.
+    """
+    EmailOutbox.objects.filter(id__in=[email.id for email in emails]).update(
+        next_attempt_at=timezone.now() + timedelta(seconds=retry_delay(1)),
+        last_error=str(error)[:2000],
+    )
+
+
+def deliver_outbox_batch(batch_size=None, connection=None):
+    """
+    Envía un lote de correos pendientes sobre una sola conexión SMTP.
+
+    Retorna (enviados, fallidos). Solo un rechazo del mensaje cuenta como
+    intento fallido. Si la conexión no abre o se cae a la mitad, los correos
+    no enviados se reprograman sin contar el intento y la excepción se
+    propaga para que Celery reintente.
+    """
+    emails = claim_outbox_batch(batch_size)
+    if not emails:
+        return 0, 0
+
+    connection = connection or get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as exc:
+        reschedule_batch(emails, exc)
+        raise
+
+    sent, failed = [], 0
+    try:
+        for index, email in enumerate(emails):
+            message = EmailMultiAlternatives(
+                email.subject,
+                email.body_text,
+                email.from_email,
+                [email.to_email],
+                connection=connection,
+                reply_to=[email.reply_to] if email.reply_to else None,
+            )
+            if email.body_html:
+                message.attach_alternative(email.body_html, 'text/html')
+
+            # La conexión ya está abierta, send_messages no la cierra entre correos
+            try:
+                connection.send_messages([message])
+            except Exception as exc:
+                if is_connection_error(exc):
+                    reschedule_batch(emails[index:], exc)
+                    raise
+                record_failure(email, exc)
+                failed += 1
+            else:
+                sent.append(email.id)
+    finally:
+        # También si la conexión se cayó: lo enviado ya salió y no debe repetirse
+        EmailOutbox.objects.filter(id__in=sent).update(
+            status=EmailOutbox.Status.SENT,
+            sent_at=timezone.now(),
+            last_error=''
+        )
+        connection.close()
+
+    return len(sent), failed
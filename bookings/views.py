@@ -3,15 +3,21 @@ from django.views.generic import ListView, DetailView, CreateView, View
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.shortcuts import redirect, get_object_or_404
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse
+from django.http import FileResponse, Http404, JsonResponse, HttpResponse
 from django.urls import reverse_lazy
 from django.utils import timezone
-from .models import Booking, Coupon
+from django.utils.cache import patch_cache_control
+from config.conditional import ConditionalGetMixin
+from config.pagination import KeysetPaginationMixin
+from .archive import BookingHistory
+from .invoices import INVOICE_FORMATS, invoice_digest, open_invoice
+from .models import ArchivedBooking, Booking, Coupon
+from rooms import catalog
 from rooms.models import Room
 from datetime import datetime
 
 
-class BookingListView(LoginRequiredMixin, ListView):
+class BookingListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     """Lista las reservaciones del usuario"""
     model = Booking
     template_name = 'bookings/booking_list.html'
@@ -19,11 +25,15 @@ class BookingListView(LoginRequiredMixin, ListView):
     paginate_by = 10
     
     def get_queryset(self):
-        queryset = Booking.objects.filter(
-            user=self.request.user
-        ).select_related(
-            'hotel', 'room__room_type', 'coupon'
-        ).order_by('-booking_date')
+        # Vigentes y archivadas, paginadas por (booking_date, id)
+        queryset = BookingHistory(*(
+            model.objects.filter(
+                user=self.request.user
+            ).select_related(
+                'hotel', 'room__room_type', 'coupon'
+            ).order_by('-booking_date')
+            for model in (Booking, ArchivedBooking)
+        ))
         
         # Filtrar por estado
         status = self.request.GET.get('status')
@@ -38,7 +48,10 @@ class BookingListView(LoginRequiredMixin, ListView):
         
         # Estadísticas del usuario
         all_bookings = Booking.objects.filter(user=self.request.user)
-        context['total_bookings'] = all_bookings.count()
+        context['total_bookings'] = (
+            all_bookings.count()
+            + ArchivedBooking.objects.filter(user=self.request.user).count()
+        )
         context['upcoming_bookings'] = all_bookings.filter(
             check_in_date__gte=timezone.now().date(),
             payment_status__in=['PAID', 'CONFIRMED']
@@ -47,7 +60,21 @@ class BookingListView(LoginRequiredMixin, ListView):
         return context
 
 
-class BookingDetailView(LoginRequiredMixin, DetailView):
+class ArchivedBookingFallbackMixin:
+    """Busca la reservación en el archivo cuando ya no está en la tabla vigente"""
+    
+    def get_object(self, queryset=None):
+        try:
+            return super().get_object(queryset)
+        except Http404:
+            return super().get_object(
+                ArchivedBooking.objects.filter(
+                    user=self.request.user
+                ).select_related('hotel', 'room__room_type', 'coupon', 'user', 'review')
+            )
+
+
+class BookingDetailView(LoginRequiredMixin, ArchivedBookingFallbackMixin, DetailView):
     """Detalle de una reservación"""
     model = Booking
     template_name = 'bookings/booking_detail.html'
@@ -56,10 +83,11 @@ class BookingDetailView(LoginRequiredMixin, DetailView):
     slug_url_kwarg = 'booking_id'
     
     def get_queryset(self):
+        # La plantilla consulta booking.review para ofrecer dejar una reseña
         return Booking.objects.filter(
             user=self.request.user
         ).select_related(
-            'hotel', 'room__room_type', 'coupon'
+            'hotel', 'room__room_type', 'coupon', 'review'
         ).prefetch_related(
             'room__room_type__amenities'
         )
@@ -81,10 +109,11 @@ class BookingCreateView(LoginRequiredMixin, CreateView):
             try:
                 room = Room.objects.get(id=room_id)
                 initial['room'] = room
-                initial['hotel'] = room.room_type.rooms.first().room_type.rooms.first() if hasattr(room, 'hotel') else None
             except Room.DoesNotExist:
                 pass
         
+        initial['hotel'] = catalog.main_hotel()
+        
         check_in = self.request.GET.get('check_in')
         check_out = self.request.GET.get('check_out')
         if check_in:
@@ -187,10 +216,15 @@ class ValidateCouponView(LoginRequiredMixin, View):
             })
 
 
-class BookingInvoiceView(LoginRequiredMixin, DetailView):
-    """Generar factura/comprobante de reservación"""
+class BookingInvoiceView(LoginRequiredMixin, ConditionalGetMixin, ArchivedBookingFallbackMixin, DetailView):
+    """
+    Factura de la reservación en HTML o PDF (?format=pdf).
+    
+    Se entrega el documento ya renderizado (bookings/invoices.py); el ETag es
+    el hash de los datos de la factura, así que abrirla de nuevo cuesta una
+    consulta y un 304.
+    """
     model = Booking
-    template_name = 'bookings/booking_invoice.html'
     context_object_name = 'booking'
     slug_field = 'booking_id'
     slug_url_kwarg = 'booking_id'
@@ -200,4 +234,21 @@ class BookingInvoiceView(LoginRequiredMixin, DetailView):
             user=self.request.user
         ).select_related(
             'hotel', 'room__room_type', 'coupon', 'user'
-        )
\ No newline at end of file
+        )
+    
+    def get_format(self):
+        return 'pdf' if self.request.GET.get('format') == 'pdf' else 'html'
+    
+    def get_etag(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        return f'{invoice_digest(self.object)}-{self.get_format()}'
+    
+    def get(self, request, *args, **kwargs):
+        booking = getattr(self, 'object', None) or self.get_object()
+        extension = self.get_format()
+        response = FileResponse(open_invoice(booking, extension), content_type=INVOICE_FORMATS[extension])
+        if extension == 'pdf':
+            response['Content-Disposition'] = f'inline; filename="{booking.invoice_id}.pdf"'
+        # Privada, y el navegador revalida con el ETag en lugar de mostrar una versión vieja
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
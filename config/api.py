@@ -0,0 +1,256 @@
+# config/api.py
+"""
+Infraestructura de la API JSON versionada (/api/v1/, ver config/api_urls.py).
+
+- Serialización: orjson si está instalado, con respaldo en json +
+  DjangoJSONEncoder. Los Decimal se envían como cadena para no perder
+  precisión; fechas y UUID en ISO/texto.
+- Los listados leen filas con `.values()` (diccionarios, sin instancias de
+  modelo) y solo las columnas pedidas: `?fields=id,name` (campos dispersos).
+- Peticiones bulk: POST con {"items": [...]} (hasta API_MAX_BULK_ITEMS); cada
+  elemento se responde en el mismo orden, con su propio error si falla.
+- Errores: ApiError → {"error": {"message": ..., "details": ...}} con su status.
+- Vistas async (disponibilidad, cotizaciones, reseñas): ApiView con
+  handlers `async def` y AsyncBulkApiView; bajo ASGI no ocupan un hilo
+  mientras esperan a Redis o a la base de datos.
+
+Los POST de la API solo calculan (disponibilidad, cotizaciones) y no cambian
+datos, por eso las vistas están exentas de CSRF.
+"""
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+
+from .pagination import KeysetPaginator
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - respaldo sin la dependencia opcional
+    orjson = None
+
+API_VERSION = 'v1'
+
+
+class ApiError(Exception):
+    """Error de la API con status HTTP y detalles opcionales"""
+
+    def __init__(self, message, status=400, details=None):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.details = details
+
+    def as_dict(self):
+        error = {'message': self.message}
+        if self.details is not None:
+            error['details'] = self.details
+        return {'error': error}
+
+
+def encode_default(value):
+    """Tipos que orjson no serializa por sí mismo"""
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f'{type(value).__name__} no es serializable')
+
+
+def dumps(data):
+    if orjson is not None:
+        return orjson.dumps(data, default=encode_default)
+    return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False).encode()
+
+
+def json_response(data, status=200):
+    response = HttpResponse(dumps(data), status=status, content_type='application/json')
+    response['API-Version'] = API_VERSION
+    return response
+
+
+def parse_fields(request, allowed, default=None):
+    """Campos pedidos con ?fields=a,b (en el orden de `allowed`); error si alguno no existe"""
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(default or allowed)
+    requested = {name.strip() for name in raw.split(',') if name.strip()}
+    unknown = requested - set(allowed)
+    if unknown:
+        raise ApiError('Campos desconocidos', details={'fields': sorted(unknown), 'allowed': list(allowed)})
+    return [name for name in allowed if name in requested]
+
+
+def parse_ids(value, name='ids'):
+    """Lista de enteros desde '1,2,3', un entero o una lista JSON"""
+    if value in (None, ''):
+        return []
+    if isinstance(value, int):
+        return [value]
+    items = value.split(',') if isinstance(value, str) else value
+    try:
+        return [int(item) for item in items]
+    except (TypeError, ValueError):
+        raise ApiError(f'"{name}" debe ser una lista de enteros')
+
+
+def parse_int(value, name, default=None, minimum=1):
+    if value in (None, ''):
+        return default
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ApiError(f'"{name}" debe ser un entero')
+    if number < minimum:
+        raise ApiError(f'"{name}" debe ser al menos {minimum}')
+    return number
+
+
+def parse_date(value, name):
+    try:
+        return datetime.strptime(str(value), '%Y-%m-%d').date()
+    except ValueError:
+        raise ApiError(f'"{name}" debe tener el formato AAAA-MM-DD')
+
+
+def parse_stay(data):
+    """(check_in, check_out) validados desde un dict con esas llaves"""
+    if not data.get('check_in') or not data.get('check_out'):
+        raise ApiError('Se requieren "check_in" y "check_out"')
+    check_in = parse_date(data['check_in'], 'check_in')
+    check_out = parse_date(data['check_out'], 'check_out')
+    if check_out <= check_in:
+        raise ApiError('"check_out" debe ser posterior a "check_in"')
+    return check_in, check_out
+
+
+def read_json(request):
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        raise ApiError('El cuerpo de la petición no es JSON válido')
+    if not isinstance(data, dict):
+        raise ApiError('El cuerpo debe ser un objeto JSON')
+    return data
+
+
+def read_bulk_items(request):
+    """Lista validada de {"items": [...]} del cuerpo de un POST bulk"""
+    items = read_json(request).get('items')
+    if not isinstance(items, list) or not items:
+        raise ApiError('Se requiere "items": una lista de elementos')
+    if len(items) > settings.API_MAX_BULK_ITEMS:
+        raise ApiError(f'Máximo {settings.API_MAX_BULK_ITEMS} elementos por petición')
+    if not all(isinstance(item, dict) for item in items):
+        raise ApiError('Cada elemento de "items" debe ser un objeto')
+    return items
+
+
+def single_result(result):
+    if isinstance(result, ApiError):
+        raise result
+    return json_response(result)
+
+
+def bulk_response(results):
+    return json_response({'results': [
+        result.as_dict() if isinstance(result, ApiError) else result
+        for result in results
+    ]})
+
+
+def project(rows, fields):
+    """Recorta filas de `.values()` a los campos pedidos"""
+    return [{field: row[field] for field in fields} for row in rows]
+
+
+class ApiView(View):
+    """Vista base: respuestas JSON y errores uniformes"""
+    http_method_names = ['get', 'post', 'head', 'options']
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # En la vista final y no en dispatch(): los mixins redefinen dispatch()
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.view_is_async:
+            return self.api_adispatch(request, *args, **kwargs)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except ApiError as error:
+            return json_response(error.as_dict(), status=error.status)
+
+    async def api_adispatch(self, request, *args, **kwargs):
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        except ApiError as error:
+            return json_response(error.as_dict(), status=error.status)
+
+    def http_method_not_allowed(self, request, *args, **kwargs):
+        response = json_response(ApiError('Método no permitido', 405).as_dict(), status=405)
+        response['Allow'] = ', '.join(self._allowed_methods())
+        if self.view_is_async:
+            async def func():
+                return response
+            return func()
+        return response
+
+
+class BulkApiView(ApiView):
+    """
+    Un elemento por GET (parámetros de la URL) o varios por POST
+    ({"items": [...]}). Las subclases implementan `process_items(items)`,
+    que recibe todos los elementos para resolverlos con pocas consultas y
+    retorna un resultado por elemento (dict, o ApiError si ese elemento falló).
+    """
+
+    def get(self, request, *args, **kwargs):
+        return single_result(self.process_items([request.GET.dict()])[0])
+
+    def post(self, request, *args, **kwargs):
+        return bulk_response(self.process_items(read_bulk_items(request)))
+
+
+class AsyncBulkApiView(ApiView):
+    """BulkApiView async: las subclases implementan `async process_items(items)`"""
+
+    async def get(self, request, *args, **kwargs):
+        return single_result((await self.process_items([request.GET.dict()]))[0])
+
+    async def post(self, request, *args, **kwargs):
+        return bulk_response(await self.process_items(read_bulk_items(request)))
+
+
+class ApiLoginRequiredMixin(LoginRequiredMixin):
+    """Sesión obligatoria; sin ella responde 401 en JSON en lugar de redirigir"""
+
+    def handle_no_permission(self):
+        return json_response(ApiError('Autenticación requerida', 401).as_dict(), status=401)
+
+
+def paginated_response(request, queryset, fields, transform=None, per_page=None):
+    """Página con cursor (KeysetPaginator) de filas `.values()`, recortada a `fields`"""
+    paginator = KeysetPaginator(queryset, per_page or settings.API_PAGE_SIZE)
+    page = paginator.page(request.GET.get('cursor'))
+    return page_response(page, fields, transform)
+
+
+async def apaginated_response(request, queryset, fields, transform=None):
+    paginator = KeysetPaginator(queryset, settings.API_PAGE_SIZE)
+    page = await sync_to_async(paginator.page)(request.GET.get('cursor'))
+    return page_response(page, fields, transform)
+
+
+def page_response(page, fields, transform=None):
+    rows = transform(page.object_list) if transform else page.object_list
+    return json_response({
+        'results': project(rows, fields),
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    })
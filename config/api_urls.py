@@ -0,0 +1,21 @@
+# config/api_urls.py
+"""Rutas de la API JSON, versión 1 (se incluyen bajo /api/v1/)"""
+from django.urls import path
+
+from bookings import api as bookings_api
+from reviews import api as reviews_api
+from rooms import api as rooms_api
+
+app_name = 'api_v1'
+
+urlpatterns = [
+    path('room-types/', rooms_api.RoomTypeListApi.as_view(), name='room_types'),
+    path('room-types/<int:pk>/', rooms_api.RoomTypeDetailApi.as_view(), name='room_type_detail'),
+    path('availability/', rooms_api.AvailabilityApi.as_view(), name='availability'),
+    path('availability/stream/', rooms_api.AvailabilityStreamApi.as_view(), name='availability_stream'),
+    path('quotes/', rooms_api.QuoteApi.as_view(), name='quotes'),
+    path('gallery/', rooms_api.GalleryApi.as_view(), name='gallery'),
+    path('bookings/', bookings_api.BookingListApi.as_view(), name='bookings'),
+    path('bookings/<uuid:booking_id>/', bookings_api.BookingDetailApi.as_view(), name='booking_detail'),
+    path('reviews/', reviews_api.ReviewListApi.as_view(), name='reviews'),
+]
@@ -12,5 +12,9 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Bajo ASGI el ORM de cada request corre en su propio hilo: una conexión
+# persistente quedaría abierta por hilo hasta agotar max_connections. Para
+# reutilizar conexiones, usar un pooler (PgBouncer) delante de PostgreSQL.
+os.environ.setdefault('CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
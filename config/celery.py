@@ -1,7 +1,11 @@
 # celery.py
+import os
+
 from celery import Celery
 from celery.schedules import crontab
 
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
 app = Celery('hotel_yunuen')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks()
@@ -20,4 +24,24 @@ app.conf.beat_schedule = {
         'task': 'reviews.tasks.refresh_all_statistics',
         'schedule': crontab(day_of_week=1, hour=2, minute=0),  # Lunes 2 AM
     },
+    'queue-booking-reminders': {
+        'task': 'bookings.tasks.queue_booking_reminders',
+        'schedule': crontab(hour=9, minute=0),  # Diario a las 9 AM
+    },
+    'archive-old-bookings': {
+        'task': 'bookings.tasks.archive_old_bookings',
+        'schedule': crontab(day_of_week=0, hour=3, minute=0),  # Domingo 3 AM
+    },
+    'sync-external-calendars': {
+        'task': 'rooms.tasks.sync_external_calendars',
+        'schedule': crontab(minute='*/15'),  # Bloqueos de Airbnb, Booking.com, etc.
+    },
+    'push-channel-ari': {
+        'task': 'rooms.tasks.push_channel_ari',
+        'schedule': crontab(minute='*/15'),  # Red de seguridad y noche nueva del horizonte
+    },
+    'deliver-email-outbox': {
+        'task': 'bookings.tasks.deliver_email_outbox',
+        'schedule': crontab(minute='*'),  # Red de seguridad si el broker falló al encolar
+    },
 }
\ No newline at end of file
@@ -0,0 +1,65 @@
+# config/conditional.py
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.views.decorators.http import condition
+
+
+def make_etag(*parts):
+    """ETag a partir de valores baratos (versiones de cache, ids), sin renderizar"""
+    return hashlib.md5(':'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def user_etag_part(request):
+    """Las páginas HTML muestran el usuario en la barra de navegación"""
+    user = getattr(request, 'user', None)
+    return user.pk if user is not None and user.is_authenticated else 'anon'
+
+
+class ConditionalGetMixin:
+    """
+    Agrega ETag/Last-Modified y responde 304 antes de ejecutar la vista.
+
+    Las subclases implementan `get_etag()` y/o `get_last_modified()`, que
+    reciben los mismos argumentos que `get()` y no deben renderizar nada.
+    Las vistas async pueden implementar `aget_etag()` / `aget_last_modified()`
+    para leer las versiones sin bloquear el event loop.
+    """
+    
+    def get_etag(self, request, *args, **kwargs):
+        return None
+    
+    def get_last_modified(self, request, *args, **kwargs):
+        return None
+    
+    async def aget_etag(self, request, *args, **kwargs):
+        return await sync_to_async(self.get_etag)(request, *args, **kwargs)
+    
+    async def aget_last_modified(self, request, *args, **kwargs):
+        return await sync_to_async(self.get_last_modified)(request, *args, **kwargs)
+    
+    def dispatch(self, request, *args, **kwargs):
+        # Los mensajes pendientes solo se consumen al renderizar
+        if CookieStorage.cookie_name in request.COOKIES:
+            return super().dispatch(request, *args, **kwargs)
+        if self.view_is_async:
+            return self.conditional_adispatch(request, *args, **kwargs)
+        
+        view = condition(
+            etag_func=self.get_etag,
+            last_modified_func=self.get_last_modified
+        )(super().dispatch)
+        return view(request, *args, **kwargs)
+    
+    async def conditional_adispatch(self, request, *args, **kwargs):
+        # condition() llama a sus funciones de forma síncrona: se resuelven antes
+        etag = await self.aget_etag(request, *args, **kwargs)
+        last_modified = await self.aget_last_modified(request, *args, **kwargs)
+        dispatch = super().dispatch
+        
+        @condition(etag_func=lambda *a, **k: etag, last_modified_func=lambda *a, **k: last_modified)
+        async def view(request, *args, **kwargs):
+            return await dispatch(request, *args, **kwargs)
+        
+        return await view(request, *args, **kwargs)
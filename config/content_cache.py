@@ -0,0 +1,162 @@
+# config/content_cache.py
+import hashlib
+import time
+from functools import partial
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.db import transaction
+
+CONTENT_VERSION_KEY = 'content-version'
+AVAILABILITY_VERSION_KEY = 'availability-version'
+
+
+def get_version(key):
+    """Lee un contador de versión de Redis, sembrándolo si no existe"""
+    version = cache.get(key)
+    if version is None:
+        # Sembrar con la hora evita reutilizar versiones si Redis pierde la llave
+        cache.add(key, int(time.time()), None)
+        version = cache.get(key) or int(time.time())
+    return version
+
+
+def in_cache_pool(func, *args):
+    """
+    Corre una llamada síncrona a la cache en el pool de hilos, no en el hilo
+    del request: así corre en paralelo con las consultas del ORM async, que
+    Django ejecuta una tras otra en ese hilo. El cliente de Redis es seguro
+    entre hilos; no usar para nada que toque la base de datos.
+    """
+    return sync_to_async(func, thread_sensitive=False)(*args)
+
+
+async def aget_version(key):
+    return await in_cache_pool(get_version, key)
+
+
+def bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, int(time.time()), None)
+
+
+def bump_on_commit(key):
+    """
+    Sube la versión al confirmar la transacción (de inmediato si no hay una).
+    Antes, otro worker podría volver a llenar la cache con los datos sin
+    confirmar bajo la versión nueva, y quedarían viejos todo el TTL.
+    """
+    transaction.on_commit(partial(bump_version, key))
+
+
+def get_content_version(request=None):
+    """Versión actual del contenido público; se memoriza en el request"""
+    if request is not None and hasattr(request, '_content_version'):
+        return request._content_version
+
+    version = get_version(CONTENT_VERSION_KEY)
+    if request is not None:
+        request._content_version = version
+    return version
+
+
+async def aget_content_version(request=None):
+    if request is not None and hasattr(request, '_content_version'):
+        return request._content_version
+
+    version = await aget_version(CONTENT_VERSION_KEY)
+    if request is not None:
+        request._content_version = version
+    return version
+
+
+def bump_content_version(**kwargs):
+    """Invalida todas las páginas y fragmentos cacheados (se usa como receptor de señales)"""
+    bump_on_commit(CONTENT_VERSION_KEY)
+
+
+def get_availability_version():
+    """Versión de la disponibilidad; cambia con cada reserva o cambio de estado de habitación"""
+    return get_version(AVAILABILITY_VERSION_KEY)
+
+
+async def aget_availability_version():
+    return await aget_version(AVAILABILITY_VERSION_KEY)
+
+
+def bump_availability_version(**kwargs):
+    bump_on_commit(AVAILABILITY_VERSION_KEY)
+
+
+def is_page_cacheable(request):
+    """Solo visitantes sin sesión ni mensajes pendientes reciben la página completa cacheada"""
+    return (
+        request.method in ('GET', 'HEAD')
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and CookieStorage.cookie_name not in request.COOKIES
+    )
+
+
+def page_cache_key(request, version=None, params=()):
+    """
+    Llave de la página: la URL sin query string más solo los parámetros que
+    la vista lee (`params`). Con la query completa, `?x=<aleatorio>` llenaría
+    la cache compartida con copias de la misma página.
+    """
+    query = urlencode(sorted((name, value) for name in params for value in request.GET.getlist(name)))
+    url = hashlib.md5(f'{request.build_absolute_uri(request.path)}?{query}'.encode()).hexdigest()
+    if version is None:
+        version = get_content_version(request)
+    return f'page:{version}:{request.method}:{url}'
+
+
+class VersionedPageCacheMixin:
+    """
+    Cachea en Redis la respuesta completa para visitantes anónimos.
+
+    La llave incluye la versión del contenido, así que basta con
+    `bump_content_version()` para invalidar todas las páginas a la vez.
+    Los parámetros GET que cambian la página se declaran en
+    `page_cache_params`; los demás se ignoran. Funciona con vistas síncronas
+    y async.
+    """
+    page_cache_timeout = None
+    page_cache_params = ()
+
+    def dispatch(self, request, *args, **kwargs):
+        if not is_page_cacheable(request):
+            return super().dispatch(request, *args, **kwargs)
+        if self.view_is_async:
+            return self.cached_adispatch(request, *args, **kwargs)
+
+        key = page_cache_key(request, params=self.page_cache_params)
+        response = cache.get(key)
+        if response is not None:
+            return response
+
+        return self.store_page(request, key, super().dispatch(request, *args, **kwargs))
+
+    async def cached_adispatch(self, request, *args, **kwargs):
+        key = page_cache_key(request, await aget_content_version(request), self.page_cache_params)
+        response = await in_cache_pool(cache.get, key)
+        if response is not None:
+            return response
+
+        return self.store_page(request, key, await super().dispatch(request, *args, **kwargs))
+
+    def store_page(self, request, key, response):
+        if response.status_code == 200 and hasattr(response, 'add_post_render_callback'):
+            timeout = self.page_cache_timeout or settings.PAGE_CACHE_TIMEOUT
+
+            def store(rendered):
+                # Una página que generó cookie CSRF o de sesión no se comparte
+                if not rendered.cookies and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE'):
+                    cache.set(key, rendered, timeout)
+
+            response.add_post_render_callback(store)
+        return response
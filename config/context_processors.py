@@ -0,0 +1,13 @@
+# config/context_processors.py
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+from .content_cache import get_content_version
+
+
+def content_cache(request):
+    """Expone la versión del contenido para las etiquetas {% cache %} de las plantillas"""
+    return {
+        'content_version': SimpleLazyObject(lambda: get_content_version(request)),
+        'page_cache_timeout': settings.PAGE_CACHE_TIMEOUT,
+    }
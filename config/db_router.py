@@ -0,0 +1,95 @@
+# config/db_router.py
+import contextvars
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+# Activo solo mientras se atiende una vista de lectura marcada con `use_read_replica`
+_read_from_replica = contextvars.ContextVar('read_from_replica', default=False)
+
+PRIMARY_PIN_COOKIE = 'db_primary_until'
+
+
+class ReplicaRouter:
+    """Envía las lecturas de vistas de solo lectura a las réplicas y todo lo demás a `default`"""
+
+    def db_for_read(self, model, **hints):
+        if _read_from_replica.get() and settings.DATABASE_REPLICAS:
+            return random.choice(settings.DATABASE_REPLICAS)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primaria y réplicas contienen los mismos datos
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Marca las peticiones GET a vistas con `use_read_replica = True` para leer de réplicas.
+
+    Después de cualquier petición que escribe (p. ej. crear una reserva) el
+    cliente queda fijado a la primaria durante DATABASE_PRIMARY_PIN_SECONDS
+    mediante una cookie, para que vea sus propias escrituras aunque la
+    réplica tenga retraso.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _read_from_replica.set(False)
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_from_replica.reset(token)
+        return self.pin_after_write(request, response)
+
+    async def __acall__(self, request):
+        token = _read_from_replica.set(False)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _read_from_replica.reset(token)
+        return self.pin_after_write(request, response)
+
+    def pin_after_write(self, request, response):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS') and settings.DATABASE_REPLICAS:
+            seconds = settings.DATABASE_PRIMARY_PIN_SECONDS
+            response.set_cookie(
+                PRIMARY_PIN_COOKIE,
+                str(int(time.time()) + seconds),
+                max_age=seconds,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view = getattr(view_func, 'view_class', view_func)
+        if (
+            request.method in ('GET', 'HEAD')
+            and getattr(view, 'use_read_replica', False)
+            and not self.is_pinned_to_primary(request)
+        ):
+            _read_from_replica.set(True)
+
+    def is_pinned_to_primary(self, request):
+        try:
+            return int(request.COOKIES.get(PRIMARY_PIN_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
@@ -0,0 +1,171 @@
+# config/events.py
+"""
+Pub/sub para empujar eventos a conexiones abiertas (Server-Sent Events).
+
+- EVENT_BROKER = 'redis': `publish()` hace PUBLISH en Redis y cada proceso
+  abre una sola suscripción (PSUBSCRIBE) por event loop, que reparte los
+  mensajes a sus suscriptores locales. Mil navegadores conectados a un worker
+  son mil colas en memoria, no mil conexiones a Redis.
+- EVENT_BROKER = 'memory': todo dentro del proceso; para pruebas y para
+  desarrollo sin Redis.
+
+`publish()` se llama desde código síncrono (señales, on_commit); los
+suscriptores son corrutinas con `async with subscribe(canal) as cola`.
+"""
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from functools import cache
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+logger = logging.getLogger(__name__)
+
+# Mensajes pendientes por suscriptor; si se llena se descarta el más viejo
+QUEUE_SIZE = 32
+
+
+def offer(queue, message):
+    """Encola sin bloquear: un suscriptor lento pierde mensajes viejos, no frena a los demás"""
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(message)
+
+
+class MemoryBroker:
+    """Broker dentro del proceso (pruebas y desarrollo)"""
+
+    def __init__(self):
+        # canal → {(event loop, cola)}
+        self.subscribers = defaultdict(set)
+
+    def publish(self, channel, message):
+        self.dispatch(channel, message)
+
+    def dispatch(self, channel, message, loop=None):
+        """Entrega a los suscriptores del canal (solo los de `loop` si se indica); seguro entre hilos"""
+        for subscriber_loop, queue in list(self.subscribers.get(channel, ())):
+            if loop is not None and subscriber_loop is not loop:
+                continue
+            try:
+                subscriber_loop.call_soon_threadsafe(offer, queue, message)
+            except RuntimeError:
+                # El event loop del suscriptor ya se cerró
+                pass
+
+    async def start(self):
+        """Prepara la recepción en el event loop actual"""
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        await self.start()
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(maxsize=QUEUE_SIZE))
+        self.subscribers[channel].add(subscriber)
+        try:
+            yield subscriber[1]
+        finally:
+            self.subscribers[channel].discard(subscriber)
+            if not self.subscribers[channel]:
+                del self.subscribers[channel]
+
+
+class RedisBroker(MemoryBroker):
+    """Publica en Redis; un listener por event loop reparte a los suscriptores locales"""
+
+    def __init__(self, url, prefix='events:'):
+        super().__init__()
+        self.url = url
+        self.prefix = prefix
+        self.listeners = {}
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            import redis
+
+            # Timeouts cortos: publicar nunca debe frenar el commit de una reserva
+            self._client = redis.Redis.from_url(self.url, socket_connect_timeout=1, socket_timeout=1)
+        return self._client
+
+    def publish(self, channel, message):
+        self.client.publish(self.prefix + channel, json.dumps(message, cls=DjangoJSONEncoder))
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        for closed in [other for other in self.listeners if other.is_closed()]:
+            del self.listeners[closed]
+        listener = self.listeners.get(loop)
+        if listener is None or listener[0].done():
+            ready = asyncio.Event()
+            listener = self.listeners[loop] = (loop.create_task(self.listen(loop, ready)), ready)
+        try:
+            # Suscrito antes de responder: no se pierden eventos publicados justo después
+            await asyncio.wait_for(listener[1].wait(), timeout=2)
+        except TimeoutError:
+            logger.warning('Redis no respondió; los eventos llegarán cuando se reconecte')
+
+    async def listen(self, loop, ready):
+        import redis.asyncio as aioredis
+
+        delay = 1
+        while True:
+            client = aioredis.Redis.from_url(self.url)
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.psubscribe(f'{self.prefix}*')
+                    ready.set()
+                    delay = 1
+                    async for item in pubsub.listen():
+                        if item['type'] != 'pmessage':
+                            continue
+                        channel = item['channel'].decode()[len(self.prefix):]
+                        self.dispatch(channel, json.loads(item['data']), loop)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning('Se perdió la suscripción a Redis; reintentando en %ss', delay, exc_info=True)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+            finally:
+                await client.aclose()
+
+
+@cache
+def load_broker(name, url):
+    if name == 'memory':
+        return MemoryBroker()
+    return RedisBroker(url)
+
+
+def get_broker():
+    return load_broker(settings.EVENT_BROKER, settings.EVENT_BROKER_URL)
+
+
+def publish(channel, message):
+    """Publica un evento; si el broker no responde se registra y se sigue (los clientes tienen el snapshot)"""
+    try:
+        get_broker().publish(channel, message)
+    except Exception:
+        logger.warning('No se pudo publicar el evento en %s', channel, exc_info=True)
+
+
+def subscribe(channel):
+    return get_broker().subscribe(channel)
+
+
+def format_sse(data=None, event=None, id=None, retry=None):
+    """Un mensaje Server-Sent Events; sin datos es un comentario keep-alive"""
+    lines = []
+    if retry is not None:
+        lines.append(f'retry: {retry}')
+    if id is not None:
+        lines.append(f'id: {id}')
+    if event is not None:
+        lines.append(f'event: {event}')
+    if data is not None:
+        lines.append(f'data: {json.dumps(data, cls=DjangoJSONEncoder)}')
+    return ('\n'.join(lines) or ':') + '\n\n'
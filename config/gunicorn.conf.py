@@ -0,0 +1,65 @@
+# config/gunicorn.conf.py
+"""
+Perfil de producción de gunicorn (ver bin/start-web).
+
+- WEB_INTERFACE=wsgi (default): workers gthread sobre config.wsgi con
+  conexiones persistentes; es el más rápido para las páginas y la API.
+  WEB_INTERFACE=asgi: workers de uvicorn sobre config.asgi, para conexiones
+  largas; conviene con DATABASE_POOLER=psycopg (cada request abre su conexión).
+- preload_app: Django se carga una vez en el proceso maestro y los workers
+  lo heredan con fork (arranque rápido, memoria compartida). El catálogo se
+  precarga en el maestro (`when_ready`), así cada worker nace con el LRU lleno.
+- Reciclaje gradual: cada worker se reemplaza después de `max_requests`
+  peticiones (con jitter para que no se reinicien todos a la vez) y tiene
+  `graceful_timeout` segundos para terminar las que tenga en curso.
+
+Variables de entorno: PORT, WEB_INTERFACE, WEB_CONCURRENCY, GUNICORN_THREADS,
+GUNICORN_MAX_REQUESTS, GUNICORN_TIMEOUT, GUNICORN_ACCESS_LOG, FORWARDED_ALLOW_IPS.
+"""
+import multiprocessing
+import os
+
+interface = os.environ.get('WEB_INTERFACE', 'wsgi')
+if interface == 'asgi':
+    wsgi_app = 'config.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    wsgi_app = 'config.wsgi:application'
+    worker_class = 'gthread'
+    threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+preload_app = True
+
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = max_requests // 10
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+
+# El latido de los workers en disco puede bloquearlos en algunos contenedores
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+forwarded_allow_ips = os.environ.get('FORWARDED_ALLOW_IPS', '127.0.0.1')
+# La plataforma (o el proxy) ya registra cada petición; GUNICORN_ACCESS_LOG=- las escribe a stdout
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG')
+errorlog = '-'
+
+
+def when_ready(server):
+    from django.db import connections
+    from rooms import catalog
+
+    room_types, amenities, hotels = catalog.warm()
+    server.log.info(
+        'Catálogo precargado: %s tipos, %s comodidades, %s hoteles',
+        len(room_types), len(amenities), len(hotels)
+    )
+    # Una conexión abierta en el maestro no debe compartirse entre workers. Con
+    # DATABASE_POOLER=psycopg close() solo la devuelve al pool de la clase, que
+    # sigue abierto con sus hilos: los workers heredarían el socket y un pool
+    # sin hilos. Se cierra el pool y cada worker crea el suyo.
+    for connection in connections.all(initialized_only=True):
+        connection.close()
+        if hasattr(connection, 'close_pool'):
+            connection.close_pool()
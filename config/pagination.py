@@ -0,0 +1,223 @@
+# config/pagination.py
+"""
+Paginación por llave (keyset) para listados largos.
+
+En lugar de OFFSET + COUNT(*) cada página filtra "después de la última fila
+vista" según los campos de orden del queryset, con `id` como desempate. El
+costo de la página 1000 es el mismo que el de la página 1.
+
+Los cursores son opacos y firmados: guardan el segmento, los valores de los
+campos de orden y la dirección. Un cursor inválido regresa a la primera página.
+
+Para el admin, EstimatedCountPaginator evita el COUNT(*) de tablas grandes.
+"""
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.http import QueryDict
+from django.utils.functional import cached_property
+
+CURSOR_PARAM = 'cursor'
+CURSOR_SALT = 'config.pagination'
+
+# Por debajo de este número de filas se cuenta exacto: COUNT(*) ya es barato
+ESTIMATED_COUNT_MIN = 10000
+
+
+def ordering_keys(queryset):
+    """Campos de orden del queryset (de modelo o anotaciones) con `id` como desempate final"""
+    keys = []
+    for key in queryset.query.order_by or queryset.model._meta.ordering:
+        if not isinstance(key, str):
+            raise ValueError('La paginación keyset solo admite ordenar por nombres de campo')
+        keys.append({'pk': 'id', '-pk': '-id'}.get(key, key))
+
+    if not any(key.lstrip('-') == 'id' for key in keys):
+        keys.append('-id' if keys and keys[-1].startswith('-') else 'id')
+    return keys
+
+
+def key_field(queryset, name):
+    """Campo del modelo o de la anotación (p. ej. un rango de búsqueda) usado para ordenar"""
+    try:
+        return queryset.model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return queryset.query.annotations[name].output_field
+
+
+def serialize_value(value):
+    """Valor JSON que `Field.to_python` puede reconstruir sin perder precisión"""
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if isinstance(value, (int, float, str)) or value is None:
+        return value
+    return str(value)
+
+
+def reverse_keys(keys):
+    return [key[1:] if key.startswith('-') else f'-{key}' for key in keys]
+
+
+def keyset_filter(keys, values):
+    """Condición para las filas que van después de `values` en el orden `keys`"""
+    condition = Q()
+    equal = Q()
+    for key, value in zip(keys, values):
+        name = key.lstrip('-')
+        lookup = 'lt' if key.startswith('-') else 'gt'
+        condition |= equal & Q(**{f'{name}__{lookup}': value})
+        equal &= Q(**{name: value})
+    return condition
+
+
+class KeysetPage:
+    """Página con cursores a la siguiente y anterior; sin número de página ni total"""
+
+    def __init__(self, object_list, next_cursor, previous_cursor, params=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.params = params
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def querystring(self, cursor):
+        """Query string actual (filtros y orden incluidos) con otro cursor"""
+        params = self.params.copy() if self.params is not None else QueryDict(mutable=True)
+        params.pop('page', None)
+        params[CURSOR_PARAM] = cursor
+        return f'?{params.urlencode()}'
+
+    @property
+    def next_querystring(self):
+        return self.querystring(self.next_cursor) if self.has_next() else None
+
+    @property
+    def previous_querystring(self):
+        return self.querystring(self.previous_cursor) if self.has_previous() else None
+
+
+class KeysetPaginator:
+    """
+    Pagina uno o varios querysets encadenados con el mismo orden.
+
+    `object_list` puede ser un queryset o cualquier objeto con un atributo
+    `querysets` (p. ej. el historial de reservas vigentes + archivadas).
+    """
+
+    def __init__(self, object_list, per_page):
+        self.querysets = list(getattr(object_list, 'querysets', [object_list]))
+        self.per_page = int(per_page)
+        self.keys = ordering_keys(self.querysets[0])
+        self.fields = [
+            [key_field(qs, key.lstrip('-')) for key in self.keys]
+            for qs in self.querysets
+        ]
+
+    def encode_cursor(self, segment, obj, direction):
+        # Instancias de modelo o filas de `.values()` (que deben incluir los campos de orden)
+        get = obj.__getitem__ if isinstance(obj, dict) else obj.__getattribute__
+        values = [serialize_value(get(key.lstrip('-'))) for key in self.keys]
+        return signing.dumps({'s': segment, 'v': values, 'd': direction}, salt=CURSOR_SALT, compress=True)
+
+    def decode_cursor(self, cursor):
+        """Retorna (segmento, valores, dirección) o None si el cursor no es válido"""
+        try:
+            data = signing.loads(cursor, salt=CURSOR_SALT)
+            segment = int(data['s'])
+            fields = self.fields[segment]
+            values = [field.to_python(value) for field, value in zip(fields, data['v'], strict=True)]
+            return segment, values, data['d']
+        except (signing.BadSignature, KeyError, IndexError, TypeError, ValueError, ValidationError):
+            return None
+
+    def fetch(self, segments, keys, start_values):
+        """Hasta per_page + 1 filas recorriendo `segments` a partir de los valores dados"""
+        rows = []
+        for position, segment in enumerate(segments):
+            queryset = self.querysets[segment].order_by(*keys)
+            if position == 0 and start_values is not None:
+                queryset = queryset.filter(keyset_filter(keys, start_values))
+            needed = self.per_page + 1 - len(rows)
+            rows.extend((segment, obj) for obj in queryset[:needed])
+            if len(rows) > self.per_page:
+                break
+        return rows
+
+    def page(self, cursor=None, params=None):
+        decoded = self.decode_cursor(cursor) if cursor else None
+
+        if decoded is not None and decoded[2] == 'prev':
+            segment, values, _ = decoded
+            rows = self.fetch(range(segment, -1, -1), reverse_keys(self.keys), values)
+            if len(rows) <= self.per_page:
+                # Se alcanzó el inicio: mostrar la primera página completa
+                return self.page(params=params)
+            rows = rows[:self.per_page]
+            rows.reverse()
+            return self.build_page(rows, has_next=True, has_previous=True, params=params)
+
+        segment, values = (decoded[0], decoded[1]) if decoded else (0, None)
+        rows = self.fetch(range(segment, len(self.querysets)), self.keys, values)
+        has_next = len(rows) > self.per_page
+        return self.build_page(
+            rows[:self.per_page], has_next=has_next, has_previous=values is not None, params=params
+        )
+
+    def build_page(self, rows, has_next, has_previous, params):
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = self.encode_cursor(*rows[-1], 'next')
+        if rows and has_previous:
+            previous_cursor = self.encode_cursor(*rows[0], 'prev')
+        return KeysetPage([obj for _, obj in rows], next_cursor, previous_cursor, params)
+
+
+class KeysetPaginationMixin:
+    """Reemplaza el paginador OFFSET de ListView; la plantilla usa page_obj.next_querystring"""
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = KeysetPaginator(queryset, page_size)
+        page = paginator.page(self.request.GET.get(CURSOR_PARAM), params=self.request.GET)
+        return paginator, page, page.object_list, page.has_other_pages()
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginador del admin para tablas grandes. Sin filtros y en PostgreSQL toma
+    el total estimado de pg_class (lo mantiene ANALYZE/autovacuum) en lugar de
+    recorrer la tabla con COUNT(*); con filtros o en otros motores cuenta exacto.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if not queryset.query.where and connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                    [queryset.model._meta.db_table]
+                )
+                row = cursor.fetchone()
+            if row and row[0] >= ESTIMATED_COUNT_MIN:
+                return row[0]
+        return super().count
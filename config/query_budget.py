@@ -0,0 +1,185 @@
+# config/query_budget.py
+"""
+Presupuesto de consultas SQL por petición.
+
+QueryBudgetMiddleware envuelve todas las conexiones con `execute_wrapper`
+(funciona también con DEBUG=False), cuenta consultas, tiempo de SQL y
+sentencias repetidas, agrega un encabezado Server-Timing y registra en el
+log las peticiones que exceden el presupuesto. Una vista puede declarar su
+propio límite con el atributo `query_budget`.
+
+Las respuestas en streaming ejecutan consultas después de salir del
+middleware; esas no se cuentan. Bajo ASGI el contador se instala en el hilo
+donde Django ejecuta el ORM del request.
+"""
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Presupuesto fijo por nombre de URL (peticiones GET con datos de prueba y cache caliente).
+# Las URLs sin entrada usan QUERY_BUDGET. Lo verifica bookings.tests.QueryBudgetTests.
+URL_QUERY_BUDGETS = {
+    'home': 0,
+    'gallery': 0,
+    'rates': 0,
+    'location': 0,
+    'about': 0,
+    'contact': 0,
+    'check_availability_ajax': 1,
+    'rooms:room_type_list': 1,
+    'rooms:room_type_detail': 4,
+    'rooms:check_availability': 2,
+    # Solo el nombre del calendario; los eventos se leen con un cursor al enviar la respuesta
+    'rooms:ical_feed': 1,
+    'bookings:booking_list': 6,
+    'bookings:booking_create': 4,
+    'bookings:booking_detail': 4,
+    'bookings:booking_invoice': 3,
+    'bookings:booking_cancel': 2,
+    'reviews:review_list': 1,
+    'reviews:review_create': 3,
+    'reviews:review_detail': 1,
+    'reviews:mark_helpful': 2,
+    'reviews:hotel_reviews': 8,
+    # API JSON: filas .values() sin N+1; las de usuario incluyen sesión y usuario
+    'api_v1:room_types': 2,
+    'api_v1:room_type_detail': 2,
+    'api_v1:availability': 1,
+    'api_v1:availability_stream': 1,
+    'api_v1:quotes': 1,
+    'api_v1:bookings': 4,
+    'api_v1:booking_detail': 3,
+    'api_v1:reviews': 1,
+    'api_v1:gallery': 1,
+    # Listados del admin: sesión, usuario, filtros,
+    # conteo, página y jerarquía de fechas; no deben crecer con el número de filas.
+    # Los de EstimatedCountPaginator cuentan además la estimación de pg_class en PostgreSQL
+    'admin:bookings_booking_changelist': 9,
+    'admin:bookings_archivedbooking_changelist': 9,
+    'admin:reviews_reviewandrating_changelist': 10,
+    'admin:rooms_roomtype_changelist': 6,
+    'admin:rooms_room_changelist': 7,
+}
+
+
+class QueryRecorder:
+    """`execute_wrapper` que acumula conteo, tiempo y repeticiones de SQL"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+        self.exact = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.statements[sql] += 1
+            self.exact[(sql, repr(params))] += 1
+
+    @contextmanager
+    def record(self):
+        """Registra las consultas de todas las bases de datos dentro del bloque"""
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+    @property
+    def duplicates(self):
+        """Consultas idénticas (mismo SQL y parámetros) ejecutadas de más"""
+        return sum(n - 1 for n in self.exact.values() if n > 1)
+
+    def repeated(self, threshold=None):
+        """Sentencias ejecutadas más de `threshold` veces: casi siempre un N+1"""
+        if threshold is None:
+            threshold = settings.QUERY_BUDGET_MAX_REPEATS
+        return [(sql, n) for sql, n in self.statements.most_common() if n > threshold]
+
+    def summary(self):
+        return f'{self.count} consultas, {self.duration * 1000:.1f} ms de SQL, {self.duplicates} duplicadas'
+
+
+def measure_request(client, path, **extra):
+    """Ejecuta un GET con el cliente de pruebas y retorna (respuesta, QueryRecorder)"""
+    recorder = QueryRecorder()
+    with recorder.record():
+        response = client.get(path, **extra)
+    return response, recorder
+
+
+class QueryBudgetMiddleware:
+    """Mide las consultas de cada petición y avisa cuando excede el presupuesto"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.QUERY_BUDGET_ENABLED:
+            return self.get_response(request)
+
+        request._query_budget = settings.QUERY_BUDGET
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with recorder.record():
+            response = self.get_response(request)
+        return self.report(request, response, recorder, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        if not settings.QUERY_BUDGET_ENABLED:
+            return await self.get_response(request)
+
+        request._query_budget = settings.QUERY_BUDGET
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        # Las conexiones son por hilo: el wrapper se instala donde corre el ORM async
+        record = recorder.record()
+        await sync_to_async(record.__enter__)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(record.__exit__)(None, None, None)
+        return self.report(request, response, recorder, time.perf_counter() - start)
+
+    def report(self, request, response, recorder, total):
+        if settings.SERVER_TIMING_HEADER:
+            response['Server-Timing'] = (
+                f'db;dur={recorder.duration * 1000:.1f};desc="{recorder.count} consultas", '
+                f'app;dur={total * 1000:.1f}'
+            )
+
+        repeated = recorder.repeated()
+        if (
+            recorder.count > request._query_budget
+            or recorder.duration * 1000 > settings.QUERY_BUDGET_SQL_MS
+            or repeated
+        ):
+            logger.warning(
+                'Presupuesto de consultas excedido en %s %s (límite %s): %s%s',
+                request.method, request.path, request._query_budget, recorder.summary(),
+                f'; repetida {repeated[0][1]} veces: {repeated[0][0][:200]}' if repeated else ''
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view = getattr(view_func, 'view_class', view_func)
+        budget = getattr(view, 'query_budget', None)
+        if budget is not None:
+            request._query_budget = budget
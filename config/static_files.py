@@ -0,0 +1,77 @@
+# config/static_files.py
+"""
+Servidor de estáticos dentro del proceso (WhiteNoise).
+
+`collectstatic` genera nombres con hash (style.3f2a9c1b7d4e.css) y sus
+variantes .gz y .br; el middleware indexa STATIC_ROOT al arrancar, elige la
+variante según Accept-Encoding y marca los archivos con hash como
+`immutable` por un año, así navegadores y CDN no vuelven a validarlos.
+"""
+from inspect import isawaitable
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .content_cache import bump_content_version
+
+STATIC_MANIFEST_KEY = 'static-manifest'
+# Tamaño de bloque al enviar un archivo bajo ASGI
+CHUNK_SIZE = 64 * 1024
+
+
+def sync_static_manifest():
+    """
+    Invalida páginas y fragmentos cacheados cuando un build cambia los nombres
+    con hash: el HTML guardado apuntaría a archivos que ya no existen.
+    Retorna True si invalidó.
+    """
+    manifest_hash = getattr(staticfiles_storage, 'manifest_hash', '')
+    if not manifest_hash or cache.get(STATIC_MANIFEST_KEY) == manifest_hash:
+        return False
+    cache.set(STATIC_MANIFEST_KEY, manifest_hash, None)
+    bump_content_version()
+    return True
+
+
+async def aread_chunks(file):
+    """Lee el archivo en el pool de hilos sin bloquear el event loop"""
+    if file is None:
+        # HEAD y 304 no llevan cuerpo
+        return
+    read = sync_to_async(file.read, thread_sensitive=False)
+    try:
+        while chunk := await read(CHUNK_SIZE):
+            yield chunk
+    finally:
+        file.close()
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoiseMiddleware que también corre async: bajo ASGI las peticiones
+    que no son estáticos pasan sin cambiar de hilo.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        # El __call__ de WhiteNoise decide si es un estático; si no lo es
+        # regresa get_response(request), que aquí es una corrutina
+        response = super().__call__(request)
+        if isawaitable(response):
+            return await response
+        # Con un iterador síncrono Django leería el archivo completo en otro hilo
+        response.streaming_content = aread_chunks(response.file_to_stream)
+        return response
@@ -0,0 +1,455 @@
+# config/tests.py
+import csv
+import io
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core import signing
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.http import HttpResponse, QueryDict
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from django.views import View
+
+from bookings.archive import BookingHistory
+from bookings.models import ArchivedBooking, Booking, Coupon
+from rooms import catalog
+
+from .conditional import ConditionalGetMixin, make_etag
+from .content_cache import CONTENT_VERSION_KEY, get_content_version, page_cache_key
+from .csv_export import cell, csv_chunks
+from .db_router import PRIMARY_PIN_COOKIE, ReplicaRouter, ReplicaRoutingMiddleware
+from .pagination import CURSOR_SALT, KeysetPaginator
+from .static_files import StaticFilesMiddleware
+from .views import HOME_CONTENT_KEY, HomeView
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class PageCacheKeyTests(TestCase):
+    """La llave de la página completa solo depende de la ruta y de los parámetros que lee la vista"""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def test_unknown_params_share_the_page(self):
+        key = page_cache_key(self.factory.get('/galeria/'), version=1)
+        self.assertEqual(page_cache_key(self.factory.get('/galeria/', {'x': 'a1b2'}), version=1), key)
+        self.assertNotEqual(page_cache_key(self.factory.get('/tarifas/'), version=1), key)
+        self.assertNotEqual(page_cache_key(self.factory.get('/galeria/'), version=2), key)
+
+    def test_declared_params_vary_the_key(self):
+        def key(query):
+            return page_cache_key(self.factory.get('/galeria/', query), version=1, params=('pagina', 'orden'))
+
+        self.assertNotEqual(key({'pagina': '2'}), key({'pagina': '3'}))
+        self.assertEqual(key({'orden': 'precio', 'pagina': '2'}), key({'pagina': '2', 'x': '1', 'orden': 'precio'}))
+
+    def test_junk_query_is_served_from_cache(self):
+        self.assertEqual(self.client.get('/galeria/').status_code, 200)
+        backend = caches['default']
+        with mock.patch.object(backend, 'set', wraps=backend.set) as cache_set:
+            response = self.client.get('/galeria/', {'x': 'cualquier-cosa'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([call for call in cache_set.call_args_list if 'page:' in call.args[0]], [])
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class HomeViewTests(TestCase):
+    """La portada (vista async) guarda su contenido renderizado por versión"""
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('generate_test_data', stdout=io.StringIO())
+        cls.user = get_user_model().objects.create_user('huesped', 'huesped@example.com', 'x')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_content_is_rendered_once_per_version(self):
+        response = self.client.get('/')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '<section class="hero-section">')
+        content = cache.get(HOME_CONTENT_KEY.format(get_content_version()))
+        self.assertIn('<section class="hero-section">', content)
+
+        # Con sesión no hay página completa cacheada, pero el contenido sí se reutiliza
+        self.client.force_login(self.user)
+        with mock.patch.object(HomeView, 'render_content') as render_content:
+            response = self.client.get('/')
+        render_content.assert_not_called()
+        self.assertContains(response, '<section class="hero-section">')
+
+    def test_new_content_version_renders_again(self):
+        self.client.force_login(self.user)
+        self.client.get('/')
+        version = get_content_version()
+        cache.incr(CONTENT_VERSION_KEY)
+        self.client.get('/')
+        self.assertIsNotNone(cache.get(HOME_CONTENT_KEY.format(version)))
+        self.assertIsNotNone(cache.get(HOME_CONTENT_KEY.format(version + 1)))
+
+
+class CountingView(ConditionalGetMixin, View):
+    calls = 0
+
+    def get_etag(self, request, *args, **kwargs):
+        return make_etag('prueba', kwargs['version'])
+
+    def get(self, request, *args, **kwargs):
+        type(self).calls += 1
+        return HttpResponse('contenido')
+
+
+class AsyncCountingView(ConditionalGetMixin, View):
+    calls = 0
+
+    async def aget_etag(self, request, *args, **kwargs):
+        return make_etag('prueba', kwargs['version'])
+
+    async def get(self, request, *args, **kwargs):
+        type(self).calls += 1
+        return HttpResponse('contenido')
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ConditionalGetTests(TestCase):
+    """Con un ETag vigente la vista responde 304 sin ejecutar get()"""
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('generate_test_data', stdout=io.StringIO())
+
+    def setUp(self):
+        cache.clear()
+        CountingView.calls = AsyncCountingView.calls = 0
+
+    def test_make_etag_depends_on_every_part(self):
+        self.assertEqual(make_etag('a', 1, 'anon'), make_etag('a', 1, 'anon'))
+        self.assertNotEqual(make_etag('a', 1, 'anon'), make_etag('a', 2, 'anon'))
+        self.assertNotEqual(make_etag('a', 1, 'anon'), make_etag('a', 1, 7))
+
+    def test_matching_etag_skips_the_view(self):
+        view = CountingView.as_view()
+        factory = RequestFactory()
+        response = view(factory.get('/'), version=1)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        response = view(factory.get('/', headers={'If-None-Match': etag}), version=1)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(CountingView.calls, 1)
+
+        response = view(factory.get('/', headers={'If-None-Match': etag}), version=2)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_pending_messages_bypass_the_etag(self):
+        view = CountingView.as_view()
+        factory = RequestFactory()
+        etag = view(factory.get('/'), version=1)['ETag']
+        request = factory.get('/', headers={'If-None-Match': etag})
+        request.COOKIES[CookieStorage.cookie_name] = 'pendiente'
+        self.assertEqual(view(request, version=1).status_code, 200)
+        self.assertEqual(CountingView.calls, 2)
+
+    async def test_async_view_revalidates(self):
+        view = AsyncCountingView.as_view()
+        factory = AsyncRequestFactory()
+        response = await view(factory.get('/'), version=1)
+        etag = response['ETag']
+        response = await view(factory.get('/', headers={'If-None-Match': etag}), version=1)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(AsyncCountingView.calls, 1)
+
+    def test_room_list_etag_follows_catalog_version(self):
+        response = self.client.get('/habitaciones/')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        response = self.client.get('/habitaciones/', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+        catalog.invalidate_catalog()
+        response = self.client.get('/habitaciones/', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class ReplicaReadView(View):
+    """Responde con la base que el router elige para leer"""
+    use_read_replica = True
+
+    def get(self, request):
+        return HttpResponse(ReplicaRouter().db_for_read(None))
+
+    def post(self, request):
+        return HttpResponse(ReplicaRouter().db_for_read(None))
+
+
+class PrimaryReadView(ReplicaReadView):
+    use_read_replica = False
+
+
+@override_settings(DATABASE_REPLICAS=['replica_0'], DATABASE_PRIMARY_PIN_SECONDS=5)
+class ReplicaRouterTests(SimpleTestCase):
+    """Las lecturas de vistas marcadas van a la réplica salvo que el cliente esté fijado a la primaria"""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def call(self, view_class, request):
+        view = view_class.as_view()
+
+        def handler(request):
+            # Lo que hace el handler de Django entre middleware y vista
+            middleware.process_view(request, view, (), {})
+            return view(request)
+
+        middleware = ReplicaRoutingMiddleware(handler)
+        return middleware(request)
+
+    def test_get_reads_from_replica(self):
+        response = self.call(ReplicaReadView, self.factory.get('/'))
+        self.assertEqual(response.content, b'replica_0')
+        self.assertNotIn(PRIMARY_PIN_COOKIE, response.cookies)
+        # Fuera de la petición se vuelve a leer de la primaria
+        self.assertEqual(ReplicaRouter().db_for_read(None), 'default')
+
+    async def test_async_get_reads_from_replica(self):
+        view = ReplicaReadView.as_view()
+
+        async def handler(request):
+            middleware.process_view(request, view, (), {})
+            return view(request)
+
+        middleware = ReplicaRoutingMiddleware(handler)
+        response = await middleware(AsyncRequestFactory().get('/'))
+        self.assertEqual(response.content, b'replica_0')
+        self.assertEqual(ReplicaRouter().db_for_read(None), 'default')
+
+    def test_unmarked_view_reads_from_primary(self):
+        self.assertEqual(self.call(PrimaryReadView, self.factory.get('/')).content, b'default')
+
+    def test_post_pins_client_to_primary(self):
+        response = self.call(ReplicaReadView, self.factory.post('/'))
+        self.assertEqual(response.content, b'default')
+        cookie = response.cookies[PRIMARY_PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], 5)
+        self.assertGreater(int(cookie.value), time.time())
+
+        request = self.factory.get('/')
+        request.COOKIES[PRIMARY_PIN_COOKIE] = cookie.value
+        self.assertEqual(self.call(ReplicaReadView, request).content, b'default')
+
+    def test_expired_or_invalid_pin_reads_from_replica(self):
+        for value in (str(int(time.time()) - 1), 'x'):
+            request = self.factory.get('/')
+            request.COOKIES[PRIMARY_PIN_COOKIE] = value
+            self.assertEqual(self.call(ReplicaReadView, request).content, b'replica_0')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_nothing_changes(self):
+        self.assertEqual(self.call(ReplicaReadView, self.factory.get('/')).content, b'default')
+        self.assertNotIn(PRIMARY_PIN_COOKIE, self.call(ReplicaReadView, self.factory.post('/')).cookies)
+
+    def test_writes_and_migrations_stay_on_primary(self):
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_write(None), 'default')
+        self.assertTrue(router.allow_migrate('default', 'bookings'))
+        self.assertFalse(router.allow_migrate('replica_0', 'bookings'))
+
+
+class KeysetPaginatorTests(TestCase):
+    """Recorrido con cursores sobre reservas vigentes y archivadas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('generate_test_data', stdout=io.StringIO())
+        columns = [field.attname for field in ArchivedBooking._meta.concrete_fields if field.name != 'archived_at']
+        next_id = Booking.objects.order_by('-pk').values_list('pk', flat=True)[0] + 1
+        for index, row in enumerate(Booking.objects.order_by('pk').values(*columns)[:7]):
+            row.update(id=next_id + index, invoice_id=f'INV-ARCHIVO-{index}')
+            ArchivedBooking.objects.create(**row)
+
+    def setUp(self):
+        self.live_ids = list(Booking.objects.order_by('-booking_date', '-id').values_list('pk', flat=True))
+        self.archived_ids = list(ArchivedBooking.objects.order_by('-booking_date', '-id').values_list('pk', flat=True))
+        # Un tamaño que no divide a las vigentes: una página mezcla ambas tablas
+        self.per_page = next(size for size in (3, 4, 5) if len(self.live_ids) % size)
+
+    def paginator(self):
+        return KeysetPaginator(
+            BookingHistory(Booking.objects.order_by('-booking_date'), ArchivedBooking.objects.order_by('-booking_date')),
+            self.per_page
+        )
+
+    def walk_forward(self):
+        pages = [self.paginator().page()]
+        while pages[-1].has_next():
+            pages.append(self.paginator().page(pages[-1].next_cursor))
+        return pages
+
+    def test_forward_crosses_from_live_to_archive(self):
+        pages = self.walk_forward()
+        ids = [booking.pk for page in pages for booking in page]
+        self.assertEqual(ids, self.live_ids + self.archived_ids)
+        self.assertFalse(pages[0].has_previous())
+        self.assertTrue(all(len(page) == self.per_page for page in pages[:-1]))
+
+        crossing = pages[len(self.live_ids) // self.per_page]
+        models = {type(booking) for booking in crossing}
+        self.assertEqual(models, {Booking, ArchivedBooking})
+
+    def test_first_page_does_not_read_the_archive(self):
+        with self.assertNumQueries(1):
+            self.paginator().page()
+
+    def test_previous_cursors_return_the_same_pages(self):
+        pages = self.walk_forward()
+        page = pages[-1]
+        for expected in reversed(pages[:-1]):
+            page = self.paginator().page(page.previous_cursor)
+            self.assertEqual([booking.pk for booking in page], [booking.pk for booking in expected])
+        self.assertFalse(page.has_previous())
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        first = [booking.pk for booking in self.paginator().page()]
+        cursor = self.paginator().page().next_cursor
+        forged = signing.dumps({'s': 5, 'v': [], 'd': 'next'}, salt=CURSOR_SALT, compress=True)
+        for bad in (cursor[:-2] + ('AA' if not cursor.endswith('AA') else 'BB'), 'basura', forged):
+            page = self.paginator().page(bad)
+            self.assertEqual([booking.pk for booking in page], first)
+            self.assertFalse(page.has_previous())
+
+    def test_querystring_keeps_filters(self):
+        page = self.paginator().page(params=QueryDict('status=PAID&page=3'))
+        query = QueryDict(page.next_querystring[1:])
+        self.assertEqual(query['status'], 'PAID')
+        self.assertNotIn('page', query)
+        self.assertEqual(query['cursor'], page.next_cursor)
+
+
+class CsvExportTests(TestCase):
+    """CSV en bloques de chunk_size filas, sin fórmulas ejecutables"""
+
+    def test_cell_neutralizes_formulas(self):
+        for value in ('=SUM(A1:A9)', '+52 434', '-1', '@cmd', '\tx', '\rx'):
+            self.assertEqual(cell(value), "'" + value)
+        self.assertEqual(cell('Pátzcuaro'), 'Pátzcuaro')
+        self.assertEqual(cell(-5), -5)
+        self.assertEqual(cell(None), '')
+        moment = timezone.make_aware(datetime(2025, 1, 10, 15, 30))
+        self.assertEqual(cell(moment), '2025-01-10 15:30:00')
+
+    def test_chunks_follow_chunk_size(self):
+        User = get_user_model()
+        names = ['ana', '=HYPERLINK(A1)', 'beto', '-carla', 'dora']
+        for name in names:
+            User.objects.create_user(name, f'{len(name)}@example.com')
+        columns = [('usuario', 'username'), ('email', 'email')]
+
+        chunks = list(csv_chunks(User.objects.order_by('pk'), columns, chunk_size=2))
+        self.assertEqual(len(chunks), 3)
+        self.assertTrue(chunks[0].startswith('\ufeffusuario,email\r\n'))
+        self.assertEqual([len(list(csv.reader(io.StringIO(chunk)))) for chunk in chunks], [3, 2, 1])
+
+        rows = list(csv.reader(io.StringIO(''.join(chunks).lstrip('\ufeff'))))
+        self.assertEqual(rows[0], ['usuario', 'email'])
+        self.assertEqual(
+            [row[0] for row in rows[1:]],
+            ['ana', "'=HYPERLINK(A1)", 'beto', "'-carla", 'dora']
+        )
+
+    def test_admin_action_streams_selection(self):
+        admin_user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'x')
+        self.client.force_login(admin_user)
+        now = timezone.now()
+        coupons = [
+            Coupon.objects.create(code=code, discount_value=10, valid_from=now, valid_until=now + timedelta(days=1))
+            for code in ('VERANO', '=1+1', 'OTOÑO')
+        ]
+        response = self.client.post('/admin/bookings/coupon/', {
+            'action': 'export_csv', '_selected_action': [coupons[0].pk, coupons[1].pk],
+        })
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment; filename="coupon-', response['Content-Disposition'])
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode().lstrip('\ufeff'))))
+        self.assertEqual(rows[0][0], 'code')
+        self.assertEqual(sorted(row[0] for row in rows[1:]), ["'=1+1", 'VERANO'])
+
+
+class StaticFilesMiddlewareTests(SimpleTestCase):
+    """
+    Cabeceras de los estáticos con hash, sync y async. El middleware se apoya
+    en el __call__ de WhiteNoise: si una versión nueva cambia ese contrato,
+    estas pruebas fallan.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.static_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, cls.static_root)
+        cls.enterClassContext(override_settings(STATIC_ROOT=cls.static_root, DEBUG=False))
+        call_command('collectstatic', interactive=False, verbosity=0)
+        cls.url = staticfiles_storage.url('css/style.css')
+        with open(staticfiles_storage.path('css/style.css'), 'rb') as file:
+            cls.content = file.read()
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.async_factory = AsyncRequestFactory()
+
+    def test_hashed_asset_is_immutable(self):
+        self.assertRegex(self.url, r'^/static/css/style\.[0-9a-f]{12}\.css$')
+        middleware = StaticFilesMiddleware(lambda request: HttpResponse('vista'))
+        response = middleware(self.factory.get(self.url))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=315360000', response['Cache-Control'])
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertTrue(response['Content-Type'].startswith('text/css'))
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+
+    def test_compressed_variant_follows_accept_encoding(self):
+        middleware = StaticFilesMiddleware(lambda request: HttpResponse('vista'))
+        response = middleware(self.factory.get(self.url, HTTP_ACCEPT_ENCODING='gzip, br'))
+        self.assertEqual(response['Content-Encoding'], 'br')
+        response.close()
+        response = middleware(self.factory.get(self.url, HTTP_ACCEPT_ENCODING='gzip'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        response.close()
+
+    def test_unhashed_name_is_not_immutable(self):
+        middleware = StaticFilesMiddleware(lambda request: HttpResponse('vista'))
+        response = middleware(self.factory.get('/static/css/style.css'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('immutable', response['Cache-Control'])
+        response.close()
+
+    async def test_async_streams_asset_and_passes_other_paths(self):
+        async def get_response(request):
+            return HttpResponse('vista')
+
+        middleware = StaticFilesMiddleware(get_response)
+        response = await middleware(self.async_factory.get(self.url))
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertTrue(response.is_async)
+        self.assertEqual(b''.join([chunk async for chunk in response.streaming_content]), self.content)
+
+        etag = response['ETag']
+        response = await middleware(self.async_factory.get(self.url, headers={'If-None-Match': etag}))
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual([chunk async for chunk in response.streaming_content], [])
+
+        response = await middleware(self.async_factory.get('/galeria/'))
+        self.assertEqual(response.content, b'vista')
@@ -0,0 +1,67 @@
+# config/throttling.py
+import logging
+import time
+
+from django.conf import settings
+from django_redis import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+# Token bucket atómico: recarga los tokens según el tiempo transcurrido y
+# consume uno si hay disponible. Retorna 1 si la petición está permitida.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local refill_per_sec = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+
+tokens = math.min(capacity, tokens + (now - ts) * refill_per_sec)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / refill_per_sec) + 1)
+return allowed
+"""
+
+_script = None
+
+
+def get_client_ip(request):
+    """IP del cliente, tomando en cuenta los proxies de confianza (TRUSTED_PROXY_COUNT)"""
+    proxies = settings.TRUSTED_PROXY_COUNT
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if proxies and forwarded:
+        hops = [ip.strip() for ip in forwarded.split(',') if ip.strip()]
+        if len(hops) >= proxies:
+            return hops[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def allow_request(scope, identifier, capacity, per_seconds):
+    """
+    Consume un token del bucket `scope:identifier`.
+
+    El bucket admite ráfagas de `capacity` peticiones y se recarga por completo
+    en `per_seconds`. Si Redis no responde se permite la petición.
+    """
+    global _script
+
+    try:
+        if _script is None:
+            _script = get_redis_connection('default').register_script(TOKEN_BUCKET_SCRIPT)
+        allowed = _script(
+            keys=[f'throttle:{scope}:{identifier}'],
+            args=[capacity, capacity / per_seconds, time.time()],
+        )
+    except Exception:
+        logger.warning('Throttling no disponible, se permite la petición', exc_info=True)
+        return True
+
+    return bool(allowed)
@@ -14,10 +14,13 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
+from django.views.static import serve
 from . import views
 
 urlpatterns = [
@@ -32,6 +35,9 @@ urlpatterns = [
     # AJAX endpoints
     path('ajax/check-availability/', views.check_availability_ajax, name='check_availability_ajax'),
     
+    # API JSON versionada
+    path('api/v1/', include('config.api_urls')),
+    
     # Apps
     path('habitaciones/', include('rooms.urls')),
     path('reservaciones/', include('bookings.urls')),
@@ -44,6 +50,11 @@ urlpatterns = [
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
+elif settings.SERVE_MEDIA:
+    # static() no agrega nada con DEBUG=False; los estáticos los sirve StaticFilesMiddleware
+    urlpatterns += [
+        re_path(rf'^{re.escape(settings.MEDIA_URL.lstrip("/"))}(?P<path>.*)$', serve, {'document_root': settings.MEDIA_ROOT}),
+    ]
 
 # Personalización del admin
 admin.site.site_header = "Hotel Yunuen - Administración"
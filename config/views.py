@@ -1,87 +1,133 @@
-from django.shortcuts import render, get_object_or_404
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, get_object_or_404, redirect
 from django.views.generic import TemplateView
 from django.core.paginator import Paginator
 from django.contrib import messages
-from django.core.mail import send_mail
 from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db.models import Subquery
 from django.http import JsonResponse
-from bookings.models import Hotel
+from django.template.loader import render_to_string
+from django.utils.functional import SimpleLazyObject
+from django.views.decorators.http import condition
+from bookings.models import Hotel, EmailOutbox
+from bookings.utils import queue_email
+from rooms import catalog
+from rooms.api import gallery_items, gallery_queryset
 from rooms.models import RoomType, Amenity
 from reviews.models import ReviewAndRating, HotelStatistics
+from .throttling import allow_request, get_client_ip
+from .conditional import make_etag
+from .pagination import KeysetPaginator
+from .content_cache import (
+    VersionedPageCacheMixin, aget_content_version, get_availability_version, in_cache_pool
+)
+
+
+def is_valid_email(value):
+    try:
+        validate_email(value)
+    except ValidationError:
+        return False
+    return True
+
+
+# Contenido de la portada ya renderizado, por versión del contenido
+HOME_CONTENT_TEMPLATE = 'home_content.html'
+HOME_CONTENT_KEY = 'home-content:{}'
+
 
+def get_main_hotel():
+    """Hotel principal (asumiendo que es el primero activo)"""
+    return catalog.main_hotel()
 
-class HomeView(TemplateView):
-    """Vista principal del sitio web"""
+
+class HomeView(VersionedPageCacheMixin, TemplateView):
+    """Vista principal del sitio web (async)"""
     template_name = 'home.html'
+    use_read_replica = True
     
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        
-        # Obtener el hotel principal (asumiendo que es el primero)
-        hotel = Hotel.objects.filter(is_active=True).first()
-        
-        # Obtener habitaciones destacadas (las más baratas de cada categoría)
-        featured_rooms = RoomType.objects.filter(is_active=True).order_by('category', 'price_per_night')[:6]
-        
-        # Obtener reseñas destacadas
-        featured_reviews = ReviewAndRating.objects.filter(
+    def featured_reviews(self):
+        return ReviewAndRating.objects.filter(
             is_active=True, 
             rating__gte=4
         ).select_related('user', 'hotel')[:3]
+    
+    def main_hotel_stats(self):
+        return HotelStatistics.objects.filter(hotel=Subquery(
+            Hotel.objects.filter(is_active=True).order_by('name').values('pk')[:1]
+        ))
+    
+    async def get(self, request, *args, **kwargs):
+        context = self.get_context_data(**kwargs)
         
-        # Estadísticas del hotel
-        if hotel:
-            stats = HotelStatistics.objects.filter(hotel=hotel).first()
-        else:
-            stats = None
+        # El contenido se guarda ya renderizado bajo la versión del contenido:
+        # si está en cache no se consulta nada
+        key = HOME_CONTENT_KEY.format(await aget_content_version(request))
+        content = await in_cache_pool(cache.get, key)
+        if content is None:
+            content = await self.render_content(request)
+            await in_cache_pool(cache.set, key, content, settings.PAGE_CACHE_TIMEOUT)
+        context['home_content'] = content
         
-        context.update({
+        return self.render_to_response(context)
+    
+    async def render_content(self, request):
+        # Las lecturas independientes se lanzan a la vez en lugar de una por una durante el render
+        hotel, room_types, featured_reviews, stats = await asyncio.gather(
+            catalog.amain_hotel(),
+            catalog.aactive_room_types(),
+            self.featured_reviews_list(),
+            self.main_hotel_stats().afirst(),
+        )
+        return await sync_to_async(render_to_string)(HOME_CONTENT_TEMPLATE, {
             'hotel': hotel,
-            'featured_rooms': featured_rooms,
+            # Habitaciones destacadas (las más baratas de cada categoría)
+            'featured_rooms': room_types[:6],
             'featured_reviews': featured_reviews,
             'stats': stats,
-        })
-        
-        return context
+        }, request)
+    
+    async def featured_reviews_list(self):
+        return [review async for review in self.featured_reviews()]
 
 
-class GalleryView(TemplateView):
+class GalleryView(VersionedPageCacheMixin, TemplateView):
     """Vista de galería de imágenes del hotel"""
     template_name = 'gallery.html'
+    use_read_replica = True
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        
-        # Obtener habitaciones con imágenes
-        room_types = RoomType.objects.filter(
-            is_active=True, 
-            image__isnull=False
-        ).exclude(image='')
-        
-        # Organizar por categorías
-        gallery_items = []
-        for room_type in room_types:
-            gallery_items.append({
-                'image': room_type.image,
-                'title': room_type.name,
-                'description': room_type.description,
-                'category': room_type.get_category_display(),
-                'price': room_type.price_per_night
-            })
-        
-        context['gallery_items'] = gallery_items
+        context['gallery'] = SimpleLazyObject(self.get_first_page)
         return context
+    
+    def get_first_page(self):
+        # Solo la primera página: el resto lo pide el navegador a api_v1:gallery al hacer scroll
+        page = KeysetPaginator(gallery_queryset(), settings.GALLERY_PAGE_SIZE).page()
+        return {
+            'room_types': page.object_list,
+            'feed': {'results': gallery_items(page.object_list), 'next': page.next_cursor},
+        }
 
 
-class RatesView(TemplateView):
+class RatesView(VersionedPageCacheMixin, TemplateView):
     """Vista de tarifas del hotel"""
     template_name = 'rates.html'
+    use_read_replica = True
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        
+        context['rooms_by_category'] = SimpleLazyObject(self.get_rooms_by_category)
+        return context
+    
+    def get_rooms_by_category(self):
         # Obtener todas las habitaciones activas organizadas por categoría
-        room_types = RoomType.objects.filter(is_active=True).order_by('category', 'price_per_night')
+        room_types = catalog.active_room_types()
         
         # Agrupar por categoría
         rooms_by_category = {}
@@ -91,20 +137,19 @@ class RatesView(TemplateView):
                 rooms_by_category[category] = []
             rooms_by_category[category].append(room_type)
         
-        context['rooms_by_category'] = rooms_by_category
-        return context
+        return rooms_by_category
 
 
-class LocationView(TemplateView):
+class LocationView(VersionedPageCacheMixin, TemplateView):
     """Vista de ubicación del hotel"""
     template_name = 'location.html'
+    use_read_replica = True
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
         # Obtener información del hotel
-        hotel = Hotel.objects.filter(is_active=True).first()
-        context['hotel'] = hotel
+        context['hotel'] = SimpleLazyObject(get_main_hotel)
         
         # Información adicional sobre la ubicación
         context.update({
@@ -135,15 +180,15 @@ class LocationView(TemplateView):
         return context
 
 
-class AboutView(TemplateView):
+class AboutView(VersionedPageCacheMixin, TemplateView):
     """Vista acerca del hotel"""
     template_name = 'about.html'
+    use_read_replica = True
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        hotel = Hotel.objects.filter(is_active=True).first()
-        context['hotel'] = hotel
+        context['hotel'] = SimpleLazyObject(get_main_hotel)
         
         # Información adicional del hotel
         context.update({
@@ -196,49 +241,60 @@ class ContactView(TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        hotel = Hotel.objects.filter(is_active=True).first()
-        context['hotel'] = hotel
+        context['hotel'] = get_main_hotel()
         
         return context
     
     def post(self, request, *args, **kwargs):
         """Procesar formulario de contacto"""
         name = request.POST.get('name')
-        email = request.POST.get('email')
-        subject = request.POST.get('subject')
+        email = request.POST.get('email', '').strip()
+        phone = request.POST.get('phone', '')
+        # Un salto de línea en el asunto haría fallar cada intento de envío (BadHeaderError)
+        subject = ' '.join(request.POST.get('subject', '').split())
         message = request.POST.get('message')
         
-        if all([name, email, subject, message]):
-            try:
-                # Enviar email (configurar SMTP en settings)
-                full_message = f"""
-                Mensaje de contacto desde el sitio web:
-                
-                Nombre: {name}
-                Email: {email}
-                Asunto: {subject}
-                
-                Mensaje:
-                {message}
-                """
-                
-                send_mail(
-                    f'[Hotel Yunuen] {subject}',
-                    full_message,
-                    email,
-                    [settings.DEFAULT_FROM_EMAIL],
-                    fail_silently=False,
-                )
-                
-                messages.success(request, '¡Mensaje enviado correctamente! Nos pondremos en contacto contigo pronto.')
-            except Exception as e:
-                messages.error(request, 'Error al enviar el mensaje. Por favor, intenta de nuevo.')
-        else:
+        if not all([name, email, subject, message]):
             messages.error(request, 'Por favor, completa todos los campos.')
+        elif not is_valid_email(email):
+            messages.error(request, 'Por favor, escribe un correo electrónico válido.')
+        elif not allow_request(
+            'contact', get_client_ip(request),
+            settings.CONTACT_THROTTLE_BURST, settings.CONTACT_THROTTLE_PERIOD
+        ):
+            messages.error(request, 'Has enviado demasiados mensajes. Por favor, intenta más tarde.')
+        else:
+            full_message = f"""
+            Mensaje de contacto desde el sitio web:
+            
+            Nombre: {name}
+            Email: {email}
+            Teléfono: {phone}
+            Asunto: {subject}
+            
+            Mensaje:
+            {message}
+            """
+            
+            # La entrega la hace el worker de Celery desde la bandeja de salida
+            queue_email(
+                EmailOutbox.Kind.CONTACT,
+                settings.DEFAULT_FROM_EMAIL,
+                f'[Hotel Yunuen] {subject}'[:255],
+                full_message,
+                reply_to=email,
+            )
+            
+            messages.success(request, '¡Mensaje enviado correctamente! Nos pondremos en contacto contigo pronto.')
         
-        return self.get(request, *args, **kwargs)
+        return redirect('contact')
+
+
+def availability_etag(request, *args, **kwargs):
+    return make_etag('availability', catalog.get_catalog_version(), get_availability_version())
 
 
+@condition(etag_func=availability_etag)
 def check_availability_ajax(request):
     """Vista AJAX para verificar disponibilidad"""
     if request.method == 'GET':
@@ -248,23 +304,23 @@ def check_availability_ajax(request):
         
         if check_in and check_out:
             # Lógica para verificar disponibilidad
+            # El contador available_now evita contar habitaciones por tipo
             available_rooms = RoomType.objects.filter(
                 is_active=True,
-                room_capacity__gte=guests
+                room_capacity__gte=guests,
+                available_now__gt=0
             )
             
             room_data = []
             for room_type in available_rooms:
-                available_count = room_type.available_rooms_count()
-                if available_count > 0:
-                    room_data.append({
-                        'id': room_type.id,
-                        'name': room_type.name,
-                        'price': str(room_type.price_per_night),
-                        'capacity': room_type.room_capacity,
-                        'available': available_count,
-                        'image': room_type.image.url if room_type.image else None
-                    })
+                room_data.append({
+                    'id': room_type.id,
+                    'name': room_type.name,
+                    'price': str(room_type.price_per_night),
+                    'capacity': room_type.room_capacity,
+                    'available': room_type.available_now,
+                    'image': room_type.image.url if room_type.image else None
+                })
             
             return JsonResponse({
                 'status': 'success',
@@ -1,11 +1,17 @@
 # reviews/admin.py
 from django.contrib import admin
+from django.db.models import Q
+from django.db.models.functions import Coalesce
 from django.utils.html import format_html
+from bookings.models import Hotel
+from config.csv_export import CsvExportMixin
+from config.pagination import EstimatedCountPaginator
 from .models import ReviewAndRating, ReviewHelpful, HotelStatistics
+from .search import matching_ids
 
 
 @admin.register(ReviewAndRating)
-class ReviewAndRatingAdmin(admin.ModelAdmin):
+class ReviewAndRatingAdmin(CsvExportMixin, admin.ModelAdmin):
     list_display = ['user_name', 'hotel', 'rating_display', 'review_date', 
                     'is_verified', 'is_active', 'helpful_count']
     list_filter = ['rating', 'is_active', 'is_verified', 'would_recommend', 
@@ -13,6 +19,9 @@ class ReviewAndRatingAdmin(admin.ModelAdmin):
     search_fields = ['user__username', 'user__email', 'title', 'review_text']
     readonly_fields = ['review_date', 'updated_at', 'helpful_count', 'is_verified']
     date_hierarchy = 'review_date'
+    autocomplete_fields = ['user', 'booking']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     fieldsets = (
         ('Usuario y Reservación', {
@@ -35,7 +44,31 @@ class ReviewAndRatingAdmin(admin.ModelAdmin):
         }),
     )
     
-    actions = ['activate_reviews', 'deactivate_reviews', 'update_hotel_stats']
+    actions = ['activate_reviews', 'deactivate_reviews', 'update_hotel_stats', 'export_csv']
+    export_columns = [
+        ('id', 'id'),
+        ('review_date', 'review_date'),
+        ('username', 'user__username'),
+        ('email', 'user__email'),
+        ('hotel', 'hotel__slug'),
+        ('hotel_name', 'hotel__name'),
+        # La reservación puede estar archivada
+        ('invoice_id', Coalesce('booking__invoice_id', 'archived_booking__invoice_id')),
+        ('rating', 'rating'),
+        ('cleanliness_rating', 'cleanliness_rating'),
+        ('service_rating', 'service_rating'),
+        ('location_rating', 'location_rating'),
+        ('value_rating', 'value_rating'),
+        ('would_recommend', 'would_recommend'),
+        ('title', 'title'),
+        ('review_text', 'review_text'),
+        ('is_active', 'is_active'),
+        ('is_verified', 'is_verified'),
+        ('helpful_count', 'helpful_count'),
+        ('hotel_response', 'hotel_response'),
+        ('hotel_response_date', 'hotel_response_date'),
+    ]
+    export_date_field = 'review_date'
     
     def user_name(self, obj):
         name = obj.user.get_full_name() or obj.user.username
@@ -49,31 +82,47 @@ class ReviewAndRatingAdmin(admin.ModelAdmin):
         return format_html('<span style="color: gold;">{}</span>', stars)
     rating_display.short_description = 'Calificación'
     
+    def get_queryset(self, request):
+        # Listado y autocompletado (__str__ usa al usuario) en una consulta
+        return super().get_queryset(request).select_related('user', 'hotel')
+    
+    def get_search_results(self, request, queryset, search_term):
+        # Título y comentario van por el índice de texto completo en lugar de LIKE '%…%'
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        return queryset.filter(
+            Q(pk__in=matching_ids(search_term))
+            | Q(user__username__istartswith=search_term)
+            | Q(user__email__istartswith=search_term)
+        ), False
+    
+    def refresh_hotel_statistics(self, queryset):
+        """Recalcula las estadísticas una vez por hotel, no una vez por reseña"""
+        hotels = Hotel.objects.filter(
+            pk__in=queryset.order_by().values('hotel_id'),
+            statistics__isnull=False
+        ).select_related('statistics')
+        for hotel in hotels:
+            hotel.statistics.update_statistics()
+        return len(hotels)
+    
     @admin.action(description='Activar reseñas seleccionadas')
     def activate_reviews(self, request, queryset):
         updated = queryset.update(is_active=True)
         self.message_user(request, f'{updated} reseñas activadas.')
-        # Actualizar estadísticas
-        for review in queryset:
-            if hasattr(review.hotel, 'statistics'):
-                review.hotel.statistics.update_statistics()
+        self.refresh_hotel_statistics(queryset)
     
     @admin.action(description='Desactivar reseñas seleccionadas')
     def deactivate_reviews(self, request, queryset):
         updated = queryset.update(is_active=False)
         self.message_user(request, f'{updated} reseñas desactivadas.')
-        # Actualizar estadísticas
-        for review in queryset:
-            if hasattr(review.hotel, 'statistics'):
-                review.hotel.statistics.update_statistics()
+        self.refresh_hotel_statistics(queryset)
     
     @admin.action(description='Actualizar estadísticas del hotel')
     def update_hotel_stats(self, request, queryset):
-        hotels = set(review.hotel for review in queryset)
-        for hotel in hotels:
-            if hasattr(hotel, 'statistics'):
-                hotel.statistics.update_statistics()
-        self.message_user(request, f'Estadísticas actualizadas para {len(hotels)} hoteles.')
+        updated = self.refresh_hotel_statistics(queryset)
+        self.message_user(request, f'Estadísticas actualizadas para {updated} hoteles.')
 
 
 @admin.register(ReviewHelpful)
@@ -82,6 +131,10 @@ class ReviewHelpfulAdmin(admin.ModelAdmin):
     list_filter = ['created_at']
     search_fields = ['user__username', 'review__title']
     date_hierarchy = 'created_at'
+    list_select_related = ['review__user', 'user']
+    autocomplete_fields = ['review', 'user']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(HotelStatistics)
@@ -90,6 +143,7 @@ class HotelStatisticsAdmin(admin.ModelAdmin):
                     'recommendation_percentage', 'total_bookings', 'last_updated']
     list_filter = ['last_updated']
     search_fields = ['hotel__name']
+    list_select_related = ['hotel']
     readonly_fields = ['hotel', 'average_rating', 'total_reviews', 
                        'avg_cleanliness', 'avg_service', 'avg_location', 
                        'avg_value', 'recommendation_percentage', 
@@ -0,0 +1,89 @@
+# reviews/api.py
+from config.api import (
+    ApiView, apaginated_response, parse_fields, parse_ids, parse_int
+)
+from config.conditional import ConditionalGetMixin, make_etag
+from config.content_cache import aget_content_version
+from .models import ReviewAndRating
+from .search import render_snippet, search_reviews
+
+REVIEW_FIELDS = [
+    'id', 'hotel', 'author', 'rating', 'cleanliness_rating', 'service_rating',
+    'location_rating', 'value_rating', 'title', 'review_text', 'would_recommend',
+    'review_date', 'is_verified', 'helpful_count', 'hotel_response', 'hotel_response_date',
+    'snippet',
+]
+DEFAULT_FIELDS = [field for field in REVIEW_FIELDS if field != 'snippet']
+
+# Columnas que necesita cada campo calculado o relacionado
+FIELD_COLUMNS = {
+    'hotel': ['hotel__slug'],
+    'author': ['user__first_name', 'user__last_name', 'user__username'],
+    'snippet': ['search_snippet'],
+}
+ORDERINGS = {
+    'recent': ['-review_date'],
+    'helpful': ['-helpful_count', '-review_date'],
+    'rating_high': ['-rating', '-review_date'],
+    'rating_low': ['rating', '-review_date'],
+}
+
+
+def review_rows(rows):
+    """Completa los campos calculados sin instanciar usuarios ni hoteles"""
+    for row in rows:
+        if 'hotel__slug' in row:
+            row['hotel'] = row['hotel__slug']
+        if 'user__username' in row:
+            # Igual que get_full_name(): nombre y apellido, o el usuario
+            full_name = f"{row['user__first_name']} {row['user__last_name']}".strip()
+            row['author'] = full_name or row['user__username']
+        if 'search_snippet' in row:
+            row['snippet'] = str(render_snippet(row['search_snippet']))
+    return rows
+
+
+class ReviewListApi(ConditionalGetMixin, ApiView):
+    """
+    GET /api/v1/reviews/?hotel=slug1,slug2&rating=5&q=desayuno&ordering=helpful&ids=1,2&fields=...
+
+    Reseñas activas paginadas por cursor; con `q` se ordenan por relevancia y
+    se puede pedir el campo `snippet` (HTML escapado con <mark>).
+    """
+
+    async def aget_etag(self, request, *args, **kwargs):
+        # Reseñas, votos útiles y estadísticas incrementan la versión del contenido
+        return make_etag('api-reviews', await aget_content_version(request))
+
+    async def get(self, request):
+        search = request.GET.get('q', '').strip()
+        fields = parse_fields(
+            request,
+            REVIEW_FIELDS if search else DEFAULT_FIELDS,
+            default=DEFAULT_FIELDS
+        )
+
+        queryset = ReviewAndRating.objects.filter(is_active=True)
+        hotels = [slug for slug in request.GET.get('hotel', '').split(',') if slug]
+        if hotels:
+            queryset = queryset.filter(hotel__slug__in=hotels)
+        ids = parse_ids(request.GET.get('ids'))
+        if ids:
+            queryset = queryset.filter(pk__in=ids)
+        rating = parse_int(request.GET.get('rating'), 'rating')
+        if rating:
+            queryset = queryset.filter(rating=rating)
+
+        ordering = ORDERINGS.get(request.GET.get('ordering'), ORDERINGS['recent'])
+        if search:
+            queryset = search_reviews(queryset, search)
+            if 'ordering' not in request.GET:
+                ordering = ['-search_rank', '-review_date']
+
+        # Solo las columnas pedidas, más las del orden de la paginación
+        columns = {'id'} | {key.lstrip('-') for key in ordering}
+        for field in fields:
+            columns.update(FIELD_COLUMNS.get(field, [field]))
+        queryset = queryset.order_by(*ordering).values(*sorted(columns))
+
+        return await apaginated_response(request, queryset, fields, transform=review_rows)
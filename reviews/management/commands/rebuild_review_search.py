@@ -0,0 +1,21 @@
+# reviews/management/commands/rebuild_review_search.py
+from django.core.management.base import BaseCommand
+from reviews.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el índice de búsqueda de texto de las reseñas (tras cargas masivas)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Reseñas por lote',
+        )
+    
+    def handle(self, *args, **options):
+        count = rebuild_index(options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ {count} reseñas indexadas')
+        )
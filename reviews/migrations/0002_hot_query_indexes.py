@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-19 04:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0004_hot_query_indexes'),
+        ('reviews', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reviewandrating',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['hotel', '-review_date'], name='review_hotel_active_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reviewandrating',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-review_date'], name='review_active_date_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-19 04:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0005_archived_booking'),
+        ('reviews', '0002_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hotelstatistics',
+            name='archived_cancelled_bookings',
+            field=models.PositiveIntegerField(default=0, verbose_name='reservaciones canceladas archivadas'),
+        ),
+        migrations.AddField(
+            model_name='hotelstatistics',
+            name='archived_completed_bookings',
+            field=models.PositiveIntegerField(default=0, verbose_name='reservaciones completadas archivadas'),
+        ),
+        migrations.AddField(
+            model_name='hotelstatistics',
+            name='archived_total_bookings',
+            field=models.PositiveIntegerField(default=0, verbose_name='reservaciones archivadas'),
+        ),
+        migrations.AddField(
+            model_name='reviewandrating',
+            name='archived_booking',
+            field=models.OneToOneField(blank=True, help_text='Se asigna al archivar la reservación original', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='review', to='bookings.archivedbooking', verbose_name='reservación archivada'),
+        ),
+    ]
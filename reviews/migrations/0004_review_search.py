@@ -0,0 +1,56 @@
+# Generated by Django 5.2.7 on 2026-10-19 04:33
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# El DDL depende del motor: índice GIN en PostgreSQL, tabla FTS5 en SQLite
+
+POSTGRES_FORWARD = [
+    'CREATE INDEX review_search_vector_idx ON reviews_reviewandrating USING gin (search_vector)',
+    """
+    UPDATE reviews_reviewandrating SET search_vector =
+        setweight(to_tsvector('spanish', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('spanish', coalesce(review_text, '')), 'B')
+    """,
+]
+POSTGRES_BACKWARD = ['DROP INDEX IF EXISTS review_search_vector_idx']
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS reviews_review_fts USING fts5(
+        title, review_text, tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    INSERT INTO reviews_review_fts (rowid, title, review_text)
+    SELECT id, title, review_text FROM reviews_reviewandrating
+    """,
+]
+SQLITE_BACKWARD = ['DROP TABLE IF EXISTS reviews_review_fts']
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return operation
+
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_archived_bookings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reviewandrating',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(
+            run({'postgresql': POSTGRES_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            run({'postgresql': POSTGRES_BACKWARD, 'sqlite': SQLITE_BACKWARD}),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
@@ -33,6 +34,15 @@ class ReviewAndRating(models.Model):
         verbose_name=_("reservación"),
         help_text=_("Reservación asociada a esta reseña")
     )
+    archived_booking = models.OneToOneField(
+        'bookings.ArchivedBooking',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='review',
+        verbose_name=_("reservación archivada"),
+        help_text=_("Se asigna al archivar la reservación original")
+    )
     
     # Calificaciones detalladas
     rating = models.PositiveIntegerField(
@@ -116,12 +126,26 @@ class ReviewAndRating(models.Model):
         default=0
     )
     
+    # Búsqueda de texto en PostgreSQL (en SQLite se usa la tabla FTS5 de reviews.search)
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     class Meta:
         verbose_name = _("reseña y calificación")
         verbose_name_plural = _("reseñas y calificaciones")
         ordering = ['-review_date']
         indexes = [
             models.Index(fields=['hotel', 'is_active']),
+            # Listados públicos: reseñas activas de un hotel, las más recientes primero
+            models.Index(
+                fields=['hotel', '-review_date'],
+                name='review_hotel_active_date_idx',
+                condition=models.Q(is_active=True)
+            ),
+            models.Index(
+                fields=['-review_date'],
+                name='review_active_date_idx',
+                condition=models.Q(is_active=True)
+            ),
             models.Index(fields=['user', 'review_date']),
             models.Index(fields=['rating', 'is_active']),
         ]
@@ -152,6 +176,11 @@ class ReviewAndRating(models.Model):
         
         super().save(*args, **kwargs)
     
+    @property
+    def stay(self):
+        """Reservación de la reseña, vigente o archivada"""
+        return self.booking or self.archived_booking
+    
     @property
     def average_detailed_rating(self):
         """Calcula el promedio de las calificaciones detalladas"""
@@ -194,6 +223,13 @@ class ReviewHelpful(models.Model):
         return f"{self.user.username} - {self.review}"
 
 
+ARCHIVED_BOOKING_FIELDS = [
+    'archived_total_bookings',
+    'archived_completed_bookings',
+    'archived_cancelled_bookings',
+]
+
+
 class HotelStatistics(models.Model):
     """Estadísticas agregadas del hotel (para optimización)"""
     hotel = models.OneToOneField(
@@ -263,6 +299,21 @@ class HotelStatistics(models.Model):
         default=0
     )
     
+    # Acumulados de reservaciones archivadas (las suma update_statistics
+    # para que los totales no cambien al mover reservas al archivo)
+    archived_total_bookings = models.PositiveIntegerField(
+        _("reservaciones archivadas"),
+        default=0
+    )
+    archived_completed_bookings = models.PositiveIntegerField(
+        _("reservaciones completadas archivadas"),
+        default=0
+    )
+    archived_cancelled_bookings = models.PositiveIntegerField(
+        _("reservaciones canceladas archivadas"),
+        default=0
+    )
+    
     # Timestamps
     last_updated = models.DateTimeField(_("última actualización"), auto_now=True)
     
@@ -318,14 +369,18 @@ class HotelStatistics(models.Model):
             self.avg_value = Decimal('0.00')
             self.recommendation_percentage = Decimal('0.00')
         
-        # Estadísticas de reservaciones
+        # Estadísticas de reservaciones: solo se consultan las vigentes,
+        # las archivadas ya están acumuladas (se releen por si el archivado
+        # corrió después de cargar esta instancia)
+        if self.pk:
+            self.refresh_from_db(fields=ARCHIVED_BOOKING_FIELDS)
         all_bookings = self.hotel.bookings.all()
-        self.total_bookings = all_bookings.count()
+        self.total_bookings = all_bookings.count() + self.archived_total_bookings
         self.completed_bookings = all_bookings.filter(
             payment_status__in=['PAID', 'CONFIRMED']
-        ).count()
+        ).count() + self.archived_completed_bookings
         self.cancelled_bookings = all_bookings.filter(
             payment_status='CANCELLED'
-        ).count()
+        ).count() + self.archived_cancelled_bookings
         
         self.save()
\ No newline at end of file
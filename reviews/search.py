@@ -0,0 +1,147 @@
+# reviews/search.py
+"""
+Búsqueda de texto completo sobre reseñas.
+
+PostgreSQL: columna `search_vector` (tsvector, configuración 'spanish' con
+stemming) con índice GIN; resultados ordenados con ts_rank y fragmentos con
+ts_headline.
+
+SQLite (desarrollo): tabla virtual FTS5 `reviews_review_fts` con el mismo id
+que la reseña; ordena con bm25 y resalta con snippet(). FTS5 no tiene
+stemming en español, así que cada término se busca por prefijo y sin la
+"s" final del plural.
+
+El índice se actualiza en las señales de guardado y borrado; después de
+cargas masivas (update/bulk_create) hay que ejecutar `rebuild_review_search`.
+"""
+import re
+
+from django.contrib.postgres.search import (
+    SearchHeadline, SearchQuery, SearchRank, SearchVector
+)
+from django.db import connection, connections
+from django.db.models import F, FloatField, TextField
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+FTS_TABLE = 'reviews_review_fts'
+SEARCH_CONFIG = 'spanish'
+SEARCH_FIELDS = ['title', 'review_text']
+
+# Marcadores de resaltado: el texto se escapa antes de convertirlos en <mark>
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_STOP = '\x03'
+
+SEARCH_VECTOR = (
+    SearchVector('title', weight='A', config=SEARCH_CONFIG)
+    + SearchVector('review_text', weight='B', config=SEARCH_CONFIG)
+)
+
+
+def fts_query(text):
+    """Convierte texto libre en una consulta FTS5 segura: términos por prefijo unidos con AND"""
+    terms = []
+    for word in re.findall(r'\w+', text.lower()):
+        if len(word) > 4 and word.endswith('s'):
+            word = word[:-1]
+        terms.append(f'"{word}"*')
+    return ' '.join(terms)
+
+
+def search_reviews(queryset, text):
+    """
+    Filtra `queryset` por `text` y anota `search_rank` (mayor es mejor) y
+    `search_snippet` (usar `render_snippet` antes de mostrarlo).
+    """
+    vendor = connections[queryset.db].vendor
+
+    if vendor == 'postgresql':
+        query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+        return queryset.filter(search_vector=query).annotate(
+            # ts_rank es real: en double precision el valor del cursor compara exacto
+            search_rank=Cast(SearchRank(F('search_vector'), query), FloatField()),
+            search_snippet=SearchHeadline(
+                'review_text', query,
+                config=SEARCH_CONFIG,
+                start_sel=HIGHLIGHT_START,
+                stop_sel=HIGHLIGHT_STOP,
+                max_words=35,
+                min_words=15,
+            ),
+        )
+
+    if vendor == 'sqlite':
+        match = fts_query(text)
+        if not match:
+            return queryset.none()
+        row = f'{FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = "reviews_reviewandrating"."id"'
+        return queryset.filter(
+            pk__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+        ).annotate(
+            search_rank=RawSQL(
+                f'SELECT -bm25({FTS_TABLE}, 2.0, 1.0) FROM {FTS_TABLE} WHERE {row}',
+                [match], output_field=FloatField()
+            ),
+            search_snippet=RawSQL(
+                f"SELECT snippet({FTS_TABLE}, 1, %s, %s, '…', 24) FROM {FTS_TABLE} WHERE {row}",
+                [HIGHLIGHT_START, HIGHLIGHT_STOP, match], output_field=TextField()
+            ),
+        )
+
+    # Otros motores: sin índice, búsqueda simple
+    return queryset.filter(review_text__icontains=text).annotate(
+        search_rank=RawSQL('0', [], output_field=FloatField()),
+        search_snippet=F('review_text'),
+    )
+
+
+def matching_ids(text):
+    """Ids de reseñas que coinciden con `text`, para usar en `pk__in`"""
+    from .models import ReviewAndRating
+
+    return search_reviews(ReviewAndRating.objects.order_by(), text).values('pk')
+
+
+def render_snippet(snippet):
+    """Escapa el fragmento y convierte los marcadores en <mark>"""
+    html = escape(snippet or '')
+    return mark_safe(html.replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_STOP, '</mark>'))
+
+
+def index_reviews(pks):
+    """Actualiza el índice de búsqueda de las reseñas indicadas"""
+    from .models import ReviewAndRating
+
+    pks = list(pks)
+    if connection.vendor == 'postgresql':
+        ReviewAndRating.objects.filter(pk__in=pks).update(search_vector=SEARCH_VECTOR)
+    elif connection.vendor == 'sqlite':
+        rows = ReviewAndRating.objects.filter(pk__in=pks).values_list('pk', *SEARCH_FIELDS)
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(pk,) for pk in pks])
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, review_text) VALUES (%s, %s, %s)',
+                list(rows)
+            )
+
+
+def unindex_review(pk):
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [pk])
+
+
+def rebuild_index(batch_size=500):
+    """Reconstruye el índice completo por lotes; retorna cuántas reseñas indexó"""
+    from .models import ReviewAndRating
+
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+
+    pks = list(ReviewAndRating.objects.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(pks), batch_size):
+        index_reviews(pks[start:start + batch_size])
+    return len(pks)
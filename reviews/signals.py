@@ -1,7 +1,9 @@
 # reviews/signals.py
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
+from config.content_cache import bump_content_version
 from .models import ReviewAndRating, ReviewHelpful, HotelStatistics
+from .search import SEARCH_FIELDS, index_reviews, unindex_review
 
 
 @receiver(post_save, sender=ReviewAndRating)
@@ -35,4 +37,26 @@ def decrease_helpful_count(sender, instance, **kwargs):
     """Disminuye el contador de votos útiles cuando se elimina un voto"""
     review = instance.review
     review.helpful_count = review.helpful_votes.count()
-    review.save(update_fields=['helpful_count'])
\ No newline at end of file
+    review.save(update_fields=['helpful_count'])
+
+
+@receiver(post_save, sender=ReviewAndRating)
+@receiver(post_delete, sender=ReviewAndRating)
+@receiver(post_save, sender=HotelStatistics)
+def invalidate_review_pages(sender, **kwargs):
+    """Invalida las páginas públicas cacheadas al cambiar reseñas o estadísticas"""
+    bump_content_version()
+
+
+@receiver(post_save, sender=ReviewAndRating)
+def update_review_search_index(sender, instance, update_fields=None, **kwargs):
+    """Mantiene el índice de búsqueda de texto al guardar una reseña"""
+    # Guardados parciales como el de helpful_count no tocan el texto
+    if update_fields is not None and not set(update_fields) & set(SEARCH_FIELDS):
+        return
+    index_reviews([instance.pk])
+
+
+@receiver(post_delete, sender=ReviewAndRating)
+def remove_review_search_index(sender, instance, **kwargs):
+    unindex_review(instance.pk)
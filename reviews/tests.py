@@ -1,3 +1,164 @@
-from django.test import TestCase
+# reviews/tests.py
+from unittest import skipUnless
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from bookings.models import Hotel
+from .models import ReviewAndRating
+from .search import HIGHLIGHT_START, HIGHLIGHT_STOP, fts_query, render_snippet, search_reviews
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def create_hotel(slug='hotel-prueba'):
+    return Hotel.objects.create(
+        name='Hotel Prueba', slug=slug, address='Calle 1', city='Pátzcuaro',
+        state='Michoacán', postal_code='61600', phone='0', email='hotel@example.com', description='-'
+    )
+
+
+def create_review(user, hotel, title, review_text, **fields):
+    fields = {
+        'rating': 4, 'cleanliness_rating': 4, 'service_rating': 4,
+        'location_rating': 4, 'value_rating': 4, **fields
+    }
+    return ReviewAndRating.objects.create(user=user, hotel=hotel, title=title, review_text=review_text, **fields)
+
+
+class SnippetTests(SimpleTestCase):
+    """El fragmento se escapa antes de convertir los marcadores en <mark>"""
+
+    def test_markup_in_review_is_escaped(self):
+        html = render_snippet(f'<script>alert(1)</script> muy {HIGHLIGHT_START}limpia{HIGHLIGHT_STOP} & "bonita"')
+        self.assertEqual(
+            html,
+            '&lt;script&gt;alert(1)&lt;/script&gt; muy <mark>limpia</mark> &amp; &quot;bonita&quot;'
+        )
+
+    def test_empty_snippet(self):
+        self.assertEqual(render_snippet(None), '')
+
+    def test_fts_query_quotes_terms(self):
+        self.assertEqual(fts_query('Habitaciones LIMPIAS'), '"habitacione"* "limpia"*')
+        # Operadores y comillas de FTS5 no llegan a la consulta
+        self.assertEqual(fts_query('lago" OR NEAR(x'), '"lago"* "or"* "near"* "x"*')
+        self.assertEqual(fts_query('¡¿!?'), '')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'índice FTS5 de SQLite')
+@override_settings(CACHES=LOCMEM_CACHE)
+class SqliteSearchTests(TestCase):
+    """search_reviews con la tabla FTS5 que mantienen las señales"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user('huesped', 'huesped@example.com', 'x')
+        cls.hotel = create_hotel()
+        cls.lake = create_review(cls.user, cls.hotel, 'Vista al lago', 'Las habitaciones estaban limpias y el lago precioso.')
+        cls.noise = create_review(cls.user, cls.hotel, 'Ruido', 'Habitación ruidosa, aunque se veía el lago <b>al fondo</b>.')
+        cls.breakfast = create_review(cls.user, cls.hotel, 'Desayuno', 'Excelente desayuno con pan de la región.')
+
+    def search(self, text):
+        return search_reviews(ReviewAndRating.objects.all(), text)
+
+    def test_prefix_and_plural_match(self):
+        self.assertEqual(set(self.search('lagos')), {self.lake, self.noise})
+        self.assertEqual(list(self.search('desayunos')), [self.breakfast])
+        self.assertEqual(list(self.search('piscina')), [])
+        self.assertEqual(list(self.search('!!')), [])
+
+    def test_title_match_ranks_first(self):
+        results = list(self.search('lago').order_by('-search_rank'))
+        self.assertEqual(results, [self.lake, self.noise])
+        self.assertGreater(results[0].search_rank, results[1].search_rank)
+
+    def test_snippet_highlights_terms_and_escapes_text(self):
+        review = self.search('lago').get(pk=self.noise.pk)
+        self.assertIn(f'{HIGHLIGHT_START}lago{HIGHLIGHT_STOP}', review.search_snippet)
+        html = render_snippet(review.search_snippet)
+        self.assertIn('<mark>lago</mark>', html)
+        self.assertIn('&lt;b&gt;al fondo&lt;/b&gt;', html)
+
+    def test_index_follows_edits_and_deletes(self):
+        self.breakfast.review_text = 'La piscina estaba templada.'
+        self.breakfast.save()
+        self.assertEqual(list(self.search('piscina')), [self.breakfast])
+        self.assertEqual(list(self.search('desayuno')), [self.breakfast])
+
+        self.breakfast.delete()
+        self.assertEqual(list(self.search('piscina')), [])
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ReviewListApiTests(TestCase):
+    """GET /api/v1/reviews/ (vista async)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            'ana', 'ana@example.com', 'x', first_name='Ana', last_name='López'
+        )
+        cls.hotel = create_hotel()
+        cls.other_hotel = create_hotel('otro-hotel')
+        cls.reviews = [
+            create_review(cls.user, cls.hotel, 'Vista al lago', 'El lago desde la terraza.', rating=5),
+            create_review(cls.user, cls.hotel, 'Ruido', 'Se oía la calle; el <b>lago</b> lejos.', rating=3),
+            create_review(cls.user, cls.other_hotel, 'Desayuno', 'Pan de la región.', rating=5),
+        ]
+        create_review(cls.user, cls.hotel, 'Oculta', 'Reseña moderada del lago.', is_active=False)
+
+    def setUp(self):
+        cache.clear()
+
+    async def test_lists_active_reviews_with_computed_fields(self):
+        response = await self.async_client.get('/api/v1/reviews/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['API-Version'], 'v1')
+        results = response.json()['results']
+        self.assertEqual([row['id'] for row in results], [review.pk for review in reversed(self.reviews)])
+        self.assertEqual(results[0]['author'], 'Ana López')
+        self.assertEqual(results[0]['hotel'], 'otro-hotel')
+        self.assertNotIn('snippet', results[0])
+
+    async def test_filters_and_sparse_fields(self):
+        response = await self.async_client.get(
+            '/api/v1/reviews/', {'hotel': 'hotel-prueba', 'rating': '5', 'fields': 'title,id'}
+        )
+        self.assertEqual(response.json()['results'], [{'id': self.reviews[0].pk, 'title': 'Vista al lago'}])
+
+        response = await self.async_client.get('/api/v1/reviews/', {'fields': 'snippet'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error']['details']['fields'], ['snippet'])
+
+    async def test_search_ranks_and_returns_escaped_snippet(self):
+        response = await self.async_client.get('/api/v1/reviews/', {'q': 'lago', 'fields': 'id,snippet'})
+        results = response.json()['results']
+        self.assertEqual([row['id'] for row in results], [self.reviews[0].pk, self.reviews[1].pk])
+        self.assertIn('<mark>lago</mark>', results[1]['snippet'])
+        # ts_headline descarta las etiquetas del texto y FTS5 las conserva: nunca llegan sin escapar
+        self.assertNotIn('<b>', results[1]['snippet'])
+
+    @override_settings(API_PAGE_SIZE=2)
+    async def test_next_cursor_returns_the_rest(self):
+        first = (await self.async_client.get('/api/v1/reviews/', {'fields': 'id'})).json()
+        self.assertEqual(len(first['results']), 2)
+        self.assertIsNone(first['previous'])
+        second = (await self.async_client.get('/api/v1/reviews/', {'fields': 'id', 'cursor': first['next']})).json()
+        self.assertEqual(
+            [row['id'] for row in first['results'] + second['results']],
+            [review.pk for review in reversed(self.reviews)]
+        )
+        self.assertIsNone(second['next'])
+
+    def test_etag_follows_content_version(self):
+        etag = self.client.get('/api/v1/reviews/')['ETag']
+        self.assertEqual(self.client.get('/api/v1/reviews/', headers={'If-None-Match': etag}).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_review(self.user, self.other_hotel, 'Nueva', 'Otra estancia.')
+        response = self.client.get('/api/v1/reviews/', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 4)
@@ -6,15 +6,20 @@ from django.contrib import messages
 from django.http import JsonResponse
 from django.urls import reverse_lazy
 from .models import ReviewAndRating, ReviewHelpful, HotelStatistics
+from .search import render_snippet, search_reviews
 from bookings.models import Booking, Hotel
+from config.conditional import ConditionalGetMixin, make_etag, user_etag_part
+from config.content_cache import get_content_version
+from config.pagination import KeysetPaginationMixin
 
 
-class ReviewListView(ListView):
+class ReviewListView(KeysetPaginationMixin, ListView):
     """Lista todas las reseñas activas"""
     model = ReviewAndRating
     template_name = 'reviews/review_list.html'
     context_object_name = 'reviews'
     paginate_by = 20
+    use_read_replica = True
     
     def get_queryset(self):
         return ReviewAndRating.objects.filter(
@@ -29,6 +34,7 @@ class ReviewDetailView(DetailView):
     model = ReviewAndRating
     template_name = 'reviews/review_detail.html'
     context_object_name = 'review'
+    use_read_replica = True
     
     def get_queryset(self):
         return ReviewAndRating.objects.filter(
@@ -50,7 +56,7 @@ class ReviewCreateView(LoginRequiredMixin, CreateView):
         
         if booking_id:
             try:
-                self.booking = Booking.objects.get(
+                self.booking = Booking.objects.select_related('review').get(
                     booking_id=booking_id,
                     user=request.user,
                     payment_status__in=['PAID', 'CONFIRMED']
@@ -91,17 +97,24 @@ class ReviewCreateView(LoginRequiredMixin, CreateView):
         return context
 
 
-class HotelReviewsView(ListView):
+class HotelReviewsView(ConditionalGetMixin, KeysetPaginationMixin, ListView):
     """Lista las reseñas de un hotel específico"""
     model = ReviewAndRating
     template_name = 'reviews/hotel_reviews.html'
     context_object_name = 'reviews'
     paginate_by = 10
+    use_read_replica = True
     
     def dispatch(self, request, *args, **kwargs):
         self.hotel = get_object_or_404(Hotel, slug=kwargs['hotel_slug'])
         return super().dispatch(request, *args, **kwargs)
     
+    def get_etag(self, request, *args, **kwargs):
+        # Reseñas, votos útiles y estadísticas incrementan la versión del contenido
+        return make_etag(
+            'hotel-reviews', self.hotel.pk, get_content_version(request), user_etag_part(request)
+        )
+    
     def get_queryset(self):
         queryset = ReviewAndRating.objects.filter(
             hotel=self.hotel,
@@ -113,7 +126,12 @@ class HotelReviewsView(ListView):
         if rating:
             queryset = queryset.filter(rating=rating)
         
-        # Ordenar
+        # Búsqueda de texto: por relevancia salvo que se pida otro orden
+        search = self.request.GET.get('q', '').strip()
+        if search:
+            queryset = search_reviews(queryset, search).order_by('-search_rank', '-review_date')
+        
+        # Ordenar (la paginación keyset agrega `id` como desempate)
         ordering = self.request.GET.get('ordering', '-review_date')
         if ordering == 'helpful':
             queryset = queryset.order_by('-helpful_count', '-review_date')
@@ -127,6 +145,12 @@ class HotelReviewsView(ListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['hotel'] = self.hotel
+        context['search'] = self.request.GET.get('q', '').strip()
+        
+        # Fragmentos resaltados de la búsqueda
+        if context['search']:
+            for review in context['reviews']:
+                review.search_snippet_html = render_snippet(review.search_snippet)
         
         # Obtener o crear estadísticas
         stats, created = HotelStatistics.objects.get_or_create(hotel=self.hotel)
@@ -1,15 +1,25 @@
 # rooms/admin.py
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.urls import reverse
 from django.utils.html import format_html
-from .models import Amenity, RoomType, Room
+from config.content_cache import bump_availability_version
+from .availability import update_rooms
+from .channels import sync_channels, sync_lock
+from .ical import feed_token, sync_calendars
+from .models import Amenity, DistributionChannel, ExternalCalendar, RoomBlock, RoomType, Room
 
 
-@admin.register(Amenity)
-class AmenityAdmin(admin.ModelAdmin):
-    list_display = ['name', 'icon', 'is_active']
-    list_filter = ['is_active']
-    search_fields = ['name', 'description']
-    list_editable = ['is_active']
+class ICalFeedMixin:
+    """Enlace al feed iCal (URL firmada) en el formulario de edición, para copiarlo al channel manager"""
+    ical_scope = None
+    readonly_fields = ['ical_feed']
+    
+    @admin.display(description='Calendario iCal')
+    def ical_feed(self, obj):
+        if obj is None or not obj.pk:
+            return '-'
+        url = reverse('rooms:ical_feed', args=[feed_token(self.ical_scope, obj.pk)])
+        return format_html('<a href="{0}" target="_blank">{0}</a>', url)
 
 
 class RoomInline(admin.TabularInline):
@@ -19,7 +29,7 @@ class RoomInline(admin.TabularInline):
 
 
 @admin.register(RoomType)
-class RoomTypeAdmin(admin.ModelAdmin):
+class RoomTypeAdmin(ICalFeedMixin, admin.ModelAdmin):
     list_display = ['name', 'category', 'price_per_night', 'room_capacity', 
                     'total_rooms', 'available_count', 'is_active']
     list_filter = ['category', 'is_active', 'number_of_beds']
@@ -42,22 +52,30 @@ class RoomTypeAdmin(admin.ModelAdmin):
             'fields': ('amenities', 'image')
         }),
         ('Estado', {
-            'fields': ('is_active',)
+            'fields': ('is_active', 'ical_feed')
         }),
     )
+    ical_scope = 'room-type'
     
+    @admin.display(description='Disponibles', ordering='available_now')
     def available_count(self, obj):
-        count = obj.available_rooms_count()
+        count = obj.available_now
         color = 'green' if count > 0 else 'red'
         return format_html(
             '<span style="color: {};">{}/{}</span>',
             color, count, obj.total_rooms
         )
-    available_count.short_description = 'Disponibles'
+
+
+class ExternalCalendarInline(admin.TabularInline):
+    model = ExternalCalendar
+    extra = 0
+    fields = ['name', 'url', 'is_active', 'last_synced_at', 'last_error']
+    readonly_fields = ['last_synced_at', 'last_error']
 
 
 @admin.register(Room)
-class RoomAdmin(admin.ModelAdmin):
+class RoomAdmin(ICalFeedMixin, admin.ModelAdmin):
     list_display = ['room_number', 'room_type', 'floor', 'status', 
                     'is_available', 'updated_at']
     list_filter = ['status', 'is_available', 'floor', 'room_type']
@@ -71,4 +89,108 @@ class RoomAdmin(admin.ModelAdmin):
         ('Estado', {
             'fields': ('status', 'is_available', 'notes')
         }),
+        ('Calendarios', {
+            'fields': ('ical_feed',)
+        }),
     )
+    inlines = [ExternalCalendarInline]
+    ical_scope = 'room'
+    
+    actions = ['mark_available', 'mark_cleaning', 'mark_maintenance']
+    
+    def get_queryset(self, request):
+        # __str__ usa el tipo: listado y autocompletado de reservaciones sin N+1
+        return super().get_queryset(request).select_related('room_type')
+    
+    def set_status(self, request, queryset, status, is_available):
+        # update_rooms mantiene RoomType.available_now (update() no dispara señales)
+        updated = update_rooms(queryset, status=status, is_available=is_available)
+        bump_availability_version()
+        self.message_user(
+            request, f'{updated} habitaciones marcadas como {Room.RoomStatus(status).label.lower()}.'
+        )
+    
+    @admin.action(description='Marcar como disponibles')
+    def mark_available(self, request, queryset):
+        self.set_status(request, queryset, Room.RoomStatus.AVAILABLE, True)
+    
+    @admin.action(description='Marcar en limpieza')
+    def mark_cleaning(self, request, queryset):
+        self.set_status(request, queryset, Room.RoomStatus.CLEANING, False)
+    
+    @admin.action(description='Marcar en mantenimiento')
+    def mark_maintenance(self, request, queryset):
+        self.set_status(request, queryset, Room.RoomStatus.MAINTENANCE, False)
+
+
+class RoomBlockInline(admin.TabularInline):
+    model = RoomBlock
+    extra = 0
+    fields = ['start_date', 'end_date', 'summary', 'uid']
+    readonly_fields = fields
+    can_delete = False
+    
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ExternalCalendar)
+class ExternalCalendarAdmin(admin.ModelAdmin):
+    """Calendarios de canales externos; sus bloqueos solo cambian al sincronizar"""
+    list_display = ['name', 'room', 'is_active', 'last_synced_at', 'has_error']
+    list_filter = ['is_active', 'name']
+    search_fields = ['name', 'url', 'room__room_number']
+    autocomplete_fields = ['room']
+    readonly_fields = ['last_synced_at', 'last_error']
+    inlines = [RoomBlockInline]
+    actions = ['sync_now']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('room')
+    
+    @admin.display(description='Error', boolean=True)
+    def has_error(self, obj):
+        return bool(obj.last_error)
+    
+    @admin.action(description='Sincronizar ahora')
+    def sync_now(self, request, queryset):
+        results = sync_calendars(queryset.select_related('room'))
+        failed = sum(isinstance(result, Exception) for result in results.values())
+        changed = sum(1 for result in results.values() if result and not isinstance(result, Exception))
+        self.message_user(
+            request, f'{len(results)} calendarios sincronizados: {changed} con cambios, {failed} con error.'
+        )
+
+
+@admin.register(DistributionChannel)
+class DistributionChannelAdmin(admin.ModelAdmin):
+    """Canales a los que se empuja el ARI; cada ciclo envía solo lo que cambió (rooms/channels.py)"""
+    list_display = ['name', 'transport', 'is_active', 'last_synced_at', 'last_sync_ranges',
+                    'last_sync_bytes', 'last_sync_ms', 'has_error']
+    list_filter = ['is_active', 'transport']
+    search_fields = ['name', 'endpoint']
+    readonly_fields = ['last_synced_at', 'last_sync_ranges', 'last_sync_bytes', 'last_sync_ms', 'last_error']
+    actions = ['sync_now', 'resend_all']
+    
+    @admin.display(description='Error', boolean=True)
+    def has_error(self, obj):
+        return bool(obj.last_error)
+    
+    def run_sync(self, request, queryset, full=False):
+        with sync_lock() as acquired:
+            if not acquired:
+                self.message_user(request, 'Otro ciclo ARI está en curso; intenta de nuevo en unos segundos.',
+                                  level=messages.WARNING)
+                return
+            results = sync_channels(queryset.filter(is_active=True), full=full)
+        failed = sum(isinstance(result, Exception) for result in results.values())
+        ranges = sum(result['ranges'] for result in results.values() if not isinstance(result, Exception))
+        self.message_user(request, f'{len(results)} canales sincronizados: {ranges} rangos enviados, {failed} con error.')
+    
+    @admin.action(description='Sincronizar ahora')
+    def sync_now(self, request, queryset):
+        self.run_sync(request, queryset)
+    
+    @admin.action(description='Reenviar todo el horizonte')
+    def resend_all(self, request, queryset):
+        self.run_sync(request, queryset, full=True)
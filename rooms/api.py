@@ -0,0 +1,349 @@
+# rooms/api.py
+import asyncio
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+
+from bookings.models import Coupon, price_breakdown
+from config.api import (
+    ApiError, ApiView, AsyncBulkApiView, json_response, paginated_response, parse_fields, parse_ids,
+    parse_int, parse_stay
+)
+from config.conditional import ConditionalGetMixin, make_etag
+from config.content_cache import aget_availability_version, get_availability_version
+from config.events import format_sse, subscribe
+from . import catalog
+from .availability import (
+    aavailable_counts_for_dates, affects_stay, ashared_available_rooms, availability_channel
+)
+from .images import image_url, responsive_image
+from .models import RoomType
+
+ROOM_TYPE_FIELDS = [
+    'id', 'name', 'category', 'price_per_night', 'number_of_beds', 'room_capacity',
+    'size_sqm', 'total_rooms', 'available_now', 'description', 'image', 'amenities',
+]
+
+GALLERY_FIELDS = [
+    'id', 'title', 'category', 'category_display', 'price_per_night',
+    'src', 'srcset_webp', 'srcset_jpg', 'width', 'height', 'large',
+]
+# Ancho máximo de la foto que abre el lightbox
+GALLERY_LARGE_WIDTH = 1920
+
+CENTS = Decimal('0.01')
+
+
+def room_type_rows(queryset, fields):
+    """Filas de `.values()` con solo los campos pedidos; comodidades en una consulta aparte"""
+    columns = ['id'] + [field for field in fields if field not in ('id', 'amenities')]
+    rows = list(queryset.values(*columns))
+
+    if 'image' in fields:
+        for row in rows:
+            row['image'] = default_storage.url(row['image']) if row['image'] else None
+
+    if 'amenities' in fields:
+        amenities = defaultdict(list)
+        links = RoomType.amenities.through.objects.filter(
+            roomtype_id__in=[row['id'] for row in rows],
+            amenity__is_active=True
+        ).order_by('amenity__name').values_list('roomtype_id', 'amenity__name')
+        for room_type_id, name in links:
+            amenities[room_type_id].append(name)
+        for row in rows:
+            row['amenities'] = amenities[row['id']]
+
+    return [{field: row[field] for field in fields} for row in rows]
+
+
+class RoomTypeListApi(ConditionalGetMixin, ApiView):
+    """GET /api/v1/room-types/?ids=1,2&category=SUITE&capacity=2&fields=id,name"""
+
+    def get_etag(self, request, *args, **kwargs):
+        # available_now cambia con la disponibilidad; el resto con el catálogo
+        return make_etag('api-room-types', catalog.get_catalog_version(), get_availability_version())
+
+    def get(self, request):
+        fields = parse_fields(request, ROOM_TYPE_FIELDS)
+        room_types = RoomType.objects.filter(is_active=True).order_by('category', 'price_per_night')
+
+        ids = parse_ids(request.GET.get('ids'))
+        if ids:
+            room_types = room_types.filter(pk__in=ids)
+        if request.GET.get('category'):
+            room_types = room_types.filter(category=request.GET['category'])
+        capacity = parse_int(request.GET.get('capacity'), 'capacity')
+        if capacity:
+            room_types = room_types.filter(room_capacity__gte=capacity)
+
+        return json_response({'results': room_type_rows(room_types, fields)})
+
+
+def gallery_queryset():
+    """Fotos de la galería con solo las columnas que pinta una miniatura (sin la descripción)"""
+    return RoomType.objects.filter(is_active=True).exclude(image='').exclude(image__isnull=True).only(
+        'id', 'name', 'category', 'price_per_night', 'image', 'image_variants'
+    ).order_by('category', 'price_per_night')
+
+
+def gallery_items(room_types):
+    """Elementos de la galería con los derivados de cada foto (o la original si aún no existen)"""
+    items = []
+    for room_type in room_types:
+        image = responsive_image(room_type) or {
+            'src': room_type.image.url, 'srcset_webp': None, 'srcset_jpg': None, 'width': None, 'height': None,
+        }
+        items.append({
+            'id': room_type.pk,
+            'title': room_type.name,
+            'category': room_type.category,
+            'category_display': room_type.get_category_display(),
+            'price_per_night': room_type.price_per_night,
+            **image,
+            'large': image_url(room_type, GALLERY_LARGE_WIDTH),
+        })
+    return items
+
+
+class GalleryApi(ConditionalGetMixin, ApiView):
+    """
+    GET /api/v1/gallery/?category=SUITE&cursor=...&fields=id,src
+
+    Fotos de la galería paginadas por cursor, GALLERY_PAGE_SIZE por página;
+    la página /galeria/ pinta la primera y pide las siguientes al hacer scroll.
+    """
+
+    def get_etag(self, request, *args, **kwargs):
+        return make_etag('api-gallery', catalog.get_catalog_version())
+
+    def get(self, request):
+        fields = parse_fields(request, GALLERY_FIELDS)
+        room_types = gallery_queryset()
+        if request.GET.get('category'):
+            room_types = room_types.filter(category=request.GET['category'])
+        return paginated_response(
+            request, room_types, fields, transform=gallery_items, per_page=settings.GALLERY_PAGE_SIZE
+        )
+
+
+class RoomTypeDetailApi(ConditionalGetMixin, ApiView):
+    """GET /api/v1/room-types/<id>/?fields=..."""
+
+    def get_etag(self, request, *args, **kwargs):
+        return make_etag(
+            'api-room-type', kwargs.get('pk'), catalog.get_catalog_version(), get_availability_version()
+        )
+
+    def get(self, request, pk):
+        fields = parse_fields(request, ROOM_TYPE_FIELDS)
+        rows = room_type_rows(RoomType.objects.filter(pk=pk, is_active=True), fields)
+        if not rows:
+            raise ApiError('Tipo de habitación no encontrado', 404)
+        return json_response(rows[0])
+
+
+async def availability_versions():
+    """Versiones del catálogo y de la disponibilidad, leídas en paralelo"""
+    return await asyncio.gather(catalog.aget_catalog_version(), aget_availability_version())
+
+
+class AvailabilityApi(ConditionalGetMixin, AsyncBulkApiView):
+    """
+    Habitaciones libres por tipo para uno o varios rangos de fechas.
+
+    GET  /api/v1/availability/?check_in=2025-01-10&check_out=2025-01-12&room_types=1,2&guests=2
+    POST /api/v1/availability/ {"items": [{"check_in": ..., "check_out": ..., "room_types": [1, 2]}, ...]}
+
+    Una consulta por rango; los nombres y precios salen del catálogo en cache.
+    """
+
+    async def aget_etag(self, request, *args, **kwargs):
+        return make_etag('api-availability', *await availability_versions())
+
+    async def process_items(self, items):
+        return await asyncio.gather(*(self.check_range(item) for item in items))
+
+    async def check_range(self, item):
+        try:
+            check_in, check_out = parse_stay(item)
+            room_type_ids = parse_ids(item.get('room_types'), 'room_types') or None
+            guests = parse_int(item.get('guests'), 'guests', default=1)
+        except ApiError as error:
+            return error
+
+        counts, room_types = await asyncio.gather(
+            aavailable_counts_for_dates(check_in, check_out, room_type_ids, guests),
+            catalog.aactive_room_types()
+        )
+        room_types = [
+            room_type for room_type in room_types
+            if room_type.room_capacity >= guests
+            and (room_type_ids is None or room_type.pk in room_type_ids)
+        ]
+        return {
+            'check_in': check_in,
+            'check_out': check_out,
+            'nights': (check_out - check_in).days,
+            'guests': guests,
+            'room_types': [
+                {
+                    'id': room_type.pk,
+                    'name': room_type.name,
+                    'price_per_night': room_type.price_per_night,
+                    'available': counts.get(room_type.pk, 0),
+                }
+                for room_type in room_types
+            ],
+        }
+
+
+class QuoteApi(ConditionalGetMixin, AsyncBulkApiView):
+    """
+    Cotización (subtotal, descuento, IVA y total) de uno o varios rangos.
+
+    GET  /api/v1/quotes/?room_type=1&check_in=...&check_out=...&coupon=VERANO
+    POST /api/v1/quotes/ {"items": [{"room_type": 1, "check_in": ..., "check_out": ..., "coupon": ...}]}
+
+    Los cupones de todos los elementos se leen en una sola consulta.
+    """
+
+    async def aget_etag(self, request, *args, **kwargs):
+        # Con cupón el resultado depende de su uso y vigencia: no se cachea
+        if request.GET.get('coupon'):
+            return None
+        return make_etag('api-quote', *await availability_versions())
+
+    async def process_items(self, items):
+        codes = {str(item['coupon']) for item in items if item.get('coupon')}
+        coupons = {}
+        if codes:
+            coupons = {coupon.code: coupon async for coupon in Coupon.objects.filter(code__in=codes)}
+        return await asyncio.gather(*(self.quote(item, coupons) for item in items))
+
+    async def quote(self, item, coupons):
+        try:
+            check_in, check_out = parse_stay(item)
+            room_type_id = parse_int(item.get('room_type'), 'room_type')
+        except ApiError as error:
+            return error
+        if room_type_id is None:
+            return ApiError('Se requiere "room_type"')
+
+        room_type = await catalog.aactive_room_type(room_type_id)
+        if room_type is None:
+            return ApiError('Tipo de habitación no encontrado', 404)
+
+        code = str(item['coupon']) if item.get('coupon') else None
+        coupon = coupons.get(code)
+        nights = (check_out - check_in).days
+        prices = price_breakdown(room_type.price_per_night, nights, coupon)
+        counts = await aavailable_counts_for_dates(check_in, check_out, [room_type.pk])
+
+        return {
+            'room_type': room_type.pk,
+            'check_in': check_in,
+            'check_out': check_out,
+            'nights': nights,
+            'price_per_night': room_type.price_per_night,
+            **{name: amount.quantize(CENTS) for name, amount in prices.items()},
+            'coupon': code or None,
+            'coupon_applied': prices['discount_amount'] > 0,
+            'available': counts.get(room_type.pk, 0),
+        }
+
+
+def stay_availability(room_type_id, check_in, check_out, available):
+    return {
+        'room_type': room_type_id,
+        'check_in': check_in,
+        'check_out': check_out,
+        'available': available,
+    }
+
+
+async def availability_events(room_type_id, check_in, check_out):
+    """
+    Eventos SSE de un tipo y rango: el estado actual y luego un evento cada
+    vez que cambia. Termina tras EVENT_STREAM_MAX_AGE; EventSource reconecta.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.EVENT_STREAM_MAX_AGE
+
+    # Suscrito antes de contar: un cambio entre el conteo y la suscripción no se pierde
+    async with subscribe(availability_channel(room_type_id)) as queue:
+        available = await ashared_available_rooms(room_type_id, check_in, check_out, None)
+        yield format_sse(
+            stay_availability(room_type_id, check_in, check_out, available),
+            event='availability', retry=settings.EVENT_STREAM_RETRY
+        )
+
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                message = await asyncio.wait_for(
+                    queue.get(), timeout=min(settings.EVENT_STREAM_HEARTBEAT, remaining)
+                )
+            except TimeoutError:
+                yield format_sse()
+                continue
+
+            # Una ráfaga (varias reservas confirmadas a la vez) se cuenta una sola vez
+            messages = [message]
+            while not queue.empty():
+                messages.append(queue.get_nowait())
+            relevant = [message for message in messages if affects_stay(message, check_in, check_out)]
+            if not relevant:
+                continue
+
+            event_id = relevant[-1]['id']
+            current = await ashared_available_rooms(room_type_id, check_in, check_out, event_id)
+            if current != available:
+                available = current
+                yield format_sse(
+                    stay_availability(room_type_id, check_in, check_out, available),
+                    event='availability', id=event_id
+                )
+
+
+class AvailabilityStreamApi(ApiView):
+    """
+    Disponibilidad en vivo de un tipo de habitación (Server-Sent Events).
+
+    GET /api/v1/availability/stream/?room_type=1&check_in=2025-01-10&check_out=2025-01-12
+
+    Bajo ASGI la conexión queda abierta y recibe un evento `availability`
+    cada vez que una reserva confirmada cambia las habitaciones libres del
+    rango. Bajo WSGI un worker no puede quedarse esperando: responde solo el
+    estado actual y pide a EventSource reconectar en un minuto.
+    """
+    http_method_names = ['get', 'options']
+
+    async def get(self, request):
+        check_in, check_out = parse_stay(request.GET)
+        room_type_id = parse_int(request.GET.get('room_type'), 'room_type')
+        if room_type_id is None:
+            raise ApiError('Se requiere "room_type"')
+        if await catalog.aactive_room_type(room_type_id) is None:
+            raise ApiError('Tipo de habitación no encontrado', 404)
+
+        if isinstance(request, ASGIRequest):
+            response = StreamingHttpResponse(
+                availability_events(room_type_id, check_in, check_out), content_type='text/event-stream'
+            )
+        else:
+            counts = await aavailable_counts_for_dates(check_in, check_out, [room_type_id])
+            response = HttpResponse(
+                format_sse(
+                    stay_availability(room_type_id, check_in, check_out, counts.get(room_type_id, 0)),
+                    event='availability', retry=60 * 1000
+                ),
+                content_type='text/event-stream'
+            )
+        response['Cache-Control'] = 'no-cache'
+        # nginx no debe acumular el stream en su buffer
+        response['X-Accel-Buffering'] = 'no'
+        return response
@@ -5,3 +5,6 @@ class RoomsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'rooms'
     verbose_name = 'Habitaciones'
+    
+    def ready(self):
+        import rooms.signals
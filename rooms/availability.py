@@ -0,0 +1,181 @@
+# rooms/availability.py
+"""
+Contador desnormalizado RoomType.available_now: habitaciones del tipo con
+is_available=True.
+
+Cada cambio de una habitación ajusta el contador con un UPDATE relativo
+(available_now = available_now ± n), sin leer y reescribir el valor. Las
+señales de Room cubren save() y delete(); los cambios masivos deben pasar por
+`update_rooms`, porque QuerySet.update() no dispara señales. Cualquier
+desviación (ediciones directas en la base de datos, carreras entre dos
+guardados de la misma habitación) la detecta y corrige `reconcile_available_now`.
+
+`available_counts_for_dates` (y su variante async) es el equivalente por
+fechas para varios tipos a la vez (lo usa la API).
+
+Cada cambio confirmado de reservas o habitaciones se publica en el canal
+`availability:<room_type_id>` (config.events) para los clientes conectados
+por Server-Sent Events, y agenda el envío a los canales de distribución
+(rooms.channels).
+"""
+import asyncio
+import uuid
+from collections import Counter
+
+from asgiref.sync import sync_to_async
+from django.db import connections, transaction
+from django.db.models import Count, F, Q, Value
+from django.db.models.functions import Greatest
+
+from config.events import publish
+from .channels import schedule_channel_sync
+
+
+def adjust_available_now(deltas):
+    """Aplica {room_type_id: delta} al contador; nunca baja de cero"""
+    from .models import RoomType
+
+    for room_type_id, delta in deltas.items():
+        if delta:
+            RoomType.objects.filter(pk=room_type_id).update(
+                available_now=Greatest(F('available_now') + delta, Value(0))
+            )
+
+
+def available_by_type(rooms):
+    """Counter {room_type_id: habitaciones disponibles} del queryset de habitaciones"""
+    return Counter(dict(
+        rooms.filter(is_available=True).order_by().values_list('room_type_id').annotate(total=Count('pk'))
+    ))
+
+
+def update_rooms(queryset, **changes):
+    """
+    QuerySet.update() de habitaciones que mantiene available_now; retorna
+    cuántas filas cambió. Las filas se bloquean mientras se calculan los deltas.
+    """
+    from .models import Room
+
+    with transaction.atomic():
+        ids = list(queryset.select_for_update().values_list('pk', flat=True))
+        rooms = Room.objects.filter(pk__in=ids)
+        before = available_by_type(rooms)
+        updated = rooms.update(**changes)
+        after = available_by_type(rooms)
+        adjust_available_now({
+            room_type_id: after[room_type_id] - before[room_type_id]
+            for room_type_id in before.keys() | after.keys()
+        })
+    return updated
+
+
+def reconcile_available_now(fix=True):
+    """
+    Compara available_now con el conteo real; retorna [(tipo, guardado, real)]
+    de los tipos desviados y, con `fix`, los corrige.
+    """
+    from .models import RoomType
+
+    drifted = []
+    room_types = RoomType.objects.annotate(
+        actual=Count('rooms', filter=Q(rooms__is_available=True))
+    ).order_by('pk')
+    for room_type in room_types:
+        if room_type.available_now != room_type.actual:
+            drifted.append((room_type, room_type.available_now, room_type.actual))
+            if fix:
+                RoomType.objects.filter(pk=room_type.pk).update(available_now=room_type.actual)
+    return drifted
+
+
+def available_counts_queryset(check_in, check_out, room_type_ids=None, guests=1):
+    """Pares (room_type_id, habitaciones libres en el rango) para varios tipos en una sola consulta"""
+    from bookings.models import Booking
+    from .models import Room, RoomBlock
+
+    busy_rooms = Booking.objects.filter(
+        check_in_date__lt=check_out,
+        check_out_date__gt=check_in,
+        payment_status__in=['PAID', 'CONFIRMED']
+    ).values('room_id')
+    blocked_rooms = RoomBlock.objects.filter(start_date__lt=check_out, end_date__gt=check_in).values('room_id')
+    rooms = Room.objects.filter(
+        is_available=True,
+        room_type__is_active=True,
+        room_type__room_capacity__gte=guests
+    )
+    if room_type_ids is not None:
+        rooms = rooms.filter(room_type_id__in=room_type_ids)
+    return rooms.exclude(pk__in=busy_rooms).exclude(pk__in=blocked_rooms).order_by().values_list('room_type_id').annotate(total=Count('pk'))
+
+
+def available_counts_for_dates(check_in, check_out, room_type_ids=None, guests=1):
+    """{room_type_id: habitaciones libres en el rango}"""
+    return dict(available_counts_queryset(check_in, check_out, room_type_ids, guests))
+
+
+async def aavailable_counts_for_dates(check_in, check_out, room_type_ids=None, guests=1):
+    queryset = available_counts_queryset(check_in, check_out, room_type_ids, guests)
+    return {room_type_id: total async for room_type_id, total in queryset}
+
+
+def availability_channel(room_type_id):
+    return f'availability:{room_type_id}'
+
+
+def publish_availability_change(room_type_id, check_in=None, check_out=None):
+    """
+    Avisa a los clientes conectados, después del commit, que cambió la
+    disponibilidad del tipo en el rango (sin fechas: en todos los rangos), y
+    agenda el envío del ARI a los canales.
+    """
+    message = {
+        'id': uuid.uuid4().hex,
+        'room_type': room_type_id,
+        'check_in': check_in.isoformat() if check_in else None,
+        'check_out': check_out.isoformat() if check_out else None,
+    }
+    transaction.on_commit(lambda: publish(availability_channel(room_type_id), message))
+    transaction.on_commit(schedule_channel_sync)
+
+
+def affects_stay(message, check_in, check_out):
+    """True si el cambio publicado se cruza con la estancia [check_in, check_out)"""
+    if not message.get('check_in') or not message.get('check_out'):
+        return True
+    return message['check_in'] < check_out.isoformat() and message['check_out'] > check_in.isoformat()
+
+
+def count_available_rooms(room_type_id, check_in, check_out):
+    """
+    Habitaciones libres del tipo en el rango, para correr en un hilo del pool:
+    cierra la conexión al terminar para que una conexión SSE abierta por
+    minutos no retenga una conexión a la base de datos.
+    """
+    try:
+        return available_counts_for_dates(check_in, check_out, [room_type_id]).get(room_type_id, 0)
+    finally:
+        connections.close_all()
+
+
+# (event loop, tipo, rango, evento) → conteo en curso, compartido por los suscriptores
+_pending_counts = {}
+
+
+async def ashared_available_rooms(room_type_id, check_in, check_out, event_id):
+    """
+    count_available_rooms en el pool de hilos. Los clientes del mismo tipo y
+    rango que reaccionan al mismo evento comparten una sola consulta; sin
+    evento (estado inicial al conectar) cada cliente cuenta por su cuenta.
+    """
+    count = sync_to_async(count_available_rooms, thread_sensitive=False)
+    if event_id is None:
+        return await count(room_type_id, check_in, check_out)
+
+    key = (asyncio.get_running_loop(), room_type_id, check_in, check_out, event_id)
+    task = _pending_counts.get(key)
+    if task is None:
+        task = _pending_counts[key] = asyncio.ensure_future(count(room_type_id, check_in, check_out))
+        task.add_done_callback(lambda _: _pending_counts.pop(key, None))
+    # shield: si un cliente se desconecta, la consulta sigue para los demás
+    return await asyncio.shield(task)
@@ -0,0 +1,186 @@
+# rooms/catalog.py
+"""
+Cache de lectura para el catálogo (tipos de habitación, comodidades y hoteles).
+
+Dos niveles: un LRU en memoria del proceso con TTL corto delante de Redis.
+Mientras el TTL local no vence no se toca Redis; al vencer se compara la
+versión del catálogo en Redis (una sola llamada) y solo si cambió se vuelve
+a leer el valor. Las señales de los modelos incrementan la versión, lo que
+invalida el catálogo en todos los workers en a lo más CATALOG_LOCAL_TTL
+segundos.
+
+Los objetos retornados se comparten entre peticiones: no deben modificarse.
+Las variantes `a…` son para vistas async: un acierto en el LRU local no sale
+del event loop; un fallo lee Redis y la base de datos en el hilo del request.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from config.content_cache import aget_version, bump_version, get_version
+
+CATALOG_VERSION_KEY = 'catalog-version'
+
+
+class LocalLRUCache:
+    """LRU en memoria, seguro entre hilos, con vencimiento por entrada"""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Retorna (valor, versión, vencido) o None"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            self._data.move_to_end(key)
+            value, version, expires_at = entry
+            return value, version, time.monotonic() >= expires_at
+
+    def set(self, key, value, version, ttl):
+        with self._lock:
+            self._data[key] = (value, version, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_local = LocalLRUCache(settings.CATALOG_LOCAL_MAX_SIZE)
+
+
+def get_catalog_version():
+    return get_version(CATALOG_VERSION_KEY)
+
+
+async def aget_catalog_version():
+    return await aget_version(CATALOG_VERSION_KEY)
+
+
+def bump_catalog_version(**kwargs):
+    """Invalida el catálogo en todos los procesos (se usa como receptor de señales)"""
+    # Al confirmar: antes, otro worker recargaría los datos sin confirmar bajo la versión nueva
+    transaction.on_commit(invalidate_catalog)
+
+
+def invalidate_catalog():
+    bump_version(CATALOG_VERSION_KEY)
+    _local.clear()
+
+
+def cached(name, loader):
+    """Lectura a través de LRU local → Redis → base de datos"""
+    entry = _local.get(name)
+    if entry is not None and not entry[2]:
+        return entry[0]
+
+    version = get_catalog_version()
+    if entry is not None and entry[1] == version:
+        _local.set(name, entry[0], version, settings.CATALOG_LOCAL_TTL)
+        return entry[0]
+
+    redis_key = f'catalog:{version}:{name}'
+    value = cache.get(redis_key)
+    if value is None:
+        value = loader()
+        cache.set(redis_key, value, settings.CATALOG_CACHE_TIMEOUT)
+
+    _local.set(name, value, version, settings.CATALOG_LOCAL_TTL)
+    return value
+
+
+async def acached(name, loader):
+    entry = _local.get(name)
+    if entry is not None and not entry[2]:
+        return entry[0]
+    return await sync_to_async(cached)(name, loader)
+
+
+# Accesores del catálogo
+
+def load_room_types():
+    from .models import RoomType
+
+    return list(
+        RoomType.objects.filter(is_active=True).prefetch_related('amenities').order_by(
+            'category', 'price_per_night'
+        )
+    )
+
+
+def active_room_types():
+    """Lista de RoomType activos con sus comodidades precargadas, por categoría y precio"""
+    return cached('room-types', load_room_types)
+
+
+async def aactive_room_types():
+    return await acached('room-types', load_room_types)
+
+
+def find_room_type(room_types, pk):
+    for room_type in room_types:
+        if room_type.pk == pk:
+            return room_type
+    return None
+
+
+def active_room_type(pk):
+    """RoomType activo por id, o None"""
+    return find_room_type(active_room_types(), pk)
+
+
+async def aactive_room_type(pk):
+    return find_room_type(await aactive_room_types(), pk)
+
+
+def active_amenities():
+    """Lista de Amenity activas ordenadas por nombre"""
+    from .models import Amenity
+
+    return cached('amenities', lambda: list(Amenity.objects.filter(is_active=True)))
+
+
+def load_hotels():
+    from bookings.models import Hotel
+
+    return list(Hotel.objects.filter(is_active=True))
+
+
+def active_hotels():
+    """Lista de Hotel activos ordenados por nombre"""
+    return cached('hotels', load_hotels)
+
+
+def active_hotel_by_slug(slug):
+    """Hotel activo por slug, o None"""
+    for hotel in active_hotels():
+        if hotel.slug == slug:
+            return hotel
+    return None
+
+
+def main_hotel():
+    """Hotel principal (el primero activo), o None"""
+    hotels = active_hotels()
+    return hotels[0] if hotels else None
+
+
+async def amain_hotel():
+    hotels = await acached('hotels', load_hotels)
+    return hotels[0] if hotels else None
+
+
+def warm():
+    """Carga todo el catálogo en Redis y en el LRU local; retorna (tipos, comodidades, hoteles)"""
+    return active_room_types(), active_amenities(), active_hotels()
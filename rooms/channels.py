@@ -0,0 +1,345 @@
+# rooms/channels.py
+"""
+Sincronización de disponibilidad, tarifas e inventario (ARI) con canales de
+distribución (rooms.DistributionChannel).
+
+Por cada canal se guarda en ChannelAriState el último valor enviado por tipo
+de habitación y noche. Un ciclo:
+
+1. calcula el ARI vigente de todo el horizonte (CHANNEL_ARI_HORIZON_DAYS) con
+   cuatro consultas, una vez para todos los canales;
+2. lo compara con lo enviado a cada canal y se queda con las noches distintas;
+3. junta las noches consecutivas del mismo tipo y valor en rangos
+   ({"room_type": 3, "start": "2026-01-10", "end": "2026-01-14", ...},
+   `end` exclusivo como un check-out);
+4. envía los rangos en mensajes de hasta CHANNEL_ARI_BATCH_SIZE por el
+   transporte del canal y marca como enviado cada mensaje aceptado. Si un
+   mensaje falla, el siguiente ciclo reenvía solo lo que faltó.
+
+Cada cambio confirmado de disponibilidad (publish_availability_change) o de
+tarifas agenda un ciclo con `schedule_channel_sync`, que espera
+CHANNEL_ARI_DEBOUNCE segundos: una ráfaga de reservas viaja en un solo ciclo.
+"""
+import json
+import logging
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import timedelta
+from http.client import HTTPConnection, HTTPSConnection, RemoteDisconnected
+from itertools import chain
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+SYNC_PENDING_KEY = 'channels:ari-sync-pending'
+SYNC_LOCK_KEY = 'channels:ari-sync-lock'
+
+
+class ChannelError(Exception):
+    """El canal rechazó un mensaje"""
+
+
+class LogTransport:
+    """No envía nada: registra cada mensaje (desarrollo, o canales todavía sin API)"""
+
+    def __init__(self, channel):
+        self.channel = channel
+
+    def send(self, body):
+        logger.info('ARI para %s: %s', self.channel, body.decode())
+
+    def close(self):
+        pass
+
+
+class HttpTransport(LogTransport):
+    """POST de cada mensaje JSON al endpoint del canal, reutilizando una conexión por ciclo"""
+
+    def __init__(self, channel):
+        super().__init__(channel)
+        self.url = urlsplit(channel.endpoint)
+        self.connection = None
+
+    def connect(self):
+        connection_class = HTTPSConnection if self.url.scheme == 'https' else HTTPConnection
+        return connection_class(self.url.netloc, timeout=settings.CHANNEL_ARI_TIMEOUT)
+
+    def post(self, body):
+        path = self.url.path or '/'
+        if self.url.query:
+            path = f'{path}?{self.url.query}'
+        headers = {'Content-Type': 'application/json', 'User-Agent': 'HotelYunuen-ARI/1.0'}
+        if self.channel.api_key:
+            headers['Authorization'] = f'Bearer {self.channel.api_key}'
+        self.connection.request('POST', path, body=body, headers=headers)
+        response = self.connection.getresponse()
+        return response, response.read()
+
+    def send(self, body):
+        reused = self.connection is not None
+        if not reused:
+            self.connection = self.connect()
+        try:
+            response, content = self.post(body)
+        except (RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+            if not reused:
+                raise
+            # El canal cerró la conexión keep-alive entre mensajes: se reintenta una vez
+            self.close()
+            self.connection = self.connect()
+            response, content = self.post(body)
+        if not 200 <= response.status < 300:
+            raise ChannelError(f'{response.status} {response.reason}: {content[:200].decode(errors="replace")}')
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+def get_transport(channel):
+    return import_string(settings.CHANNEL_ARI_TRANSPORTS[channel.transport])(channel)
+
+
+def sync_window():
+    """[hoy, hoy + horizonte) en la zona horaria del hotel"""
+    start = timezone.localdate()
+    return start, start + timedelta(days=settings.CHANNEL_ARI_HORIZON_DAYS)
+
+
+def merge_intervals(intervals):
+    """Une intervalos [inicio, fin) traslapados o contiguos"""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def current_ari(start, end):
+    """
+    {(room_type_id, noche): (disponibles, tarifa, cerrado)} de [start, end).
+    Las mismas reglas que available_counts_for_dates, para todas las noches a
+    la vez: las estancias y bloqueos de cada habitación se unen antes de
+    restarse, así una noche reservada y bloqueada cuenta una sola vez.
+    """
+    from bookings.models import Booking
+    from .models import Room, RoomBlock, RoomType
+
+    room_types = RoomType.objects.values_list('pk', 'price_per_night', 'is_active')
+    rooms = dict(Room.objects.filter(is_available=True).values_list('pk', 'room_type_id'))
+    bookings = Booking.objects.filter(
+        room__is_available=True,
+        check_in_date__lt=end,
+        check_out_date__gt=start,
+        payment_status__in=['PAID', 'CONFIRMED']
+    ).values_list('room_id', 'check_in_date', 'check_out_date')
+    blocks = RoomBlock.objects.filter(
+        room__is_available=True,
+        start_date__lt=end,
+        end_date__gt=start
+    ).values_list('room_id', 'start_date', 'end_date')
+
+    busy = defaultdict(list)
+    for room_id, first, last in chain(bookings, blocks):
+        busy[room_id].append((max(first, start), min(last, end)))
+
+    # Diferencias por noche: +1 al entrar una habitación ocupada, -1 al salir
+    length = (end - start).days
+    changes = defaultdict(lambda: [0] * (length + 1))
+    for room_id, intervals in busy.items():
+        if room_id not in rooms:
+            # Se deshabilitó entre una consulta y otra
+            continue
+        counts = changes[rooms[room_id]]
+        for first, last in merge_intervals(intervals):
+            if first < last:
+                counts[(first - start).days] += 1
+                counts[(last - start).days] -= 1
+
+    totals = Counter(rooms.values())
+    ari = {}
+    for room_type_id, rate, is_active in room_types:
+        counts = changes.get(room_type_id) or [0] * (length + 1)
+        occupied = 0
+        for offset in range(length):
+            occupied += counts[offset]
+            available = totals[room_type_id] - occupied if is_active else 0
+            ari[(room_type_id, start + timedelta(days=offset))] = (available, rate, not is_active)
+    return ari
+
+
+def pushed_ari(channel, start, end):
+    """Lo último que se envió al canal, con la misma forma que current_ari"""
+    states = channel.ari_states.filter(date__gte=start, date__lt=end).values_list(
+        'room_type_id', 'date', 'available', 'rate', 'closed'
+    )
+    return {(room_type_id, date): (available, rate, closed) for room_type_id, date, available, rate, closed in states}
+
+
+def diff_ari(current, pushed):
+    """[(room_type_id, noche, valor)] de las noches que cambiaron, ordenadas"""
+    return sorted(
+        (room_type_id, date, value)
+        for (room_type_id, date), value in current.items()
+        if pushed.get((room_type_id, date)) != value
+    )
+
+
+def coalesce_ranges(changes):
+    """Noches consecutivas del mismo tipo y valor → [(room_type_id, inicio, fin, valor)]"""
+    ranges = []
+    for room_type_id, date, value in changes:
+        if ranges and ranges[-1][0] == room_type_id and ranges[-1][2] == date and ranges[-1][3] == value:
+            ranges[-1][2] = date + timedelta(days=1)
+        else:
+            ranges.append([room_type_id, date, date + timedelta(days=1), value])
+    return [tuple(item) for item in ranges]
+
+
+def encode_message(ranges):
+    updates = [
+        {'room_type': room_type_id, 'start': first, 'end': last, 'available': available, 'rate': rate, 'closed': closed}
+        for room_type_id, first, last, (available, rate, closed) in ranges
+    ]
+    return json.dumps({'updates': updates}, cls=DjangoJSONEncoder, separators=(',', ':')).encode()
+
+
+def save_pushed(channel, ranges, pushed_at):
+    """Marca como enviadas las noches de los rangos (upsert en bloque)"""
+    from .models import ChannelAriState
+
+    ChannelAriState.objects.bulk_create(
+        [
+            ChannelAriState(
+                channel=channel, room_type_id=room_type_id, date=first + timedelta(days=offset),
+                available=available, rate=rate, closed=closed, pushed_at=pushed_at
+            )
+            for room_type_id, first, last, (available, rate, closed) in ranges
+            for offset in range((last - first).days)
+        ],
+        update_conflicts=True,
+        unique_fields=['channel', 'room_type', 'date'],
+        update_fields=['available', 'rate', 'closed', 'pushed_at'],
+        batch_size=1000,
+    )
+
+
+def sync_channel(channel, current, window):
+    """
+    Envía al canal las noches que cambiaron desde el último envío. Retorna
+    las métricas del ciclo: rangos, noches, mensajes, bytes, ms de cálculo y
+    ms de envío. Un error de transporte se propaga después de guardar lo que
+    el canal sí aceptó.
+    """
+    from .models import DistributionChannel
+
+    started = time.perf_counter()
+    changes = diff_ari(current, pushed_ari(channel, *window))
+    ranges = coalesce_ranges(changes)
+    stats = {
+        'ranges': len(ranges), 'nights': len(changes), 'messages': 0, 'bytes': 0,
+        'compute_ms': (time.perf_counter() - started) * 1000, 'send_ms': 0,
+    }
+
+    transport = get_transport(channel)
+    error = ''
+    try:
+        for offset in range(0, len(ranges), settings.CHANNEL_ARI_BATCH_SIZE):
+            batch = ranges[offset:offset + settings.CHANNEL_ARI_BATCH_SIZE]
+            body = encode_message(batch)
+            sent = time.perf_counter()
+            transport.send(body)
+            stats['send_ms'] += (time.perf_counter() - sent) * 1000
+            stats['messages'] += 1
+            stats['bytes'] += len(body)
+            save_pushed(channel, batch, timezone.now())
+    except Exception as exc:
+        error = str(exc) or exc.__class__.__name__
+        raise
+    finally:
+        transport.close()
+        DistributionChannel.objects.filter(pk=channel.pk).update(
+            last_synced_at=timezone.now(),
+            last_sync_ranges=stats['ranges'],
+            last_sync_bytes=stats['bytes'],
+            last_sync_ms=round((time.perf_counter() - started) * 1000),
+            last_error=error,
+        )
+    return stats
+
+
+def sync_channels(channels, full=False):
+    """
+    Un ciclo para varios canales: el ARI vigente se calcula una sola vez.
+    Retorna {canal: métricas o excepción}. Con `full` se olvida lo enviado y
+    se reenvía todo el horizonte.
+    """
+    from .models import ChannelAriState
+
+    channels = list(channels)
+    if not channels:
+        return {}
+    window = sync_window()
+    # Las noches pasadas ya no se venden: su estado no se vuelve a comparar
+    ChannelAriState.objects.filter(date__lt=window[0]).delete()
+    if full:
+        ChannelAriState.objects.filter(channel__in=channels).delete()
+
+    started = time.perf_counter()
+    current = current_ari(*window)
+    ari_ms = (time.perf_counter() - started) * 1000
+
+    results = {}
+    for channel in channels:
+        try:
+            results[channel] = sync_channel(channel, current, window)
+            results[channel]['compute_ms'] += ari_ms
+        except Exception as exc:
+            logger.warning('No se pudo sincronizar el ARI de %s', channel, exc_info=True)
+            results[channel] = exc
+    return results
+
+
+def active_channels():
+    from .models import DistributionChannel
+
+    return DistributionChannel.objects.filter(is_active=True)
+
+
+@contextmanager
+def sync_lock():
+    """
+    Un ciclo a la vez: dos ciclos simultáneos podrían entregar al canal un
+    valor viejo después de uno nuevo. Produce False si otro ciclo está en curso.
+    """
+    acquired = cache.add(SYNC_LOCK_KEY, 1, timeout=settings.CHANNEL_ARI_LOCK_TIMEOUT)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            cache.delete(SYNC_LOCK_KEY)
+
+
+def schedule_channel_sync():
+    """
+    Agenda un ciclo dentro de CHANNEL_ARI_DEBOUNCE segundos si no hay uno
+    pendiente; los cambios de esa ventana viajan juntos. Si el broker no
+    responde, el ciclo periódico de Celery Beat los envía.
+    """
+    from .tasks import push_channel_ari
+
+    try:
+        if cache.add(SYNC_PENDING_KEY, 1, timeout=settings.CHANNEL_ARI_DEBOUNCE + 60):
+            push_channel_ari.apply_async(countdown=settings.CHANNEL_ARI_DEBOUNCE)
+    except Exception:
+        logger.warning('No se pudo agendar la sincronización ARI', exc_info=True)
@@ -0,0 +1,368 @@
+# rooms/ical.py
+"""
+Calendarios iCalendar (RFC 5545) de ocupación.
+
+Exportación: un feed .ics por habitación, tipo de habitación u hotel con las
+reservas pagadas o confirmadas (sin datos del huésped) y los bloqueos
+externos. Los eventos se leen con `.iterator()` (cursor del lado del
+servidor en PostgreSQL) y se envían conforme se generan. La URL lleva un
+token firmado, así los channel managers la consultan sin sesión.
+
+Importación: cada ExternalCalendar se descarga con GET condicional; si el
+canal responde 304 o el contenido no cambió (mismo hash) no se toca la base
+de datos. Si cambió, se compara evento por evento (UID) con los RoomBlock
+guardados y solo se insertan, actualizan o borran las diferencias. Una
+respuesta que no es un VCALENDAR completo (página de error, descarga
+cortada) se rechaza: sin eventos, borraría todos los bloqueos del canal.
+"""
+import hashlib
+import logging
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone as dt_timezone
+from urllib.error import HTTPError
+
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+FEED_SCOPES = ('room', 'room-type', 'hotel')
+FEED_SALT = 'rooms.ical'
+PRODID = '-//Hotel Yunuen//Reservaciones//ES'
+UID_DOMAIN = 'hotelyunuen.com'
+# Eventos por bloque enviado al cliente
+EVENTS_PER_CHUNK = 100
+
+
+class CalendarError(ValueError):
+    """La respuesta del canal no es un iCalendar completo"""
+
+
+# Exportación
+
+def feed_token(scope, pk):
+    """Token firmado para la URL pública del feed: room-5:<firma>"""
+    return signing.Signer(salt=FEED_SALT).sign(f'{scope}-{pk}')
+
+
+def parse_feed_token(token):
+    """(scope, pk) del token; BadSignature si fue alterado"""
+    value = signing.Signer(salt=FEED_SALT).unsign(token)
+    scope, _, pk = value.rpartition('-')
+    if scope not in FEED_SCOPES or not pk.isdigit():
+        raise signing.BadSignature(token)
+    return scope, int(pk)
+
+
+def escape_text(value):
+    return (
+        str(value).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+    )
+
+
+def fold(line):
+    """Parte las líneas de más de 75 octetos (RFC 5545 §3.1)"""
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts, start = [], 0
+    while start < len(encoded):
+        end = start + (75 if not parts else 74)
+        # No cortar a la mitad de un carácter UTF-8
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(encoded[start:end].decode())
+        start = end
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def format_date(value):
+    return value.strftime('%Y%m%d')
+
+
+def format_timestamp(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def event_lines(uid, start, end, summary, stamp):
+    return ''.join(fold(line) for line in (
+        'BEGIN:VEVENT',
+        f'UID:{uid}',
+        f'DTSTAMP:{format_timestamp(stamp)}',
+        f'DTSTART;VALUE=DATE:{format_date(start)}',
+        f'DTEND;VALUE=DATE:{format_date(end)}',
+        f'SUMMARY:{escape_text(summary)}',
+        'TRANSP:OPAQUE',
+        'END:VEVENT',
+    ))
+
+
+def feed_window_start():
+    """Las estancias que terminaron hace más de ICAL_PAST_DAYS no se exportan"""
+    return timezone.localdate() - timedelta(days=settings.ICAL_PAST_DAYS)
+
+
+def feed_bookings(scope, pk):
+    from bookings.models import Booking
+
+    filters = {'room': 'room_id', 'room-type': 'room__room_type_id', 'hotel': 'hotel_id'}
+    return Booking.objects.filter(
+        **{filters[scope]: pk},
+        check_out_date__gte=feed_window_start(),
+        payment_status__in=['PAID', 'CONFIRMED'],
+    ).order_by('check_in_date').values_list(
+        'booking_id', 'room__room_number', 'check_in_date', 'check_out_date', 'updated_at'
+    )
+
+
+def feed_blocks(scope, pk):
+    """Bloqueos externos del feed; las habitaciones no pertenecen a un hotel, así que el de hotel no los lleva"""
+    from .models import RoomBlock
+
+    if scope == 'hotel':
+        return RoomBlock.objects.none().values_list()
+    filters = {'room': 'room_id', 'room-type': 'room__room_type_id'}
+    return RoomBlock.objects.filter(
+        **{filters[scope]: pk},
+        end_date__gte=feed_window_start(),
+    ).order_by('start_date').values_list(
+        'calendar_id', 'uid', 'room__room_number', 'start_date', 'end_date', 'calendar__name',
+        'calendar__last_synced_at'
+    )
+
+
+def feed_name(scope, pk):
+    """Nombre del calendario; None si el objeto no existe"""
+    from bookings.models import Hotel
+    from .models import Room, RoomType
+
+    if scope == 'room':
+        number = Room.objects.filter(pk=pk).values_list('room_number', flat=True).first()
+        return number and f'Habitación {number}'
+    model = RoomType if scope == 'room-type' else Hotel
+    return model.objects.filter(pk=pk).values_list('name', flat=True).first()
+
+
+def feed_chunks(scope, pk, name):
+    """Genera el .ics por bloques, leyendo reservas y bloqueos con cursores del lado del servidor"""
+    chunk_size = settings.ICAL_ITERATOR_CHUNK_SIZE
+    header = [
+        'BEGIN:VCALENDAR', 'VERSION:2.0', f'PRODID:{PRODID}', 'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH', f'X-WR-CALNAME:{escape_text(name)}',
+    ]
+    yield ''.join(fold(line) for line in header)
+
+    buffer = []
+    for booking_id, room_number, check_in, check_out, updated_at in feed_bookings(scope, pk).iterator(chunk_size):
+        buffer.append(event_lines(
+            f'{booking_id}@{UID_DOMAIN}', check_in, check_out, f'Reservado - Habitación {room_number}', updated_at
+        ))
+        if len(buffer) >= EVENTS_PER_CHUNK:
+            yield ''.join(buffer)
+            buffer.clear()
+
+    for calendar_id, uid, room_number, start, end, source, synced_at in feed_blocks(scope, pk).iterator(chunk_size):
+        buffer.append(event_lines(
+            f'block-{calendar_id}-{hashlib.md5(uid.encode()).hexdigest()}@{UID_DOMAIN}', start, end,
+            f'Bloqueado ({source}) - Habitación {room_number}', synced_at or timezone.now()
+        ))
+        if len(buffer) >= EVENTS_PER_CHUNK:
+            yield ''.join(buffer)
+            buffer.clear()
+
+    buffer.append(fold('END:VCALENDAR'))
+    yield ''.join(buffer)
+
+
+# Importación
+
+def unfold(lines):
+    """Une las líneas de continuación (las que empiezan con espacio o tabulador)"""
+    current = None
+    for raw in lines:
+        line = raw.rstrip('\r\n')
+        if line[:1] in (' ', '\t') and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current:
+        yield current
+
+
+def parse_value_date(value):
+    """DTSTART/DTEND como fecha: 20250110 o 20250110T150000[Z]"""
+    return datetime.strptime(value[:8], '%Y%m%d').date()
+
+
+def parse_events(lines):
+    """
+    (uid, inicio, fin, descripción) de cada VEVENT; recorre las líneas una
+    sola vez. Los eventos cancelados o sin fechas válidas se omiten.
+    """
+    event = None
+    for line in unfold(lines):
+        name, _, value = line.partition(':')
+        key = name.split(';', 1)[0].upper()
+        if key == 'BEGIN' and value.upper() == 'VEVENT':
+            event = {}
+        elif key == 'END' and value.upper() == 'VEVENT' and event is not None:
+            parsed = build_event(event)
+            if parsed:
+                yield parsed
+            event = None
+        elif event is not None and key in ('UID', 'DTSTART', 'DTEND', 'SUMMARY', 'STATUS'):
+            event[key] = value
+
+
+def parse_calendar(lines):
+    """{uid: evento} de un VCALENDAR completo; CalendarError si falta el sobre o un END:VEVENT"""
+    lines = [line for line in unfold(lines) if line.strip()]
+    if not lines or lines[0].lstrip('\ufeff').strip().upper() != 'BEGIN:VCALENDAR':
+        raise CalendarError('la respuesta no es un iCalendar (falta BEGIN:VCALENDAR)')
+    if lines[-1].strip().upper() != 'END:VCALENDAR':
+        raise CalendarError('calendario incompleto (falta END:VCALENDAR)')
+    markers = Counter(line.strip().upper() for line in lines)
+    if markers['BEGIN:VEVENT'] != markers['END:VEVENT']:
+        raise CalendarError('calendario incompleto (un VEVENT no tiene END:VEVENT)')
+    return {event[0]: event for event in parse_events(lines)}
+
+
+def build_event(event):
+    try:
+        start = parse_value_date(event['DTSTART'])
+        end = parse_value_date(event['DTEND']) if event.get('DTEND') else start + timedelta(days=1)
+    except (KeyError, ValueError):
+        return None
+    if event.get('STATUS', '').upper() == 'CANCELLED' or end <= start:
+        return None
+    uid = event.get('UID') or f'{start.isoformat()}-{end.isoformat()}'
+    summary = event.get('SUMMARY', '').replace('\\,', ',').replace('\\;', ';').replace('\\n', ' ')
+    return uid[:255], start, end, summary[:200]
+
+
+def fetch_calendar(calendar):
+    """
+    Descarga el calendario con GET condicional. Retorna None si no cambió
+    (304 o mismo hash) o (eventos, etag, last_modified, hash); CalendarError
+    si el contenido no es un VCALENDAR completo.
+    """
+    request = urllib.request.Request(calendar.url, headers={'User-Agent': 'HotelYunuen-iCal/1.0'})
+    if calendar.etag:
+        request.add_header('If-None-Match', calendar.etag)
+    if calendar.last_modified:
+        request.add_header('If-Modified-Since', calendar.last_modified)
+
+    try:
+        response = urllib.request.urlopen(request, timeout=settings.ICAL_FETCH_TIMEOUT)
+    except HTTPError as error:
+        if error.code == 304:
+            return None
+        raise
+
+    with response:
+        digest = hashlib.sha256()
+        lines = []
+        for raw in response:
+            digest.update(raw)
+            lines.append(raw.decode('utf-8', errors='replace'))
+    content_hash = digest.hexdigest()
+    if content_hash == calendar.content_hash:
+        return None
+    return (
+        parse_calendar(lines),
+        response.headers.get('ETag', ''),
+        response.headers.get('Last-Modified', ''),
+        content_hash,
+    )
+
+
+def diff_blocks(calendar, events):
+    """(nuevos, modificados, uids a borrar) respecto a los RoomBlock guardados"""
+    from .models import RoomBlock
+
+    current = {block.uid: block for block in RoomBlock.objects.filter(calendar=calendar)}
+    created, updated = [], []
+    for uid, (_, start, end, summary) in events.items():
+        block = current.get(uid)
+        if block is None:
+            created.append(RoomBlock(
+                calendar=calendar, room_id=calendar.room_id, uid=uid,
+                start_date=start, end_date=end, summary=summary
+            ))
+        elif (block.start_date, block.end_date, block.summary, block.room_id) != (start, end, summary, calendar.room_id):
+            block.start_date, block.end_date, block.summary, block.room_id = start, end, summary, calendar.room_id
+            updated.append(block)
+    deleted = [block for uid, block in current.items() if uid not in events]
+    return created, updated, deleted
+
+
+def apply_calendar(calendar, events, etag='', last_modified='', content_hash=''):
+    """Guarda solo las diferencias en bloque e invalida la disponibilidad si hubo alguna"""
+    from config.content_cache import bump_availability_version
+    from .availability import publish_availability_change
+    from .models import ExternalCalendar, RoomBlock
+
+    created, updated, deleted = diff_blocks(calendar, events)
+    with transaction.atomic():
+        RoomBlock.objects.bulk_create(created, batch_size=500)
+        RoomBlock.objects.bulk_update(updated, ['start_date', 'end_date', 'summary', 'room'], batch_size=500)
+        RoomBlock.objects.filter(pk__in=[block.pk for block in deleted]).delete()
+        ExternalCalendar.objects.filter(pk=calendar.pk).update(
+            etag=etag, last_modified=last_modified, content_hash=content_hash,
+            last_synced_at=timezone.now(), last_error=''
+        )
+        changed = created + updated + deleted
+        if changed:
+            bump_availability_version()
+            room_type_id = calendar.room.room_type_id
+            publish_availability_change(
+                room_type_id,
+                min(block.start_date for block in changed),
+                max(block.end_date for block in changed),
+            )
+    return len(created), len(updated), len(deleted)
+
+
+def sync_calendars(calendars, workers=None):
+    """
+    Descarga los calendarios en paralelo (solo red, sin tocar la BD) y aplica
+    los cambios en este hilo. Retorna {calendario: (nuevos, modificados,
+    borrados), None si no cambió, o la excepción}; los errores quedan en
+    `last_error`.
+    """
+    from .models import ExternalCalendar
+
+    calendars = list(calendars)
+    results = {}
+    if not calendars:
+        return results
+    workers = max(1, min(workers or settings.ICAL_FETCH_WORKERS, len(calendars)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(fetch_calendar, calendar): calendar for calendar in calendars}
+        for future in as_completed(futures):
+            calendar = futures[future]
+            try:
+                fetched = future.result()
+            except Exception as exc:
+                logger.warning('No se pudo descargar el calendario %s', calendar.url, exc_info=True)
+                ExternalCalendar.objects.filter(pk=calendar.pk).update(last_error=str(exc)[:1000])
+                results[calendar] = exc
+                continue
+            if fetched is None:
+                ExternalCalendar.objects.filter(pk=calendar.pk).update(last_synced_at=timezone.now(), last_error='')
+                results[calendar] = None
+            else:
+                results[calendar] = apply_calendar(calendar, *fetched)
+    return results
+
+
+def active_calendars():
+    from .models import ExternalCalendar
+
+    return ExternalCalendar.objects.filter(is_active=True).select_related('room')
@@ -0,0 +1,200 @@
+# rooms/images.py
+"""
+Derivados responsivos de las fotos de RoomType.
+
+Cada foto se reescala a varios anchos en WebP y JPEG y se guarda en el
+storage bajo una llave determinista (derivatives/room_types/suite.jpg-640w.webp).
+RoomType.image_variants recuerda de qué archivo salieron y qué anchos
+existen, así el template tag arma el srcset sin tocar el storage.
+"""
+import io
+import logging
+import posixpath
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+IMAGE_WIDTHS = (320, 640, 960, 1280, 1920)
+# Extensión → formato de Pillow y opciones de codificación
+IMAGE_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+DERIVATIVES_DIR = 'derivatives'
+# Versión del esquema de llaves guardada en image_variants; la 1 quitaba la
+# extensión del original, así que a.jpg y a.png compartían derivados
+DERIVATIVES_LAYOUT = 2
+
+
+def derivative_name(name, width, extension, layout=DERIVATIVES_LAYOUT):
+    """Llave del derivado: depende solo del archivo original, el ancho y el formato"""
+    if layout < 2:
+        name = posixpath.splitext(name)[0]
+    return f'{DERIVATIVES_DIR}/{name}-{width}w.{extension}'
+
+
+def target_widths(width):
+    """Anchos menores al original, más el original (limitado al mayor de IMAGE_WIDTHS)"""
+    widths = {w for w in IMAGE_WIDTHS if w < width}
+    widths.add(min(width, IMAGE_WIDTHS[-1]))
+    return sorted(widths)
+
+
+def open_rgb(name, storage, max_width):
+    with storage.open(name, 'rb') as source:
+        image = Image.open(source)
+        # Los JPEG se decodifican ya reducidos (escala DCT) si sobran píxeles
+        image.draft('RGB', (max_width, max_width))
+        image = ImageOps.exif_transpose(image)
+        image.load()
+
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def generate_derivatives(name, storage=None):
+    """Genera todos los derivados de una imagen; retorna el valor para RoomType.image_variants"""
+    storage = storage or default_storage
+    image = open_rgb(name, storage, IMAGE_WIDTHS[-1])
+    width, height = image.size
+
+    # Del más grande al más chico: cada uno se reduce desde el anterior
+    for target in reversed(target_widths(width)):
+        if target < image.width:
+            size = (target, max(1, round(height * target / width)))
+            image = image.resize(size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+        for extension, (image_format, options) in IMAGE_FORMATS.items():
+            buffer = io.BytesIO()
+            image.save(buffer, image_format, **options)
+            key = derivative_name(name, target, extension)
+            # Llave fija: se reemplaza en lugar de que el storage agregue un sufijo
+            if storage.exists(key):
+                storage.delete(key)
+            storage.save(key, ContentFile(buffer.getvalue()))
+
+    return {
+        'name': name,
+        'width': width,
+        'height': height,
+        'widths': target_widths(width),
+        'layout': DERIVATIVES_LAYOUT,
+    }
+
+
+def delete_derivatives(variants, storage=None):
+    """Borra los derivados de una versión anterior de la foto"""
+    storage = storage or default_storage
+    for width in variants.get('widths', []):
+        for extension in IMAGE_FORMATS:
+            storage.delete(derivative_name(variants['name'], width, extension, variants.get('layout', 1)))
+
+
+def same_derivatives(variants, other):
+    """Si dos valores de image_variants usan los mismos archivos"""
+    return (
+        variants.get('name') == other.get('name')
+        and variants.get('layout', 1) == other.get('layout', 1)
+    )
+
+
+def current_variants(room_type):
+    """Los derivados de la foto actual, o None si faltan, son de otra foto o de otro esquema de llaves"""
+    variants = room_type.image_variants or {}
+    if (
+        room_type.image
+        and variants.get('name') == room_type.image.name
+        and variants.get('layout', 1) == DERIVATIVES_LAYOUT
+    ):
+        return variants
+    return None
+
+
+def best_width(variants, max_width):
+    """Mayor ancho generado que no excede max_width (o el más chico)"""
+    fitting = [width for width in variants['widths'] if width <= max_width]
+    return fitting[-1] if fitting else variants['widths'][0]
+
+
+def srcset(variants, extension, storage=None):
+    storage = storage or default_storage
+    return ', '.join(
+        f"{storage.url(derivative_name(variants['name'], width, extension))} {width}w"
+        for width in variants['widths']
+    )
+
+
+def responsive_image(room_type, fallback_width=640):
+    """src, srcset WebP/JPEG y tamaño de un <img> responsivo; None mientras no haya derivados"""
+    variants = current_variants(room_type)
+    if variants is None:
+        return None
+    width = best_width(variants, fallback_width)
+    return {
+        'src': default_storage.url(derivative_name(variants['name'], width, 'jpg')),
+        'srcset_webp': srcset(variants, 'webp'),
+        'srcset_jpg': srcset(variants, 'jpg'),
+        'width': width,
+        'height': round(variants['height'] * width / variants['width']),
+    }
+
+
+def image_url(room_type, max_width):
+    """URL del derivado JPEG más grande que no excede max_width, o la foto original"""
+    if not room_type.image:
+        return ''
+    variants = current_variants(room_type)
+    if variants is None:
+        return room_type.image.url
+    return default_storage.url(derivative_name(variants['name'], best_width(variants, max_width), 'jpg'))
+
+
+def store_variants(results):
+    """
+    Guarda [(pk, nombre original, variants)] con update() (sin señales) y
+    luego invalida catálogo y páginas una sola vez. Si la foto cambió mientras
+    se procesaba, ese resultado se descarta.
+    """
+    from config.content_cache import bump_content_version
+    from .catalog import bump_catalog_version
+    from .models import RoomType
+
+    updated = 0
+    for pk, name, variants in results:
+        updated += RoomType.objects.filter(pk=pk, image=name).update(image_variants=variants)
+    if updated:
+        bump_catalog_version()
+        bump_content_version()
+    return updated
+
+
+def process_room_type_image(room_type_id):
+    """Genera y guarda los derivados de un RoomType si su foto no los tiene"""
+    from .models import RoomType
+
+    room_type = RoomType.objects.filter(pk=room_type_id).only('image', 'image_variants').first()
+    if room_type is None or not room_type.image or current_variants(room_type):
+        return None
+
+    previous = room_type.image_variants
+    variants = generate_derivatives(room_type.image.name)
+    store_variants([(room_type.pk, room_type.image.name, variants)])
+    if previous.get('name') and not same_derivatives(previous, variants):
+        delete_derivatives(previous)
+    return variants
+
+
+def queue_room_type_image(room_type_id):
+    """Encola la generación de derivados; si el broker no responde, queda para el backfill"""
+    from .tasks import generate_room_type_images
+
+    try:
+        generate_room_type_images.delay(room_type_id)
+    except Exception:
+        logger.warning('No se pudo encolar generate_room_type_images', exc_info=True)
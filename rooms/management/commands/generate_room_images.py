@@ -0,0 +1,72 @@
+# rooms/management/commands/generate_room_images.py
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from rooms.images import (
+    current_variants, delete_derivatives, generate_derivatives, same_derivatives, store_variants
+)
+from rooms.models import RoomType
+
+
+class Command(BaseCommand):
+    help = 'Genera los derivados WebP/JPEG de las fotos de RoomType que no los tienen, en paralelo'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Procesos en paralelo (default: núcleos de CPU)',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenera también las fotos que ya tienen derivados',
+        )
+
+    def handle(self, *args, **options):
+        room_types = [
+            room_type
+            for room_type in RoomType.objects.exclude(image='').exclude(image__isnull=True).only(
+                'name', 'image', 'image_variants'
+            )
+            if options['force'] or not current_variants(room_type)
+        ]
+        if not room_types:
+            self.stdout.write(self.style.SUCCESS('✓ Todas las fotos tienen sus derivados'))
+            return
+
+        workers = max(1, min(options['workers'], len(room_types)))
+        self.stdout.write(f'{len(room_types)} fotos con {workers} procesos')
+
+        # Los procesos hijos solo usan el storage; no deben heredar conexiones abiertas
+        connections.close_all()
+        results, stale = [], []
+        with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+            futures = {
+                pool.submit(generate_derivatives, room_type.image.name): room_type
+                for room_type in room_types
+            }
+            for future in as_completed(futures):
+                room_type = futures[future]
+                try:
+                    variants = future.result()
+                except Exception as exc:
+                    self.stdout.write(self.style.ERROR(f'✗ {room_type.name}: {exc}'))
+                    continue
+                results.append((room_type.pk, room_type.image.name, variants))
+                previous = room_type.image_variants or {}
+                if previous.get('name') and not same_derivatives(previous, variants):
+                    stale.append(previous)
+                widths = ', '.join(str(width) for width in variants['widths'])
+                self.stdout.write(self.style.SUCCESS(f'✓ {room_type.name}: {widths}'))
+
+        # Un solo UPDATE por foto y una sola invalidación de catálogo y páginas
+        store_variants(results)
+        for previous in stale:
+            delete_derivatives(previous)
+        self.stdout.write(self.style.SUCCESS(f'✓ {len(results)} de {len(room_types)} fotos procesadas'))
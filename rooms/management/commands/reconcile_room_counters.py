@@ -0,0 +1,31 @@
+# rooms/management/commands/reconcile_room_counters.py
+from django.core.management.base import BaseCommand, CommandError
+from rooms.availability import reconcile_available_now
+
+
+class Command(BaseCommand):
+    help = 'Compara RoomType.available_now con el conteo real de habitaciones y corrige desviaciones'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Solo reporta; termina con error si hay desviaciones',
+        )
+    
+    def handle(self, *args, **options):
+        drifted = reconcile_available_now(fix=not options['check'])
+        
+        for room_type, stored, actual in drifted:
+            self.stdout.write(
+                self.style.WARNING(f'⚠ {room_type.name}: contador {stored}, real {actual}')
+            )
+        
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('✓ Contadores de disponibilidad al día'))
+        elif options['check']:
+            raise CommandError(f'{len(drifted)} tipos de habitación con el contador desviado')
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(f'✓ {len(drifted)} contadores corregidos')
+            )
@@ -0,0 +1,124 @@
+# rooms/management/commands/serve_channel_stub.py
+"""
+Canal de distribución de prueba: un servidor HTTP local que acepta los
+mensajes ARI de rooms.channels.HttpTransport y aplica los rangos a su propio
+calendario, como lo haría un channel manager.
+
+    python manage.py serve_channel_stub --port 8765
+    # DistributionChannel con endpoint http://127.0.0.1:8765/ari
+
+GET devuelve el calendario que el canal cree tener (para compararlo con el
+del hotel) y los contadores de mensajes y bytes recibidos.
+"""
+import json
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+
+class ChannelStub:
+    """Calendario recibido {tipo: {noche: [disponibles, tarifa, cerrado]}} y contadores"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calendar = {}
+        self.messages = 0
+        self.bytes = 0
+        self.ranges = 0
+
+    def apply(self, body):
+        updates = json.loads(body)['updates']
+        with self.lock:
+            for update in updates:
+                nights = self.calendar.setdefault(str(update['room_type']), {})
+                night = date.fromisoformat(update['start'])
+                end = date.fromisoformat(update['end'])
+                while night < end:
+                    nights[night.isoformat()] = [update['available'], update['rate'], update['closed']]
+                    night += timedelta(days=1)
+            self.messages += 1
+            self.bytes += len(body)
+            self.ranges += len(updates)
+        return len(updates)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'messages': self.messages,
+                'bytes': self.bytes,
+                'ranges': self.ranges,
+                'calendar': self.calendar,
+            }
+
+
+def make_handler(stub, api_key, latency, stdout):
+    class Handler(BaseHTTPRequestHandler):
+        # Keep-alive: el transporte reutiliza la conexión entre mensajes
+        protocol_version = 'HTTP/1.1'
+
+        def respond(self, status, payload):
+            content = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def do_GET(self):
+            self.respond(200, stub.snapshot())
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            if api_key and self.headers.get('Authorization') != f'Bearer {api_key}':
+                self.respond(401, {'error': 'unauthorized'})
+                return
+            try:
+                accepted = stub.apply(body)
+            except (ValueError, KeyError, TypeError) as exc:
+                self.respond(400, {'error': str(exc)})
+                return
+            if latency:
+                time.sleep(latency / 1000)
+            stdout.write(f'  POST {accepted} rangos, {len(body) / 1024:.1f} KB')
+            self.respond(200, {'accepted': accepted})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+class Command(BaseCommand):
+    help = 'Servidor HTTP local que hace de canal de distribución para probar la sincronización ARI'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--api-key', default='', help='Exige Authorization: Bearer <api-key>')
+        parser.add_argument(
+            '--latency',
+            type=int,
+            default=0,
+            help='Milisegundos que tarda en responder cada mensaje (simula un canal remoto)',
+        )
+
+    def handle(self, *args, **options):
+        stub = ChannelStub()
+        handler = make_handler(stub, options['api_key'], options['latency'], self.stdout)
+        server = ThreadingHTTPServer((options['host'], options['port']), handler)
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Canal de prueba en http://{options["host"]}:{options["port"]}/ (Ctrl+C para salir)'
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            snapshot = stub.snapshot()
+            self.stdout.write(
+                f'{snapshot["messages"]} mensajes, {snapshot["ranges"]} rangos, {snapshot["bytes"] / 1024:.1f} KB'
+            )
@@ -0,0 +1,48 @@
+# rooms/management/commands/sync_channel_ari.py
+from django.core.management.base import BaseCommand, CommandError
+
+from rooms.channels import active_channels, sync_channels, sync_lock
+
+
+class Command(BaseCommand):
+    help = 'Envía a los canales de distribución la disponibilidad y tarifas que cambiaron desde el último envío'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--channel',
+            type=int,
+            action='append',
+            help='Sincroniza solo este canal (id; se puede repetir)',
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Olvida lo enviado y reenvía todo el horizonte',
+        )
+
+    def handle(self, *args, **options):
+        channels = active_channels()
+        if options['channel']:
+            channels = channels.filter(pk__in=options['channel'])
+
+        with sync_lock() as acquired:
+            if not acquired:
+                raise CommandError('Otro ciclo ARI está en curso; intenta de nuevo en unos segundos')
+            results = sync_channels(channels, full=options['full'])
+
+        for channel, result in results.items():
+            if isinstance(result, Exception):
+                self.stdout.write(self.style.ERROR(f'✗ {channel}: {result}'))
+            elif not result['ranges']:
+                self.stdout.write(f'  - {channel}: sin cambios ({result["compute_ms"]:.0f} ms)')
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    f'✓ {channel}: {result["nights"]} noches en {result["ranges"]} rangos, '
+                    f'{result["messages"]} mensajes, {result["bytes"] / 1024:.1f} KB '
+                    f'(cálculo {result["compute_ms"]:.0f} ms, envío {result["send_ms"]:.0f} ms)'
+                ))
+
+        failed = sum(isinstance(result, Exception) for result in results.values())
+        style = self.style.WARNING if failed else self.style.SUCCESS
+        prefix = '⚠' if failed else '✓'
+        self.stdout.write(style(f'{prefix} {len(results)} canales, {failed} con error'))
@@ -0,0 +1,54 @@
+# rooms/management/commands/sync_external_calendars.py
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from rooms.ical import active_calendars, sync_calendars
+
+
+class Command(BaseCommand):
+    help = 'Importa los calendarios iCal externos como bloqueos de habitaciones (solo los que cambiaron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--calendar',
+            type=int,
+            action='append',
+            help='Sincroniza solo este calendario (id; se puede repetir)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.ICAL_FETCH_WORKERS,
+            help='Descargas en paralelo (default: ICAL_FETCH_WORKERS)',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Descarga y compara aunque el canal diga que no cambió',
+        )
+
+    def handle(self, *args, **options):
+        calendars = active_calendars()
+        if options['calendar']:
+            calendars = calendars.filter(pk__in=options['calendar'])
+        calendars = list(calendars)
+        if options['force']:
+            for calendar in calendars:
+                calendar.etag = calendar.last_modified = calendar.content_hash = ''
+
+        results = sync_calendars(calendars, options['workers'])
+        for calendar, result in results.items():
+            if isinstance(result, Exception):
+                self.stdout.write(self.style.ERROR(f'✗ {calendar}: {result}'))
+            elif result is None:
+                self.stdout.write(f'  - {calendar}: sin cambios')
+            else:
+                created, updated, deleted = result
+                self.stdout.write(self.style.SUCCESS(
+                    f'✓ {calendar}: {created} nuevos, {updated} modificados, {deleted} eliminados'
+                ))
+
+        failed = sum(isinstance(result, Exception) for result in results.values())
+        style = self.style.WARNING if failed else self.style.SUCCESS
+        prefix = '⚠' if failed else '✓'
+        self.stdout.write(style(f'{prefix} {len(results)} calendarios, {failed} con error'))
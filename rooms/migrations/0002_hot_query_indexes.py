@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-19 04:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='room',
+            name='rooms_room_room_nu_914a74_idx',
+        ),
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(fields=['room_type', 'is_available'], name='room_type_available_idx'),
+        ),
+    ]
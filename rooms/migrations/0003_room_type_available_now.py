@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-19 04:44
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_available_now(apps, schema_editor):
+    RoomType = apps.get_model('rooms', 'RoomType')
+    Room = apps.get_model('rooms', 'Room')
+    counts = Room.objects.filter(
+        room_type=OuterRef('pk'), is_available=True
+    ).order_by().values('room_type').annotate(total=Count('pk')).values('total')
+    RoomType.objects.update(available_now=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0002_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='roomtype',
+            name='available_now',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Habitaciones disponibles; lo mantienen las señales de Room (ver rooms/availability.py)', verbose_name='disponibles ahora'),
+        ),
+        migrations.RunPython(populate_available_now, migrations.RunPython.noop),
+    ]
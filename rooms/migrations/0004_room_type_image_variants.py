@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0003_room_type_available_now'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='roomtype',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Anchos generados en WebP y JPEG para srcset (ver rooms/images.py)', verbose_name='derivados de la imagen'),
+        ),
+    ]
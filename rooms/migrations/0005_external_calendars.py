@@ -0,0 +1,55 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0004_room_type_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExternalCalendar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Canal de origen (ej. Airbnb)', max_length=100, verbose_name='nombre')),
+                ('url', models.URLField(max_length=500, verbose_name='URL del calendario')),
+                ('is_active', models.BooleanField(default=True, verbose_name='activo')),
+                ('etag', models.CharField(blank=True, editable=False, max_length=200, verbose_name='ETag')),
+                ('last_modified', models.CharField(blank=True, editable=False, max_length=100, verbose_name='Last-Modified')),
+                ('content_hash', models.CharField(blank=True, editable=False, max_length=64, verbose_name='hash del contenido')),
+                ('last_synced_at', models.DateTimeField(blank=True, editable=False, null=True, verbose_name='última sincronización')),
+                ('last_error', models.TextField(blank=True, editable=False, verbose_name='último error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='fecha de creación')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='fecha de actualización')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='external_calendars', to='rooms.room', verbose_name='habitación')),
+            ],
+            options={
+                'verbose_name': 'calendario externo',
+                'verbose_name_plural': 'calendarios externos',
+                'ordering': ['room__room_number', 'name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RoomBlock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uid', models.CharField(max_length=255, verbose_name='UID del evento')),
+                ('start_date', models.DateField(verbose_name='inicio')),
+                ('end_date', models.DateField(verbose_name='fin')),
+                ('summary', models.CharField(blank=True, max_length=200, verbose_name='descripción')),
+                ('calendar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='blocks', to='rooms.externalcalendar', verbose_name='calendario')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='blocks', to='rooms.room', verbose_name='habitación')),
+            ],
+            options={
+                'verbose_name': 'bloqueo externo',
+                'verbose_name_plural': 'bloqueos externos',
+                'ordering': ['start_date'],
+                'indexes': [models.Index(fields=['room', 'start_date', 'end_date'], name='room_block_dates_idx')],
+                'constraints': [models.UniqueConstraint(fields=('calendar', 'uid'), name='room_block_calendar_uid_uniq')],
+            },
+        ),
+    ]
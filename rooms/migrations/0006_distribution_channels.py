@@ -0,0 +1,56 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0005_external_calendars'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DistributionChannel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='nombre')),
+                ('transport', models.CharField(choices=[('http', 'HTTP (JSON)'), ('log', 'Solo registro')], default='http', help_text='Clase en CHANNEL_ARI_TRANSPORTS que envía los cambios', max_length=20, verbose_name='transporte')),
+                ('endpoint', models.URLField(blank=True, max_length=500, verbose_name='endpoint')),
+                ('api_key', models.CharField(blank=True, max_length=200, verbose_name='API key')),
+                ('is_active', models.BooleanField(default=True, verbose_name='activo')),
+                ('last_synced_at', models.DateTimeField(blank=True, editable=False, null=True, verbose_name='última sincronización')),
+                ('last_sync_ranges', models.PositiveIntegerField(default=0, editable=False, verbose_name='rangos enviados')),
+                ('last_sync_bytes', models.PositiveIntegerField(default=0, editable=False, verbose_name='bytes enviados')),
+                ('last_sync_ms', models.PositiveIntegerField(default=0, editable=False, verbose_name='duración (ms)')),
+                ('last_error', models.TextField(blank=True, editable=False, verbose_name='último error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='fecha de creación')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='fecha de actualización')),
+            ],
+            options={
+                'verbose_name': 'canal de distribución',
+                'verbose_name_plural': 'canales de distribución',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ChannelAriState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='noche')),
+                ('available', models.PositiveIntegerField(verbose_name='disponibles')),
+                ('rate', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='tarifa')),
+                ('closed', models.BooleanField(default=False, verbose_name='cerrado a la venta')),
+                ('pushed_at', models.DateTimeField(verbose_name='enviado')),
+                ('room_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ari_states', to='rooms.roomtype', verbose_name='tipo de habitación')),
+                ('channel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ari_states', to='rooms.distributionchannel', verbose_name='canal')),
+            ],
+            options={
+                'verbose_name': 'estado ARI enviado',
+                'verbose_name_plural': 'estados ARI enviados',
+                'ordering': ['room_type', 'date'],
+                'constraints': [models.UniqueConstraint(fields=('channel', 'room_type', 'date'), name='channel_ari_state_uniq')],
+            },
+        ),
+    ]
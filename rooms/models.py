@@ -69,6 +69,13 @@ class RoomType(models.Model):
         blank=True,
         null=True
     )
+    image_variants = models.JSONField(
+        _("derivados de la imagen"),
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text=_("Anchos generados en WebP y JPEG para srcset (ver rooms/images.py)")
+    )
     size_sqm = models.DecimalField(
         _("tamaño (m²)"),
         max_digits=6,
@@ -78,6 +85,12 @@ class RoomType(models.Model):
         validators=[MinValueValidator(0)]
     )
     is_active = models.BooleanField(_("activo"), default=True)
+    available_now = models.PositiveIntegerField(
+        _("disponibles ahora"),
+        default=0,
+        editable=False,
+        help_text=_("Habitaciones disponibles; lo mantienen las señales de Room (ver rooms/availability.py)")
+    )
     created_at = models.DateTimeField(_("fecha de creación"), auto_now_add=True)
     updated_at = models.DateTimeField(_("fecha de actualización"), auto_now=True)
     
@@ -93,9 +106,41 @@ class RoomType(models.Model):
     def __str__(self):
         return f"{self.name} - ${self.price_per_night}/noche"
     
+    def save(self, *args, **kwargs):
+        # available_now solo lo escriben las actualizaciones relativas de
+        # rooms/availability.py; guardar el valor en memoria (p. ej. desde el
+        # admin) borraría los ajustes hechos desde que se leyó la instancia
+        if not self._state.adding:
+            update_fields = kwargs.get('update_fields')
+            if update_fields is None:
+                deferred = self.get_deferred_fields()
+                update_fields = [
+                    field.attname for field in self._meta.concrete_fields
+                    if not field.primary_key and field.attname not in deferred
+                ]
+            kwargs['update_fields'] = [name for name in update_fields if name != 'available_now']
+        super().save(*args, **kwargs)
+    
     def available_rooms_count(self):
-        """Retorna el número de habitaciones disponibles de este tipo"""
-        return self.rooms.filter(is_available=True).count()
+        """Retorna el número de habitaciones disponibles de este tipo (contador, sin consulta)"""
+        return self.available_now
+    
+    def available_rooms_for_dates(self, check_in, check_out):
+        """Habitaciones de este tipo libres en el rango (una sola consulta, sin recorrer cada habitación)"""
+        from bookings.models import Booking
+        
+        busy_rooms = Booking.objects.filter(
+            room__room_type=self,
+            check_in_date__lt=check_out,
+            check_out_date__gt=check_in,
+            payment_status__in=['PAID', 'CONFIRMED']
+        ).values('room_id')
+        blocked_rooms = RoomBlock.objects.filter(
+            room__room_type=self,
+            start_date__lt=check_out,
+            end_date__gt=check_in
+        ).values('room_id')
+        return self.rooms.filter(is_available=True).exclude(pk__in=busy_rooms).exclude(pk__in=blocked_rooms)
 
 
 class Room(models.Model):
@@ -143,8 +188,9 @@ class Room(models.Model):
         verbose_name_plural = _("habitaciones")
         ordering = ['room_number']
         indexes = [
-            models.Index(fields=['room_number']),
             models.Index(fields=['status', 'is_available']),
+            # Habitaciones disponibles por tipo (fechas y reconciliación de available_now)
+            models.Index(fields=['room_type', 'is_available'], name='room_type_available_idx'),
         ]
     
     def __str__(self):
@@ -160,4 +206,137 @@ class Room(models.Model):
             check_out_date__gt=check_in,
             payment_status__in=['PAID', 'CONFIRMED']
         )
-        return not overlapping_bookings.exists() and self.is_available
\ No newline at end of file
+        blocked = self.blocks.filter(start_date__lt=check_out, end_date__gt=check_in)
+        return self.is_available and not overlapping_bookings.exists() and not blocked.exists()
+
+
+class ExternalCalendar(models.Model):
+    """Calendario iCal de un canal externo (Airbnb, Booking.com...) que bloquea una habitación"""
+    room = models.ForeignKey(
+        Room,
+        on_delete=models.CASCADE,
+        related_name='external_calendars',
+        verbose_name=_("habitación")
+    )
+    name = models.CharField(_("nombre"), max_length=100, help_text=_("Canal de origen (ej. Airbnb)"))
+    url = models.URLField(_("URL del calendario"), max_length=500)
+    is_active = models.BooleanField(_("activo"), default=True)
+    # Validadores de la última descarga: si el canal responde 304 o el mismo contenido no se procesa nada
+    etag = models.CharField(_("ETag"), max_length=200, blank=True, editable=False)
+    last_modified = models.CharField(_("Last-Modified"), max_length=100, blank=True, editable=False)
+    content_hash = models.CharField(_("hash del contenido"), max_length=64, blank=True, editable=False)
+    last_synced_at = models.DateTimeField(_("última sincronización"), null=True, blank=True, editable=False)
+    last_error = models.TextField(_("último error"), blank=True, editable=False)
+    created_at = models.DateTimeField(_("fecha de creación"), auto_now_add=True)
+    updated_at = models.DateTimeField(_("fecha de actualización"), auto_now=True)
+    
+    class Meta:
+        verbose_name = _("calendario externo")
+        verbose_name_plural = _("calendarios externos")
+        ordering = ['room__room_number', 'name']
+    
+    def __str__(self):
+        return f"{self.name} - Habitación {self.room.room_number}"
+
+
+class RoomBlock(models.Model):
+    """Noches ocupadas según un calendario externo; el día final es el check-out (exclusivo)"""
+    calendar = models.ForeignKey(
+        ExternalCalendar,
+        on_delete=models.CASCADE,
+        related_name='blocks',
+        verbose_name=_("calendario")
+    )
+    room = models.ForeignKey(
+        Room,
+        on_delete=models.CASCADE,
+        related_name='blocks',
+        verbose_name=_("habitación")
+    )
+    uid = models.CharField(_("UID del evento"), max_length=255)
+    start_date = models.DateField(_("inicio"))
+    end_date = models.DateField(_("fin"))
+    summary = models.CharField(_("descripción"), max_length=200, blank=True)
+    
+    class Meta:
+        verbose_name = _("bloqueo externo")
+        verbose_name_plural = _("bloqueos externos")
+        ordering = ['start_date']
+        constraints = [
+            models.UniqueConstraint(fields=['calendar', 'uid'], name='room_block_calendar_uid_uniq'),
+        ]
+        indexes = [
+            # Traslape de disponibilidad, igual que booking_room_active_dates_idx
+            models.Index(fields=['room', 'start_date', 'end_date'], name='room_block_dates_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.summary or self.uid} ({self.start_date} - {self.end_date})"
+
+
+class DistributionChannel(models.Model):
+    """Canal de distribución (OTA, channel manager) al que se empuja disponibilidad y tarifas (ARI)"""
+    
+    class Transport(models.TextChoices):
+        HTTP = 'http', _('HTTP (JSON)')
+        LOG = 'log', _('Solo registro')
+    
+    name = models.CharField(_("nombre"), max_length=100, unique=True)
+    transport = models.CharField(
+        _("transporte"),
+        max_length=20,
+        choices=Transport.choices,
+        default=Transport.HTTP,
+        help_text=_("Clase en CHANNEL_ARI_TRANSPORTS que envía los cambios")
+    )
+    endpoint = models.URLField(_("endpoint"), max_length=500, blank=True)
+    api_key = models.CharField(_("API key"), max_length=200, blank=True)
+    is_active = models.BooleanField(_("activo"), default=True)
+    # Métricas del último ciclo (ver rooms/channels.py)
+    last_synced_at = models.DateTimeField(_("última sincronización"), null=True, blank=True, editable=False)
+    last_sync_ranges = models.PositiveIntegerField(_("rangos enviados"), default=0, editable=False)
+    last_sync_bytes = models.PositiveIntegerField(_("bytes enviados"), default=0, editable=False)
+    last_sync_ms = models.PositiveIntegerField(_("duración (ms)"), default=0, editable=False)
+    last_error = models.TextField(_("último error"), blank=True, editable=False)
+    created_at = models.DateTimeField(_("fecha de creación"), auto_now_add=True)
+    updated_at = models.DateTimeField(_("fecha de actualización"), auto_now=True)
+    
+    class Meta:
+        verbose_name = _("canal de distribución")
+        verbose_name_plural = _("canales de distribución")
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
+
+
+class ChannelAriState(models.Model):
+    """Último valor enviado al canal por tipo de habitación y noche; contra él se calcula el diff"""
+    channel = models.ForeignKey(
+        DistributionChannel,
+        on_delete=models.CASCADE,
+        related_name='ari_states',
+        verbose_name=_("canal")
+    )
+    room_type = models.ForeignKey(
+        RoomType,
+        on_delete=models.CASCADE,
+        related_name='ari_states',
+        verbose_name=_("tipo de habitación")
+    )
+    date = models.DateField(_("noche"))
+    available = models.PositiveIntegerField(_("disponibles"))
+    rate = models.DecimalField(_("tarifa"), max_digits=10, decimal_places=2)
+    closed = models.BooleanField(_("cerrado a la venta"), default=False)
+    pushed_at = models.DateTimeField(_("enviado"))
+    
+    class Meta:
+        verbose_name = _("estado ARI enviado")
+        verbose_name_plural = _("estados ARI enviados")
+        ordering = ['room_type', 'date']
+        constraints = [
+            models.UniqueConstraint(fields=['channel', 'room_type', 'date'], name='channel_ari_state_uniq'),
+        ]
+    
+    def __str__(self):
+        return f"{self.channel} - {self.room_type.name} {self.date}"
@@ -0,0 +1,103 @@
+# rooms/signals.py
+from collections import Counter
+
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from config.content_cache import bump_content_version, bump_availability_version
+from .availability import adjust_available_now, publish_availability_change
+from .catalog import bump_catalog_version
+from .channels import schedule_channel_sync
+from .images import current_variants, queue_room_type_image
+from .models import Amenity, ExternalCalendar, RoomType, Room
+
+
+@receiver(post_save, sender=RoomType)
+@receiver(post_delete, sender=RoomType)
+@receiver(post_save, sender=Amenity)
+@receiver(post_delete, sender=Amenity)
+@receiver(m2m_changed, sender=RoomType.amenities.through)
+def invalidate_room_pages(sender, **kwargs):
+    """Invalida el catálogo y las páginas públicas cacheadas al editar habitaciones"""
+    bump_catalog_version()
+    bump_content_version()
+
+
+@receiver(post_save, sender=RoomType)
+def queue_image_derivatives(sender, instance, raw=False, **kwargs):
+    """Genera en segundo plano los derivados de una foto nueva o reemplazada"""
+    if raw or not instance.image or current_variants(instance):
+        return
+    transaction.on_commit(lambda: queue_room_type_image(instance.pk))
+
+
+@receiver(post_save, sender=RoomType)
+def schedule_rate_push(sender, instance, raw=False, **kwargs):
+    """Tarifa o activación del tipo: los canales reciben el cambio en el siguiente ciclo ARI"""
+    if not raw:
+        transaction.on_commit(schedule_channel_sync)
+
+
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+def invalidate_room_availability(sender, **kwargs):
+    """Invalida los ETag de disponibilidad al cambiar el estado de una habitación"""
+    bump_availability_version()
+
+
+AVAILABILITY_FIELDS = {'room_type', 'room_type_id', 'is_available'}
+
+
+@receiver(pre_save, sender=Room)
+def remember_room_availability(sender, instance, update_fields=None, **kwargs):
+    """Conserva el tipo y la disponibilidad previos para ajustar available_now"""
+    if update_fields is not None and not AVAILABILITY_FIELDS & set(update_fields):
+        # Guardado parcial que no toca la disponibilidad: no hay nada que ajustar
+        instance._previous_availability = (instance.room_type_id, instance.is_available)
+        return
+    instance._previous_availability = None
+    if instance.pk:
+        instance._previous_availability = Room.objects.filter(pk=instance.pk).values_list(
+            'room_type_id', 'is_available'
+        ).first()
+
+
+@receiver(post_save, sender=Room)
+def update_available_now(sender, instance, **kwargs):
+    """Ajusta el contador de habitaciones disponibles del tipo (o de ambos si cambió de tipo)"""
+    deltas = Counter()
+    previous = getattr(instance, '_previous_availability', None)
+    if previous and previous[1]:
+        deltas[previous[0]] -= 1
+    if instance.is_available:
+        deltas[instance.room_type_id] += 1
+    adjust_available_now(deltas)
+    for room_type_id, delta in deltas.items():
+        if delta:
+            publish_availability_change(room_type_id)
+
+
+@receiver(post_delete, sender=Room)
+def release_available_now(sender, instance, **kwargs):
+    if instance.is_available:
+        adjust_available_now({instance.room_type_id: -1})
+        publish_availability_change(instance.room_type_id)
+
+
+@receiver(pre_save, sender=ExternalCalendar)
+def reset_calendar_validators(sender, instance, **kwargs):
+    """Otra URL u otra habitación: la siguiente sincronización debe procesar el calendario completo"""
+    if not instance.pk:
+        return
+    previous = ExternalCalendar.objects.filter(pk=instance.pk).values_list('room_id', 'url').first()
+    if previous and previous != (instance.room_id, instance.url):
+        instance.etag = instance.last_modified = instance.content_hash = ''
+
+
+@receiver(post_delete, sender=ExternalCalendar)
+def release_calendar_blocks(sender, instance, **kwargs):
+    """Sus bloqueos se borran en cascada: la habitación vuelve a estar libre en esas fechas"""
+    bump_availability_version()
+    room_type_id = Room.objects.filter(pk=instance.room_id).values_list('room_type_id', flat=True).first()
+    if room_type_id:
+        publish_availability_change(room_type_id)
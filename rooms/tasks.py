@@ -0,0 +1,43 @@
+# rooms/tasks.py
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+
+from .channels import SYNC_PENDING_KEY, active_channels, sync_channels, sync_lock
+from .ical import active_calendars, sync_calendars
+from .images import process_room_type_image
+
+
+@shared_task
+def generate_room_type_images(room_type_id):
+    """Derivados WebP/JPEG de la foto de un tipo de habitación (ver rooms/images.py)"""
+    variants = process_room_type_image(room_type_id)
+    return variants['widths'] if variants else []
+
+
+@shared_task
+def sync_external_calendars():
+    """Importa los calendarios iCal externos; los que no cambiaron no tocan la BD"""
+    results = sync_calendars(active_calendars())
+    changed = [result for result in results.values() if result and not isinstance(result, Exception)]
+    failed = [result for result in results.values() if isinstance(result, Exception)]
+    return {'calendars': len(results), 'changed': len(changed), 'failed': len(failed)}
+
+
+@shared_task(bind=True, max_retries=None)
+def push_channel_ari(self):
+    """Envía a los canales de distribución el ARI que cambió (ver rooms/channels.py)"""
+    # Los cambios que lleguen desde aquí agendan otro ciclo
+    cache.delete(SYNC_PENDING_KEY)
+    with sync_lock() as acquired:
+        if not acquired:
+            raise self.retry(countdown=settings.CHANNEL_ARI_DEBOUNCE)
+        results = sync_channels(active_channels())
+    failed = [result for result in results.values() if isinstance(result, Exception)]
+    sent = [result for result in results.values() if not isinstance(result, Exception)]
+    return {
+        'channels': len(results),
+        'failed': len(failed),
+        'ranges': sum(result['ranges'] for result in sent),
+        'bytes': sum(result['bytes'] for result in sent),
+    }
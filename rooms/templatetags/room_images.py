@@ -0,0 +1,41 @@
+# rooms/templatetags/room_images.py
+from django import template
+from django.forms.utils import flatatt
+from django.utils.html import format_html
+
+from rooms.images import image_url, responsive_image
+
+register = template.Library()
+
+
+@register.simple_tag
+def room_image(room_type, sizes='100vw', **attrs):
+    """
+    {% room_image room_type sizes="(min-width: 992px) 33vw, 100vw" class="card-img-top" %}
+
+    <picture> con srcset WebP y JPEG; mientras no haya derivados emite la foto original.
+    """
+    if not room_type.image:
+        return ''
+    attrs.setdefault('alt', room_type.name)
+    attrs.setdefault('loading', 'lazy')
+    attrs.setdefault('decoding', 'async')
+
+    image = responsive_image(room_type)
+    if image is None:
+        return format_html('<img src="{}"{}>', room_type.image.url, flatatt(attrs))
+
+    # width/height reservan el espacio antes de que cargue la imagen
+    attrs['width'] = image['width']
+    attrs['height'] = image['height']
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}"{}></picture>',
+        image['srcset_webp'], sizes, image['src'], image['srcset_jpg'], sizes, flatatt(attrs),
+    )
+
+
+@register.simple_tag
+def room_image_url(room_type, max_width=1280):
+    """URL del derivado JPEG más grande que no excede max_width (p. ej. para un lightbox)"""
+    return image_url(room_type, max_width)
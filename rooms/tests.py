@@ -1,3 +1,561 @@
-from django.test import TestCase
+# rooms/tests.py
+import asyncio
+import io
+import shutil
+import tempfile
+import threading
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from bookings.models import Booking, Coupon
+from config.content_cache import get_content_version
+from config.events import MemoryBroker
+from .catalog import get_catalog_version
+from PIL import Image
+
+from .availability import (
+    affects_stay, availability_channel, publish_availability_change, reconcile_available_now
+)
+from .channels import current_ari, sync_channels, sync_window
+from .ical import CalendarError, sync_calendars
+from .images import derivative_name, process_room_type_image
+from .models import Amenity, DistributionChannel, ExternalCalendar, Room, RoomBlock, RoomType
+from .management.commands.serve_channel_stub import ChannelStub, make_handler
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class CatalogVersionTests(TestCase):
+    """Las versiones de cache suben al confirmar la transacción, no antes"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_versions_bump_on_commit(self):
+        catalog_version = get_catalog_version()
+        content_version = get_content_version()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Amenity.objects.create(name='Wifi')
+            # Otro worker que lea ahora debe seguir con la versión vieja
+            self.assertEqual(get_catalog_version(), catalog_version)
+            self.assertEqual(get_content_version(), content_version)
+
+        self.assertGreater(get_catalog_version(), catalog_version)
+        self.assertGreater(get_content_version(), content_version)
+
+
+def create_room_type(**fields):
+    values = {
+        'name': 'Sencilla', 'price_per_night': 900, 'number_of_beds': 1, 'room_capacity': 2,
+        'total_rooms': 1, 'description': 'Una cama matrimonial',
+    }
+    values.update(fields)
+    return RoomType.objects.create(**values)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class AvailableNowCounterTests(TestCase):
+    """Solo los ajustes relativos escriben RoomType.available_now"""
+
+    def setUp(self):
+        cache.clear()
+        self.room_type = create_room_type(total_rooms=3)
+        self.rooms = [
+            Room.objects.create(room_type=self.room_type, room_number=str(100 + index), floor=1)
+            for index in range(3)
+        ]
+
+    def counter(self):
+        return RoomType.objects.values_list('available_now', flat=True).get(pk=self.room_type.pk)
+
+    def test_full_save_keeps_counter(self):
+        stale = RoomType.objects.get(pk=self.room_type.pk)
+        self.assertEqual(stale.available_now, 3)
+
+        room = self.rooms[0]
+        room.is_available = False
+        room.save()
+        self.assertEqual(self.counter(), 2)
+
+        stale.price_per_night = 950
+        stale.save()
+        self.assertEqual(self.counter(), 2)
+        self.assertEqual(RoomType.objects.get(pk=stale.pk).price_per_night, 950)
+        self.assertEqual(reconcile_available_now(fix=False), [])
+
+    def test_update_fields_cannot_write_counter(self):
+        self.room_type.available_now = 99
+        self.room_type.save(update_fields=['available_now', 'name'])
+        self.assertEqual(self.counter(), 3)
+
+    def test_deferred_instance_saves_loaded_fields(self):
+        partial = RoomType.objects.only('name').get(pk=self.room_type.pk)
+        partial.name = 'Sencilla plus'
+        partial.save()
+        self.assertEqual(RoomType.objects.get(pk=self.room_type.pk).name, 'Sencilla plus')
+        self.assertEqual(self.counter(), 3)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class RoomTypeListViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        create_room_type()
+
+    def test_non_finite_price_filters_are_ignored(self):
+        for value in ('NaN', 'sNaN', 'Infinity', '-inf', 'abc'):
+            response = self.client.get('/habitaciones/', {'min_price': value, 'max_price': value})
+            self.assertEqual(response.status_code, 200, value)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class BulkApiTests(TestCase):
+    def test_body_must_be_a_json_object(self):
+        for body in ('[1, 2]', '"x"', '3', 'null'):
+            response = self.client.post('/api/v1/availability/', body, content_type='application/json')
+            self.assertEqual(response.status_code, 400, body)
+            self.assertIn('objeto JSON', response.json()['error']['message'], body)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class QuoteApiTests(TestCase):
+    """/api/v1/quotes/ (vista async): precio, cupón y disponibilidad por rango"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.room_type = create_room_type(name='Cotización', price_per_night=900, total_rooms=2)
+        for number in ('201', '202'):
+            Room.objects.create(room_type=cls.room_type, room_number=number, floor=2)
+        now = timezone.now()
+        Coupon.objects.create(
+            code='VERANO', discount_value=10,
+            valid_from=now - timedelta(days=1), valid_until=now + timedelta(days=30)
+        )
+
+    def setUp(self):
+        cache.clear()
+        check_in = timezone.localdate() + timedelta(days=10)
+        self.stay = {'check_in': check_in.isoformat(), 'check_out': (check_in + timedelta(days=2)).isoformat()}
+
+    async def test_single_quote(self):
+        response = await self.async_client.get('/api/v1/quotes/', {'room_type': self.room_type.pk, **self.stay})
+        self.assertEqual(response.status_code, 200)
+        quote = response.json()
+        self.assertEqual(quote['nights'], 2)
+        self.assertEqual(quote['subtotal'], '1800.00')
+        self.assertEqual(quote['tax_amount'], '288.00')
+        self.assertEqual(quote['total_price'], '2088.00')
+        self.assertEqual(quote['available'], 2)
+        self.assertFalse(quote['coupon_applied'])
+
+        response = await self.async_client.get(
+            '/api/v1/quotes/', {'room_type': self.room_type.pk, **self.stay},
+            headers={'If-None-Match': response['ETag']}
+        )
+        self.assertEqual(response.status_code, 304)
+
+    async def test_coupon_quote_is_not_cached(self):
+        response = await self.async_client.get(
+            '/api/v1/quotes/', {'room_type': self.room_type.pk, 'coupon': 'VERANO', **self.stay}
+        )
+        quote = response.json()
+        self.assertTrue(quote['coupon_applied'])
+        self.assertEqual(quote['discount_amount'], '180.00')
+        self.assertEqual(quote['total_price'], '1879.20')
+        self.assertFalse(response.has_header('ETag'))
+
+    async def test_bulk_quotes_keep_order_and_per_item_errors(self):
+        items = [
+            {'room_type': self.room_type.pk, 'coupon': 'VERANO', **self.stay},
+            {'room_type': 999999, **self.stay},
+            {'room_type': self.room_type.pk, 'check_in': self.stay['check_out'], 'check_out': self.stay['check_in']},
+            {'room_type': self.room_type.pk, 'coupon': 'NOEXISTE', **self.stay},
+        ]
+        response = await self.async_client.post('/api/v1/quotes/', {'items': items}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual(results[0]['discount_amount'], '180.00')
+        self.assertEqual(results[1]['error']['message'], 'Tipo de habitación no encontrado')
+        self.assertIn('check_out', results[2]['error']['message'])
+        self.assertFalse(results[3]['coupon_applied'])
+        self.assertEqual(results[3]['coupon'], 'NOEXISTE')
+
+    async def test_missing_room_type(self):
+        response = await self.async_client.get('/api/v1/quotes/', self.stay)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error']['message'], 'Se requiere "room_type"')
+
+
+@override_settings(CACHES=LOCMEM_CACHE, GALLERY_PAGE_SIZE=2)
+class GalleryFeedTests(TestCase):
+    """La galería pinta la primera página y el feed sigue con el cursor `next`"""
+
+    @classmethod
+    def setUpTestData(cls):
+        specs = [
+            ('SUITE', 3000), ('BASIC', 500), ('STANDARD', 900), ('STANDARD', 900), ('LUXURY', 2000),
+        ]
+        cls.photos = [
+            create_room_type(name=f'Foto {index}', category=category, price_per_night=price, image=f'room_types/{index}.jpg')
+            for index, (category, price) in enumerate(specs)
+        ]
+        create_room_type(name='Sin foto')
+        create_room_type(name='Inactiva', image='room_types/inactiva.jpg', is_active=False)
+
+    def setUp(self):
+        cache.clear()
+
+    def expected_ids(self, category=None):
+        photos = [photo for photo in self.photos if category in (None, photo.category)]
+        return [photo.pk for photo in sorted(photos, key=lambda photo: (photo.category, photo.price_per_night, photo.pk))]
+
+    def walk(self, cursor, **params):
+        ids = []
+        while cursor:
+            response = self.client.get('/api/v1/gallery/', {'cursor': cursor, **params})
+            self.assertEqual(response.status_code, 200)
+            feed = response.json()
+            self.assertLessEqual(len(feed['results']), 2)
+            ids += [item['id'] for item in feed['results']]
+            cursor = feed['next']
+        return ids
+
+    def test_page_embeds_first_page_and_next_cursor(self):
+        response = self.client.get('/galeria/')
+        self.assertEqual(response.status_code, 200)
+        feed = response.context['gallery']['feed']
+        self.assertContains(response, 'id="gallery-feed"')
+        self.assertEqual([item['id'] for item in feed['results']], self.expected_ids()[:2])
+        self.assertEqual(feed['results'][0]['src'], '/media/room_types/1.jpg')
+        self.assertEqual(feed['next'], self.client.get('/api/v1/gallery/').json()['next'])
+
+        self.assertEqual(self.expected_ids()[2:], self.walk(feed['next']))
+
+    def test_category_filter_applies_to_every_page(self):
+        response = self.client.get('/api/v1/gallery/', {'category': 'STANDARD', 'fields': 'id'})
+        feed = response.json()
+        self.assertEqual(feed['results'], [{'id': pk} for pk in self.expected_ids('STANDARD')])
+        self.assertIsNone(feed['next'])
+
+        response = self.client.get('/api/v1/gallery/', {'fields': 'id,title'})
+        self.assertEqual(self.walk(response.json()['next'], category='SUITE'), self.expected_ids('SUITE'))
+
+
+def image_file(extension):
+    buffer = io.BytesIO()
+    Image.new('RGB', (700, 400), 'teal').save(buffer, {'jpg': 'JPEG', 'png': 'PNG'}[extension])
+    return ContentFile(buffer.getvalue())
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class RoomImageDerivativeTests(TestCase):
+    """Los derivados se identifican por el nombre completo del original"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(self.settings(MEDIA_ROOT=media_root))
+
+    def room_type_with_image(self, name, extension):
+        room_type = create_room_type(name=name)
+        room_type.image.save(f'suite.{extension}', image_file(extension))
+        return room_type
+
+    def derivatives(self, variants):
+        return [
+            derivative_name(variants['name'], width, extension)
+            for width in variants['widths'] for extension in ('webp', 'jpg')
+        ]
+
+    def test_same_stem_with_other_extension_gets_its_own_derivatives(self):
+        jpg = self.room_type_with_image('Suite', 'jpg')
+        png = self.room_type_with_image('Suite PNG', 'png')
+        jpg_variants = process_room_type_image(jpg.pk)
+        png_variants = process_room_type_image(png.pk)
+
+        self.assertFalse(set(self.derivatives(jpg_variants)) & set(self.derivatives(png_variants)))
+        for key in self.derivatives(jpg_variants) + self.derivatives(png_variants):
+            self.assertTrue(default_storage.exists(key), key)
+
+    def test_replacing_photo_keeps_new_derivatives(self):
+        room_type = self.room_type_with_image('Suite', 'jpg')
+        old = process_room_type_image(room_type.pk)
+        old_name = room_type.image.name
+
+        room_type.refresh_from_db()
+        room_type.image.save('suite.png', image_file('png'))
+        new = process_room_type_image(room_type.pk)
+
+        for key in self.derivatives(new):
+            self.assertTrue(default_storage.exists(key), key)
+        for key in self.derivatives(old):
+            self.assertFalse(default_storage.exists(key), key)
+        self.assertTrue(default_storage.exists(old_name))
+
+    def test_legacy_layout_is_regenerated_and_removed(self):
+        room_type = self.room_type_with_image('Suite', 'jpg')
+        variants = process_room_type_image(room_type.pk)
+        # Derivados con las llaves anteriores (sin la extensión del original)
+        legacy = dict(variants)
+        del legacy['layout']
+        legacy_keys = [
+            derivative_name(legacy['name'], width, extension, layout=1)
+            for width in legacy['widths'] for extension in ('webp', 'jpg')
+        ]
+        for key in legacy_keys:
+            default_storage.save(key, ContentFile(b'x'))
+        RoomType.objects.filter(pk=room_type.pk).update(image_variants=legacy)
+
+        self.assertIsNotNone(process_room_type_image(room_type.pk))
+        for key in legacy_keys:
+            self.assertFalse(default_storage.exists(key), key)
+        for key in self.derivatives(variants):
+            self.assertTrue(default_storage.exists(key), key)
+
+
+async def next_message(queue):
+    return await asyncio.wait_for(queue.get(), timeout=1)
+
+
+class MemoryBrokerTests(TestCase):
+    """Eventos de disponibilidad con el broker en memoria"""
+
+    def setUp(self):
+        self.broker = MemoryBroker()
+        self.enterContext(mock.patch('config.events.get_broker', return_value=self.broker))
+        # El envío ARI a los canales no es parte de estas pruebas
+        self.enterContext(mock.patch('rooms.availability.schedule_channel_sync'))
+
+    def test_publish_waits_for_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            publish_availability_change(7, date(2026, 3, 1), date(2026, 3, 4))
+
+        async def scenario():
+            async with self.broker.subscribe(availability_channel(7)) as queue:
+                await asyncio.sleep(0)
+                self.assertTrue(queue.empty())
+                for callback in callbacks:
+                    callback()
+                return await next_message(queue)
+
+        message = asyncio.run(scenario())
+        self.assertEqual(message['room_type'], 7)
+        self.assertEqual((message['check_in'], message['check_out']), ('2026-03-01', '2026-03-04'))
+
+    def test_publish_fans_out_to_channel_subscribers(self):
+        async def scenario():
+            async with self.broker.subscribe('availability:1') as first, \
+                    self.broker.subscribe('availability:1') as second, \
+                    self.broker.subscribe('availability:2') as other:
+                self.broker.publish('availability:1', {'id': 'a'})
+                received = [await next_message(first), await next_message(second)]
+                await asyncio.sleep(0)
+                return received, other.empty()
+
+        received, other_empty = asyncio.run(scenario())
+        self.assertEqual(received, [{'id': 'a'}, {'id': 'a'}])
+        self.assertTrue(other_empty)
+        self.assertEqual(dict(self.broker.subscribers), {})
+
+    def test_slow_subscriber_keeps_newest_messages(self):
+        async def scenario():
+            async with self.broker.subscribe('availability:1') as queue:
+                for index in range(queue.maxsize + 5):
+                    self.broker.publish('availability:1', {'id': index})
+                await asyncio.sleep(0)
+                return queue.qsize(), await next_message(queue)
+
+        size, oldest = asyncio.run(scenario())
+        self.assertEqual(oldest, {'id': 5})
+        self.assertEqual(size, 32)
+
+
+class AffectsStayTests(SimpleTestCase):
+    def message(self, check_in, check_out):
+        return {'check_in': check_in, 'check_out': check_out}
+
+    def test_overlapping_ranges(self):
+        stay = (date(2026, 3, 10), date(2026, 3, 13))
+        self.assertTrue(affects_stay(self.message('2026-03-12', '2026-03-20'), *stay))
+        self.assertTrue(affects_stay(self.message('2026-03-01', '2026-03-11'), *stay))
+        self.assertTrue(affects_stay(self.message('2026-03-01', '2026-03-31'), *stay))
+
+    def test_adjacent_and_disjoint_ranges(self):
+        stay = (date(2026, 3, 10), date(2026, 3, 13))
+        # El check-out de uno es el check-in del otro: no comparten noche
+        self.assertFalse(affects_stay(self.message('2026-03-13', '2026-03-15'), *stay))
+        self.assertFalse(affects_stay(self.message('2026-03-05', '2026-03-10'), *stay))
+        self.assertFalse(affects_stay(self.message('2026-04-01', '2026-04-02'), *stay))
+
+    def test_change_without_dates_affects_every_stay(self):
+        self.assertTrue(affects_stay(self.message(None, None), date(2026, 3, 10), date(2026, 3, 13)))
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class DeletedBookingEventTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command('generate_test_data', stdout=io.StringIO())
+
+    def booking_with_stay(self, check_in, check_out):
+        booking = Booking.objects.order_by('pk').first()
+        Booking.objects.filter(pk=booking.pk).update(
+            payment_status='PAID', check_in_date=check_in, check_out_date=check_out
+        )
+        return Booking.objects.get(pk=booking.pk)
+
+    def test_past_stay_is_not_published(self):
+        today = timezone.localdate()
+        booking = self.booking_with_stay(today - timedelta(days=400), today - timedelta(days=398))
+        with mock.patch('bookings.signals.publish_availability_change') as publish:
+            booking.delete()
+        publish.assert_not_called()
+
+    def test_upcoming_stay_is_published(self):
+        today = timezone.localdate()
+        booking = self.booking_with_stay(today + timedelta(days=10), today + timedelta(days=12))
+        with mock.patch('bookings.signals.publish_availability_change') as publish:
+            booking.delete()
+        publish.assert_called_once_with(booking.room.room_type_id, booking.check_in_date, booking.check_out_date)
+
+
+@override_settings(CACHES=LOCMEM_CACHE, CHANNEL_ARI_HORIZON_DAYS=60)
+class ChannelSyncTests(TestCase):
+    """Ciclos ARI contra serve_channel_stub en un puerto efímero"""
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('generate_test_data', stdout=io.StringIO())
+        # Tipo con una sola habitación libre todo el horizonte: el cambio de la prueba es el único en él
+        cls.room_type = create_room_type(name='ARI')
+        cls.room = Room.objects.create(room_type=cls.room_type, room_number='ARI-1', floor=9)
+
+    def setUp(self):
+        self.stub = ChannelStub()
+        server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(self.stub, 'secreto', 0, io.StringIO()))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.channel = DistributionChannel.objects.create(
+            name='Stub', endpoint=f'http://127.0.0.1:{server.server_port}/ari', api_key='secreto'
+        )
+
+    def sync(self):
+        stats = sync_channels([self.channel])[self.channel]
+        if isinstance(stats, Exception):
+            raise stats
+        return stats
+
+    def test_full_push_then_empty_diff(self):
+        stats = self.sync()
+        window = sync_window()
+        expected = {}
+        for (room_type_id, night), (available, rate, closed) in current_ari(*window).items():
+            expected.setdefault(str(room_type_id), {})[night.isoformat()] = [available, str(rate), closed]
+        snapshot = self.stub.snapshot()
+        self.assertEqual(snapshot['calendar'], expected)
+        self.assertEqual(snapshot['ranges'], stats['ranges'])
+        self.assertEqual(stats['nights'], len(current_ari(*window)))
+
+        # Nada cambió: el segundo ciclo no envía mensajes
+        stats = self.sync()
+        self.assertEqual((stats['ranges'], stats['messages']), (0, 0))
+        self.assertEqual(self.stub.snapshot()['messages'], snapshot['messages'])
+
+    def test_booking_change_travels_as_one_range(self):
+        self.sync()
+        before = self.stub.snapshot()['messages']
+        calendar = self.stub.calendar[str(self.room_type.pk)]
+        previous = {night: value[0] for night, value in calendar.items()}
+        check_in = timezone.localdate() + timedelta(days=20)
+        check_out = check_in + timedelta(days=3)
+
+        booking = Booking.objects.order_by('pk').first()
+        Booking.objects.create(
+            user=booking.user, hotel=booking.hotel, room=self.room, check_in_date=check_in,
+            check_out_date=check_out, adults=1, payment_status='PAID', subtotal=0, total_price=0
+        )
+        stats = self.sync()
+
+        self.assertEqual((stats['ranges'], stats['nights'], stats['messages']), (1, 3, 1))
+        self.assertEqual(self.stub.snapshot()['messages'], before + 1)
+        for offset in range(-1, 4):
+            night = (check_in + timedelta(days=offset)).isoformat()
+            expected = previous[night] - 1 if 0 <= offset < 3 else previous[night]
+            self.assertEqual(calendar[night][0], expected, night)
+
+
+class CalendarHandler(BaseHTTPRequestHandler):
+    """Responde a cualquier GET con `server.body`, como un canal que exporta .ics"""
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/calendar; charset=utf-8')
+        self.send_header('Content-Length', str(len(self.server.body)))
+        self.end_headers()
+        self.wfile.write(self.server.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def ics(*lines):
+    return '\r\n'.join(lines).encode() + b'\r\n'
+
+
+def vevent(uid, start, end):
+    return ['BEGIN:VEVENT', f'UID:{uid}', f'DTSTART;VALUE=DATE:{start}', f'DTEND;VALUE=DATE:{end}', 'END:VEVENT']
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ExternalCalendarImportTests(TestCase):
+    """Un feed que no es un VCALENDAR completo no borra los bloqueos guardados"""
+
+    def setUp(self):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), CalendarHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.server = server
+        room = Room.objects.create(room_type=create_room_type(), room_number='101', floor=1)
+        self.calendar = ExternalCalendar.objects.create(
+            room=room, name='Airbnb', url=f'http://127.0.0.1:{server.server_port}/calendario.ics'
+        )
+
+    def sync(self, body):
+        self.server.body = body
+        calendar = ExternalCalendar.objects.get(pk=self.calendar.pk)
+        return sync_calendars([calendar], workers=1)[calendar]
+
+    def test_malformed_feeds_keep_blocks(self):
+        events = vevent('a@airbnb', '20300110', '20300113') + vevent('b@airbnb', '20300120', '20300122')
+        self.assertEqual(self.sync(ics('BEGIN:VCALENDAR', 'VERSION:2.0', *events, 'END:VCALENDAR')), (2, 0, 0))
+
+        malformed = {
+            'html': b'<html><body>Servicio no disponible</body></html>',
+            'vacío': b'',
+            'truncado': ics('BEGIN:VCALENDAR', 'VERSION:2.0', *events[:5]),
+            'sin END:VEVENT': ics('BEGIN:VCALENDAR', *events[:5], *events[5:9], 'END:VCALENDAR'),
+        }
+        with self.assertLogs('rooms.ical', 'WARNING'):
+            for name, body in malformed.items():
+                with self.subTest(name):
+                    self.assertIsInstance(self.sync(body), CalendarError)
+                    self.assertEqual(RoomBlock.objects.filter(calendar=self.calendar).count(), 2)
+                    self.assertTrue(ExternalCalendar.objects.get(pk=self.calendar.pk).last_error)
+
+    def test_well_formed_empty_calendar_clears_blocks(self):
+        self.sync(ics('BEGIN:VCALENDAR', *vevent('a@airbnb', '20300110', '20300113'), 'END:VCALENDAR'))
+        self.assertEqual(self.sync(ics('\ufeffBEGIN:VCALENDAR', 'VERSION:2.0', 'END:VCALENDAR')), (0, 0, 1))
+        self.assertFalse(RoomBlock.objects.filter(calendar=self.calendar).exists())
+        self.assertEqual(ExternalCalendar.objects.get(pk=self.calendar.pk).last_error, '')
@@ -7,4 +7,5 @@ urlpatterns = [
     path('', views.RoomTypeListView.as_view(), name='room_type_list'),
     path('<int:pk>/', views.RoomTypeDetailView.as_view(), name='room_type_detail'),
     path('check-availability/', views.CheckAvailabilityView.as_view(), name='check_availability'),
+    path('ical/<str:token>.ics', views.ICalFeedView.as_view(), name='ical_feed'),
 ]
\ No newline at end of file
@@ -1,63 +1,115 @@
 # rooms/views.py
 from django.views.generic import ListView, DetailView, View
 from django.shortcuts import render
-from django.http import JsonResponse
+from django.core import signing
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
 from django.db.models import Q
+import copy
 from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from config.conditional import ConditionalGetMixin, make_etag, user_etag_part
+from config.content_cache import get_availability_version
+from . import catalog
+from .ical import feed_chunks, feed_name, parse_feed_token
 from .models import RoomType, Room
 
 
-class RoomTypeListView(ListView):
+class RoomTypeListView(ConditionalGetMixin, ListView):
     """Lista todos los tipos de habitaciones disponibles"""
     model = RoomType
     template_name = 'rooms/room_type_list.html'
     context_object_name = 'room_types'
     paginate_by = 12
+    use_read_replica = True
+    
+    ordering_fields = ['price_per_night', 'name', 'category', 'room_capacity', 'size_sqm']
     
     def get_queryset(self):
-        queryset = RoomType.objects.filter(is_active=True).prefetch_related('amenities')
+        # El catálogo se lee del cache; los filtros se aplican en memoria
+        room_types = catalog.active_room_types()
         
         # Filtrar por categoría
         category = self.request.GET.get('category')
         if category:
-            queryset = queryset.filter(category=category)
+            room_types = [rt for rt in room_types if rt.category == category]
         
         # Filtrar por precio
-        min_price = self.request.GET.get('min_price')
-        max_price = self.request.GET.get('max_price')
-        if min_price:
-            queryset = queryset.filter(price_per_night__gte=min_price)
-        if max_price:
-            queryset = queryset.filter(price_per_night__lte=max_price)
+        min_price = self.get_decimal_param('min_price')
+        max_price = self.get_decimal_param('max_price')
+        if min_price is not None:
+            room_types = [rt for rt in room_types if rt.price_per_night >= min_price]
+        if max_price is not None:
+            room_types = [rt for rt in room_types if rt.price_per_night <= max_price]
         
         # Filtrar por capacidad
-        capacity = self.request.GET.get('capacity')
-        if capacity:
-            queryset = queryset.filter(room_capacity__gte=capacity)
+        capacity = self.get_decimal_param('capacity')
+        if capacity is not None:
+            room_types = [rt for rt in room_types if rt.room_capacity >= capacity]
         
         # Ordenar
         ordering = self.request.GET.get('ordering', 'price_per_night')
-        queryset = queryset.order_by(ordering)
-        
-        return queryset
+        field = ordering.lstrip('-')
+        if field not in self.ordering_fields:
+            field, ordering = 'price_per_night', 'price_per_night'
+        return sorted(
+            room_types,
+            key=lambda rt: (getattr(rt, field) is None, getattr(rt, field) or 0),
+            reverse=ordering.startswith('-')
+        )
+    
+    def get_etag(self, request, *args, **kwargs):
+        return make_etag(
+            'room-types', catalog.get_catalog_version(),
+            get_availability_version(), user_etag_part(request)
+        )
+    
+    def get_decimal_param(self, name):
+        try:
+            value = Decimal(self.request.GET[name])
+        except (KeyError, InvalidOperation):
+            return None
+        # NaN e Infinity no se pueden comparar con los precios
+        return value if value.is_finite() else None
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['categories'] = RoomType.RoomCategory.choices
+        context['room_types'] = context['object_list'] = self.with_live_counts(context['room_types'])
         return context
+    
+    def with_live_counts(self, room_types):
+        """Copias de los tipos de la página con available_now leído en una sola consulta"""
+        # El catálogo puede tener el contador atrasado y sus objetos no deben modificarse
+        if not room_types:
+            return room_types
+        counts = dict(
+            RoomType.objects.filter(pk__in=[rt.pk for rt in room_types]).values_list('pk', 'available_now')
+        )
+        live = []
+        for room_type in room_types:
+            room_type = copy.copy(room_type)
+            room_type.available_now = counts.get(room_type.pk, 0)
+            live.append(room_type)
+        return live
 
 
-class RoomTypeDetailView(DetailView):
+class RoomTypeDetailView(ConditionalGetMixin, DetailView):
     """Detalle de un tipo de habitación"""
     model = RoomType
     template_name = 'rooms/room_type_detail.html'
     context_object_name = 'room_type'
+    use_read_replica = True
     
-    def get_queryset(self):
-        return RoomType.objects.filter(is_active=True).prefetch_related(
-            'amenities', 'rooms'
+    def get_etag(self, request, *args, **kwargs):
+        return make_etag(
+            'room-type', kwargs.get('pk'), catalog.get_catalog_version(),
+            get_availability_version(), user_etag_part(request)
         )
     
+    def get_queryset(self):
+        return RoomType.objects.filter(is_active=True).prefetch_related('amenities')
+    
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
@@ -70,11 +122,9 @@ class RoomTypeDetailView(DetailView):
             check_out = datetime.strptime(check_out_str, '%Y-%m-%d').date()
             
             # Contar habitaciones disponibles
-            available_rooms = [
-                room for room in self.object.rooms.all()
-                if room.is_available_for_dates(check_in, check_out)
-            ]
-            context['available_rooms_count'] = len(available_rooms)
+            context['available_rooms_count'] = self.object.available_rooms_for_dates(
+                check_in, check_out
+            ).count()
             context['check_in'] = check_in
             context['check_out'] = check_out
         else:
@@ -83,9 +133,14 @@ class RoomTypeDetailView(DetailView):
         return context
 
 
-class CheckAvailabilityView(View):
+class CheckAvailabilityView(ConditionalGetMixin, View):
     """Vista AJAX para verificar disponibilidad"""
     
+    def get_etag(self, request, *args, **kwargs):
+        return make_etag(
+            'check-availability', catalog.get_catalog_version(), get_availability_version()
+        )
+    
     def get(self, request):
         room_type_id = request.GET.get('room_type_id')
         check_in_str = request.GET.get('check_in')
@@ -102,17 +157,14 @@ class CheckAvailabilityView(View):
             room_type = RoomType.objects.get(id=room_type_id, is_active=True)
             
             # Buscar habitaciones disponibles
-            available_rooms = [
-                room for room in room_type.rooms.all()
-                if room.is_available_for_dates(check_in, check_out)
-            ]
+            available_count = room_type.available_rooms_for_dates(check_in, check_out).count()
             
             nights = (check_out - check_in).days
             total_price = room_type.price_per_night * nights
             
             return JsonResponse({
-                'available': len(available_rooms) > 0,
-                'available_count': len(available_rooms),
+                'available': available_count > 0,
+                'available_count': available_count,
                 'nights': nights,
                 'price_per_night': float(room_type.price_per_night),
                 'total_price': float(total_price),
@@ -122,3 +174,34 @@ class CheckAvailabilityView(View):
             return JsonResponse({
                 'error': str(e)
             }, status=400)
+
+
+class ICalFeedView(ConditionalGetMixin, View):
+    """
+    Ocupación en formato iCalendar para channel managers y housekeeping.
+    
+    La URL lleva un token firmado (rooms.ical.feed_token) con el alcance:
+    habitación, tipo de habitación u hotel. El ETag cambia con la
+    disponibilidad y con el día, así una consulta sin cambios recibe 304
+    sin leer reservas.
+    """
+    
+    def get_scope(self, token):
+        try:
+            return parse_feed_token(token)
+        except signing.BadSignature:
+            raise Http404('Calendario no encontrado')
+    
+    def get_etag(self, request, token):
+        scope, pk = self.get_scope(token)
+        return make_etag('ical', scope, pk, get_availability_version(), timezone.localdate())
+    
+    def get(self, request, token):
+        scope, pk = self.get_scope(token)
+        name = feed_name(scope, pk)
+        if name is None:
+            raise Http404('Calendario no encontrado')
+        response = StreamingHttpResponse(feed_chunks(scope, pk, name), content_type='text/calendar; charset=utf-8')
+        response['Content-Disposition'] = f'inline; filename="{scope}-{pk}.ics"'
+        response['Cache-Control'] = 'no-cache'
+        return response